@@ -12,311 +12,506 @@
 
 import pandas as pd
 import numpy as np
+import copy
 from datetime import datetime, timedelta
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy.sparse import csr_matrix
+from string import Formatter
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from ..config.constants import EngineConstants
+    from ..utils.similarity import top_k_similar_rows
+    from ..utils.stage_metrics import StageMetrics, timed_stage
+    from ..utils.stage_graph import StageGraph
+except ImportError:  # 패키지 밖(프로젝트 루트 스크립트)에서 실행되는 경우
+    from src.core.config.constants import EngineConstants
+    from src.core.utils.similarity import top_k_similar_rows
+    from src.core.utils.stage_metrics import StageMetrics, timed_stage
+    from src.core.utils.stage_graph import StageGraph
+
 class SalesRecommendationEngine:
+    # 교차판매 기본값 (유사 고객 수, 고객별 추천 품목 수)
+    CROSS_SELL_NEIGHBORS = 5
+    CROSS_SELL_TOP_N = 5
+    
+    # 이탈 위험 규칙: 조건(고객 세분화 DataFrame -> bool 배열), 점수, 위험요소 문구 ({컬럼} 은 고객 값으로 치환)
+    CHURN_RISK_RULES = [
+        # 위험 요소 1: 최근 구매일이 오래됨
+        {'name': 'recency_90', 'points': 30, 'label': '최근 구매 없음 (90일 이상)',
+         'condition': lambda s: s['최근구매일수'] > 90},
+        {'name': 'recency_60', 'points': 15, 'label': '구매 간격 증가 (60일 이상)',
+         'condition': lambda s: (s['최근구매일수'] > 60) & (s['최근구매일수'] <= 90)},
+        # 위험 요소 2: 매출 감소
+        {'name': 'sales_drop_20', 'points': 25, 'label': '매출 급감 ({성장률}%)',
+         'condition': lambda s: s['성장률'] < -20},
+        {'name': 'sales_drop_10', 'points': 15, 'label': '매출 감소 ({성장률}%)',
+         'condition': lambda s: (s['성장률'] < -10) & (s['성장률'] >= -20)},
+        # 위험 요소 3: 활동 빈도 감소
+        {'name': 'low_frequency', 'points': 20, 'label': '활동 빈도 낮음',
+         'condition': lambda s: s['Frequency점수'] < 0.3},
+        # 위험 요소 4: 품목 다양성 부족 (500만원 이상인데 품목이 3개 이하)
+        {'name': 'product_concentration', 'points': 10, 'label': '품목 집중도 높음',
+         'condition': lambda s: (s['품목수'] <= 3) & (s['총매출'] > 5000000)},
+    ]
+    
     def __init__(self):
         self.data = None
         self.customer_segments = None
         self.product_analysis = None
+        self.product_monthly_sales = None  # 품목군 x 기준년월 매출 피벗 (analyze_products 에서 생성)
         self.recommendations = []
         self.scaler = StandardScaler()
+        self.metrics = StageMetrics(track_memory=EngineConstants.STAGE_METRICS_TRACK_MEMORY)  # 단계별 경과 시간 / CPU 시간 / 최대 메모리 / 행 수
+        self.analysis_as_of = None  # 고객 / 품목 분석 기준월 (None 이면 데이터의 마지막 월)
+        self.stages = self._build_stage_graph()
         
+    def _build_stage_graph(self):
+        """분석 단계 의존 그래프 (결과는 필요할 때 계산해 캐시, load_data 시 전체 무효화)
+
+        preprocess -> customers -> churn ─┐
+                   -> products ────────────┼-> recommendations -> action_plan
+                   -> cross_sell ─────────┘
+        """
+        stages = StageGraph()
+        stages.add_stage('preprocess', self._preprocess_data)
+        stages.add_stage('customers', lambda: self._analyze_customers(self.analysis_as_of), ['preprocess'])
+        stages.add_stage('products', lambda: self._analyze_products(self.analysis_as_of), ['preprocess'])
+        stages.add_stage('cross_sell', lambda: self._find_cross_selling_opportunities(
+            self.CROSS_SELL_NEIGHBORS, self.CROSS_SELL_TOP_N), ['preprocess'])
+        stages.add_stage('churn', self._detect_churn_risk, ['customers'])
+        stages.add_stage('recommendations', self._generate_sales_recommendations,
+                         ['customers', 'products', 'cross_sell', 'churn'])
+        stages.add_stage('action_plan', self._generate_monthly_action_plan, ['recommendations'])
+        return stages
+        
+    @timed_stage('load_data')
     def load_data(self, csv_file_path):
         """CSV 데이터 로드 및 전처리"""
         try:
-            self.data = pd.read_csv(csv_file_path, encoding='utf-8')
+            self.set_data(pd.read_csv(csv_file_path, encoding='utf-8'))
             print(f"데이터 로드 완료: {len(self.data)}개 레코드")
-            self._preprocess_data()
+            self.stages.get('preprocess')
             return True
         except Exception as e:
             print(f"데이터 로드 실패: {e}")
             return False
     
+    def set_data(self, data):
+        """분석 데이터 교체 (분석 기준월 초기화 및 전체 단계 캐시 무효화, 전처리는 처음 사용할 때 수행)"""
+        self.data = data
+        self.analysis_as_of = None
+        self.stages.invalidate()
+    
     def _preprocess_data(self):
-        """데이터 전처리"""
-        # 기준년월을 datetime으로 변환
-        self.data['기준년월_dt'] = pd.to_datetime(self.data['기준년월'].astype(str), format='%Y%m')
+        """데이터 전처리 (다른 엔진과 공유하는 DataFrame 일 수 있으므로 사본에서 처리)"""
+        data = self.data.copy()
+        
+        # 기준년월을 정수(YYYYMM)와 datetime으로 변환 (DataProcessor 경로에서는 문자열로 들어옴)
+        year_month = pd.to_numeric(data['기준년월'].astype(str).str.strip(), errors='coerce')
+        data['기준년월_dt'] = pd.to_datetime(year_month.astype('Int64').astype(str), format='%Y%m', errors='coerce')
         
         # 숫자 컬럼 null 값 처리
         numeric_columns = ['총매출', '총수량', '원내매출', '원외매출', '단가']
         for col in numeric_columns:
-            if col in self.data.columns:
-                self.data[col] = pd.to_numeric(self.data[col], errors='coerce').fillna(0)
+            if col in data.columns:
+                data[col] = pd.to_numeric(data[col], errors='coerce').fillna(0)
         
-        # 유효한 거래만 필터링 (매출이 0보다 큰 경우)
-        self.data = self.data[self.data['총매출'] > 0].copy()
+        # 유효한 거래만 필터링 (매출이 0보다 크고 기준년월이 올바른 경우)
+        valid = (data['총매출'] > 0) & data['기준년월_dt'].notna()
+        self.data = data[valid].copy()
+        self.data['기준년월'] = year_month[valid].to_numpy(dtype=np.int64)
         
         print(f"전처리 완료: {len(self.data)}개 유효 거래")
+        return self.data
     
-    def analyze_customers(self):
-        """고객 분석 및 세분화 (RFM + 성장률 분석)"""
-        
-        # 거래처별 집계 분석
-        customer_analysis = []
-        
-        for account_code in self.data['거래처코드'].unique():
-            account_data = self.data[self.data['거래처코드'] == account_code]
-            
-            # 기본 정보
-            account_name = account_data['거래처명'].iloc[0]
-            manager = account_data['담당자'].iloc[0] if '담당자' in account_data.columns else '미지정'
-            region = account_data['권역'].iloc[0] if '권역' in account_data.columns else '미지정'
-            
-            # 매출 지표
-            total_sales = account_data['총매출'].sum()
-            total_qty = account_data['총수량'].sum()
-            transaction_count = len(account_data)
-            product_count = account_data['품목군'].nunique()
-            
-            # 시간 기반 분석
-            latest_date = account_data['기준년월_dt'].max()
-            earliest_date = account_data['기준년월_dt'].min()
-            active_months = account_data['기준년월'].nunique()
-            
-            # 최근성 분석 (Recency) - 최근 3개월 활동
-            recent_cutoff = pd.Timestamp('2025-02-01')  # 기준점
-            recent_data = account_data[account_data['기준년월_dt'] >= recent_cutoff]
-            days_since_last_purchase = (recent_cutoff - latest_date).days
-            
-            # 빈도 분석 (Frequency) - 전체 기간 대비 활동 비율
-            total_possible_months = 16  # 2024-01 ~ 2025-04
-            frequency_score = active_months / total_possible_months
-            
-            # 금액 분석 (Monetary)
-            avg_transaction_value = total_sales / transaction_count if transaction_count > 0 else 0
-            
-            # 성장률 분석
-            recent_3months = account_data[account_data['기준년월'].isin([202502, 202503, 202504])]
-            prev_3months = account_data[account_data['기준년월'].isin([202411, 202412, 202501])]
-            
-            recent_sales = recent_3months['총매출'].sum()
-            prev_sales = prev_3months['총매출'].sum()
-            growth_rate = ((recent_sales - prev_sales) / prev_sales * 100) if prev_sales > 0 else 0
-            
-            # 고객 상태 판단
-            recency_score = 1 if days_since_last_purchase <= 90 else 0.5 if days_since_last_purchase <= 180 else 0
-            frequency_score = min(frequency_score, 1.0)
-            monetary_score = min(total_sales / 10000000, 1.0)  # 1천만원 기준으로 정규화
-            
-            # RFM 종합 점수
-            rfm_score = (recency_score + frequency_score + monetary_score) / 3
-            
-            # 세그먼트 분류
-            if recency_score >= 0.8 and frequency_score >= 0.6 and monetary_score >= 0.3:
-                segment = 'Champions'  # 최우수 고객
-                priority = 1
-            elif recency_score >= 0.8 and frequency_score >= 0.4:
-                segment = 'Loyal Customers'  # 충성 고객
-                priority = 2
-            elif recency_score >= 0.8 and monetary_score >= 0.2:
-                segment = 'Potential Loyalists'  # 잠재 충성 고객
-                priority = 3
-            elif recency_score >= 0.8:
-                segment = 'New Customers'  # 신규 고객
-                priority = 4
-            elif frequency_score >= 0.4 and monetary_score >= 0.2:
-                segment = 'At Risk'  # 위험 고객
-                priority = 2  # 높은 우선순위로 관리 필요
-            elif frequency_score >= 0.3:
-                segment = 'Cannot Lose Them'  # 놓칠 수 없는 고객
-                priority = 3
-            else:
-                segment = 'Lost'  # 이탈 고객
-                priority = 5
-            
-            customer_analysis.append({
-                '거래처코드': account_code,
-                '거래처명': account_name,
-                '담당자': manager,
-                '권역': region,
-                '총매출': total_sales,
-                '총수량': total_qty,
-                '거래건수': transaction_count,
-                '품목수': product_count,
-                '활동월수': active_months,
-                '최근구매일수': days_since_last_purchase,
-                '최근3개월매출': recent_sales,
-                '이전3개월매출': prev_sales,
-                '성장률': round(growth_rate, 1),
-                '월평균매출': round(total_sales / active_months, 0),
-                '거래당평균': round(avg_transaction_value, 0),
-                'Recency점수': round(recency_score, 2),
-                'Frequency점수': round(frequency_score, 2),
-                'Monetary점수': round(monetary_score, 2),
-                'RFM점수': round(rfm_score, 2),
-                '세그먼트': segment,
-                '우선순위': priority
-            })
-        
-        self.customer_segments = pd.DataFrame(customer_analysis)
+    def analyze_customers(self, as_of=None):
+        """고객 분석 및 세분화 (RFM + 성장률 분석)
+
+        as_of: 기준월 (202504, '2025-04' 등). None 이면 데이터의 마지막 월을 사용합니다.
+        결과는 'customers' 단계로 캐시되며 (반환값은 사본), 기준월이 바뀌면 고객 / 품목 분석과
+        후속 단계 캐시가 무효화됩니다. 종합 추천 등 후속 단계는 마지막으로 설정된 기준월을 따릅니다.
+        """
+        self._set_analysis_as_of(as_of)
+        return _copy_frame(self.stages.get('customers'))
+    
+    def _set_analysis_as_of(self, as_of):
+        """분석 기준월 설정 (None 또는 마지막 월이면 최신 기준, 바뀌면 customers / products 및 후속 단계 캐시 무효화)"""
+        if as_of is not None:
+            as_of = _month_label(_month_number(as_of))
+            if as_of == _month_label(_month_number(self.stages.get('preprocess')['기준년월'].max())):
+                as_of = None
+        if as_of != self.analysis_as_of:
+            self.analysis_as_of = as_of
+            self.stages.invalidate('customers')
+            self.stages.invalidate('products')
+    
+    @timed_stage('analyze_customers')
+    def _analyze_customers(self, as_of=None):
+        """고객 분석 및 세분화 계산
+
+        as_of: 기준월 (기본값은 데이터의 마지막 월). 기준월 말까지의
+        거래만 사용하며, 최근 3개월(기준월 포함) / 이전 3개월 매출로 성장률을, 최근 3개월
+        시작일 대비 마지막 구매 경과일로 Recency 를, 데이터 시작월~기준월 중 활동월 비율로
+        Frequency 를 계산합니다.
+        """
+        if as_of is None:
+            as_of = int(self.data['기준년월'].max())
+        
+        snapshot = self._build_customer_snapshots([as_of])
+        self.customer_segments = snapshot.drop(columns='기준시점').reset_index(drop=True)
         print(f"고객 분석 완료: {len(self.customer_segments)}개 거래처")
         
         return self.customer_segments
     
-    def analyze_products(self):
-        """품목 분석 및 교차판매 기회 발굴"""
-        
-        product_analysis = []
-        
-        for product in self.data['품목군'].unique():
-            product_data = self.data[self.data['품목군'] == product]
-            
-            # 기본 지표
-            total_sales = product_data['총매출'].sum()
-            total_qty = product_data['총수량'].sum()
-            customer_count = product_data['거래처코드'].nunique()
-            avg_price = product_data['단가'].mean() if '단가' in product_data.columns else total_sales / total_qty
-            
-            # 성장률 분석
-            recent_3months = product_data[product_data['기준년월'].isin([202502, 202503, 202504])]
-            prev_3months = product_data[product_data['기준년월'].isin([202411, 202412, 202501])]
-            
-            recent_sales = recent_3months['총매출'].sum()
-            prev_sales = prev_3months['총매출'].sum()
-            growth_rate = ((recent_sales - prev_sales) / prev_sales * 100) if prev_sales > 0 else 0
-            
-            # 계절성 분석 (월별 변동계수)
-            monthly_sales = product_data.groupby('기준년월')['총매출'].sum()
-            seasonality = monthly_sales.std() / monthly_sales.mean() if monthly_sales.mean() > 0 else 0
-            
-            product_analysis.append({
-                '품목군': product,
-                '총매출': total_sales,
-                '총수량': total_qty,
-                '고객수': customer_count,
-                '평균단가': round(avg_price, 0),
-                '최근3개월매출': recent_sales,
-                '성장률': round(growth_rate, 1),
-                '계절성지수': round(seasonality, 2),
-                '시장점유율': round(total_sales / self.data['총매출'].sum() * 100, 2)
-            })
+    @timed_stage('customer_snapshots')
+    def analyze_customer_snapshots(self, months=None):
+        """기준월별 고객 세분화 이력 (백테스트용)
+
+        months 를 지정하지 않으면 데이터의 모든 월말 시점에 대해 analyze_customers 와 같은
+        지표 / 세그먼트를 계산하고, '기준시점' 컬럼을 앞에 붙인 긴 형식으로 반환합니다.
+        """
+        self.stages.get('preprocess')
+        if months is None:
+            first_month, last_month = _month_number(self.data['기준년월'].min()), _month_number(self.data['기준년월'].max())
+            months = [_month_label(number) for number in range(first_month, last_month + 1)]
+        
+        snapshots = self._build_customer_snapshots(months)
+        print(f"고객 세분화 이력 계산 완료: {len(months)}개 시점, {len(snapshots)}행")
+        
+        return snapshots
+    
+    def _build_customer_snapshots(self, as_of_months):
+        """거래처 x 월 누적 집계 텐서로 여러 기준월의 RFM / 성장률 / 세그먼트를 한 번에 계산
+
+        각 기준월에는 그 시점까지 거래가 있는 거래처만 포함되며, 거래처 순서는 데이터 첫 등장 순서입니다.
+        """
+        data = self.data
+        customer_codes, customer_index = pd.factorize(data['거래처코드'])
+        data_months = (data['기준년월_dt'].dt.year * 12 + data['기준년월_dt'].dt.month - 1).to_numpy()
+        first_month = data_months.min()
+        
+        targets = np.array([_month_number(month) for month in as_of_months]) - first_month
+        if (targets < 0).any():
+            raise ValueError(f"기준월이 데이터 시작월({_month_label(first_month)})보다 이전입니다: {as_of_months}")
+        
+        n_customers = len(customer_index)
+        n_months = int(max(data_months.max() - first_month, targets.max())) + 1
+        cells = customer_codes * n_months + (data_months - first_month)
+        
+        def cumulative(weights=None, cells=cells):
+            """거래처 x 월 합계의 월 방향 누적합 (앞에 0 열을 붙여 [:, t + 1] 이 t 월까지의 합계)"""
+            monthly = np.bincount(cells, weights=weights, minlength=n_customers * n_months).reshape(n_customers, n_months)
+            return np.concatenate([np.zeros((n_customers, 1)), np.cumsum(monthly, axis=1)], axis=1), monthly
+        
+        sales, _ = cumulative(data['총매출'].to_numpy(dtype=float))
+        quantity, _ = cumulative(data['총수량'].to_numpy(dtype=float))
+        transactions, monthly_transactions = cumulative()
+        active_months, _ = cumulative((monthly_transactions > 0).ravel().astype(float),
+                                      cells=np.arange(n_customers * n_months))
+        
+        # 품목수: (거래처, 품목군) 최초 구매월 기준 누적
+        product_codes = pd.factorize(data['품목군'])[0]
+        valid = product_codes >= 0
+        first_purchase = (
+            pd.DataFrame({'customer': customer_codes[valid], 'product': product_codes[valid],
+                          'month': data_months[valid] - first_month})
+            .groupby(['customer', 'product'])['month'].min()
+        )
+        products, _ = cumulative(cells=first_purchase.index.get_level_values('customer').to_numpy() * n_months
+                                 + first_purchase.to_numpy())
+        
+        # 기준월까지의 마지막 구매월
+        month_positions = np.where(monthly_transactions > 0, np.arange(n_months), -1)
+        last_purchase = np.maximum.accumulate(month_positions, axis=1)
+        
+        # 기준월별 (거래처, 시점) 값 추출 -> 시점 순서로 펼침
+        def at(matrix, columns):
+            return matrix[:, columns].T.ravel()
+        
+        end = targets + 1
+        recent_start = np.maximum(targets - 2, 0)
+        prev_start = np.maximum(targets - 5, 0)
+        exists = at(transactions, end) > 0
+        
+        total_sales = at(sales, end)[exists]
+        recent_sales = (at(sales, end) - at(sales, recent_start))[exists]
+        prev_sales = (at(sales, recent_start) - at(sales, prev_start))[exists]
+        transaction_count = at(transactions, end)[exists].astype(np.int64)
+        active_count = at(active_months, end)[exists].astype(np.int64)
+        
+        # Recency: 최근 3개월 시작일 대비 마지막 구매월 경과일
+        reference_days = _month_start_days(first_month + targets - 2)
+        last_days = _month_start_days(first_month + at(last_purchase, targets))
+        days_since_last_purchase = (np.repeat(reference_days, n_customers) - last_days)[exists]
+        
+        # Frequency: 데이터 시작월부터 기준월까지의 개월 수 대비 활동월 비율
+        total_possible_months = np.repeat(targets + 1, n_customers)[exists]
+        
+        growth_rate = np.divide((recent_sales - prev_sales) * 100, prev_sales,
+                                out=np.zeros(len(total_sales)), where=prev_sales > 0)
+        recency_score = np.select([days_since_last_purchase <= 90, days_since_last_purchase <= 180], [1.0, 0.5], 0.0)
+        frequency_score = np.minimum(active_count / total_possible_months, 1.0)
+        monetary_score = np.minimum(total_sales / 10000000, 1.0)  # 1천만원 기준으로 정규화
+        rfm_score = (recency_score + frequency_score + monetary_score) / 3
+        
+        # 세그먼트 분류 (위에서부터 먼저 만족하는 조건 적용)
+        recent = recency_score >= 0.8
+        segment_conditions = [
+            recent & (frequency_score >= 0.6) & (monetary_score >= 0.3),  # Champions: 최우수 고객
+            recent & (frequency_score >= 0.4),                            # Loyal Customers: 충성 고객
+            recent & (monetary_score >= 0.2),                             # Potential Loyalists: 잠재 충성 고객
+            recent,                                                       # New Customers: 신규 고객
+            (frequency_score >= 0.4) & (monetary_score >= 0.2),           # At Risk: 위험 고객 (높은 우선순위로 관리 필요)
+            frequency_score >= 0.3,                                       # Cannot Lose Them: 놓칠 수 없는 고객
+        ]
         
-        self.product_analysis = pd.DataFrame(product_analysis).sort_values('총매출', ascending=False)
+        # 기본 정보 (거래처별 첫 거래 행 기준)
+        first_rows = data.drop_duplicates('거래처코드').set_index('거래처코드').reindex(customer_index)
+        positions = np.tile(np.arange(n_customers), len(targets))[exists]
+        
+        def info(column):
+            values = first_rows[column].to_numpy() if column in data.columns else np.full(n_customers, '미지정', dtype=object)
+            return values[positions]
+        
+        def source_dtype(values, column):
+            """원본 컬럼이 정수형이면 합계도 정수형으로 유지"""
+            return values.astype(data[column].dtype) if pd.api.types.is_integer_dtype(data[column]) else values
+        
+        return pd.DataFrame({
+            '기준시점': np.repeat([_month_label(first_month + target) for target in targets], n_customers)[exists],
+            '거래처코드': customer_index.to_numpy()[positions],
+            '거래처명': info('거래처명'),
+            '담당자': info('담당자'),
+            '권역': info('권역'),
+            '총매출': source_dtype(total_sales, '총매출'),
+            '총수량': source_dtype(at(quantity, end)[exists], '총수량'),
+            '거래건수': transaction_count,
+            '품목수': at(products, end)[exists].astype(np.int64),
+            '활동월수': active_count,
+            '최근구매일수': days_since_last_purchase,
+            '최근3개월매출': source_dtype(recent_sales, '총매출'),
+            '이전3개월매출': source_dtype(prev_sales, '총매출'),
+            '성장률': np.round(growth_rate, 1),
+            '월평균매출': np.round(total_sales / active_count, 0),
+            '거래당평균': np.round(total_sales / transaction_count, 0),
+            'Recency점수': np.round(recency_score, 2),
+            'Frequency점수': np.round(frequency_score, 2),
+            'Monetary점수': np.round(monetary_score, 2),
+            'RFM점수': np.round(rfm_score, 2),
+            '세그먼트': np.select(
+                segment_conditions,
+                ['Champions', 'Loyal Customers', 'Potential Loyalists', 'New Customers', 'At Risk', 'Cannot Lose Them'],
+                'Lost'  # 이탈 고객
+            ),
+            '우선순위': np.select(segment_conditions, [1, 2, 3, 4, 2, 3], 5)
+        })
+    
+    def analyze_products(self, as_of=None):
+        """품목 분석 및 교차판매 기회 발굴
+
+        as_of: 기준월. None 이면 데이터의 마지막 월을 사용하며, 결과는 'products' 단계로 캐시됩니다 (반환값은 사본).
+        """
+        self._set_analysis_as_of(as_of)
+        return _copy_frame(self.stages.get('products'))
+    
+    @timed_stage('analyze_products')
+    def _analyze_products(self, as_of=None):
+        """품목 분석 계산
+
+        as_of: 기준월 (기본값은 데이터의 마지막 월). 기준월 말까지의 거래만 사용하며,
+        성장률은 analyze_customers 와 같은 최근 3개월 / 이전 3개월 비교입니다.
+        총매출 / 성장률 / 계절성(월별 변동계수) / 시장점유율은 품목군 x 기준년월 매출 피벗
+        하나에서 계산하며, 피벗은 다른 단계에서 재사용할 수 있도록 self.product_monthly_sales 에 저장합니다.
+        """
+        
+        as_of, recent_months, prev_months = self._growth_windows(as_of)
+        data = self.data[self.data['기준년월'] <= as_of]
+        products = pd.Index(data['품목군'].dropna().unique(), name='품목군')
+        
+        # 품목군 x 기준년월 매출 피벗 (거래 없는 월은 0)
+        monthly_sales = (
+            data.groupby(['품목군', '기준년월'])['총매출'].sum()
+            .unstack(fill_value=0)
+            .reindex(products)
+        )
+        self.product_monthly_sales = monthly_sales
+        
+        # 기본 지표
+        grouped = data.groupby('품목군')
+        total_sales = monthly_sales.sum(axis=1)
+        total_qty = grouped['총수량'].sum().reindex(products)
+        customer_count = grouped['거래처코드'].nunique().reindex(products)
+        avg_price = grouped['단가'].mean().reindex(products) if '단가' in data.columns else total_sales / total_qty
+        
+        # 성장률 분석
+        recent_sales = monthly_sales[monthly_sales.columns.intersection(recent_months)].sum(axis=1).to_numpy()
+        prev_sales = monthly_sales[monthly_sales.columns.intersection(prev_months)].sum(axis=1).to_numpy()
+        growth_rate = np.divide((recent_sales - prev_sales) * 100, prev_sales,
+                                out=np.zeros(len(products)), where=prev_sales > 0)
+        
+        # 계절성 분석 (거래가 있는 월 기준 월별 변동계수, 전처리에서 매출 0 이하 거래는 제외되므로 매출 > 0 인 월)
+        active_sales = monthly_sales.where(monthly_sales > 0)
+        monthly_mean = active_sales.mean(axis=1)
+        seasonality = (active_sales.std(axis=1) / monthly_mean).where(monthly_mean > 0, 0)
+        
+        self.product_analysis = pd.DataFrame({
+            '품목군': products.to_numpy(),
+            '총매출': total_sales.to_numpy(),
+            '총수량': total_qty.to_numpy(),
+            '고객수': customer_count.to_numpy(),
+            '평균단가': np.round(avg_price.to_numpy(dtype=float), 0),
+            '최근3개월매출': recent_sales,
+            '성장률': np.round(growth_rate, 1),
+            '계절성지수': np.round(seasonality.to_numpy(dtype=float), 2),
+            '시장점유율': np.round(total_sales.to_numpy() / data['총매출'].sum() * 100, 2)
+        }).sort_values('총매출', ascending=False)
         print(f"품목 분석 완료: {len(self.product_analysis)}개 품목군")
         
         return self.product_analysis
     
-    def find_cross_selling_opportunities(self):
-        """교차판매 기회 발굴"""
-        
-        # 고객-품목 매트릭스 생성
-        customer_product_matrix = self.data.pivot_table(
-            index='거래처코드', 
-            columns='품목군', 
-            values='총매출', 
-            aggfunc='sum', 
-            fill_value=0
+    def _growth_windows(self, as_of=None):
+        """기준월(YYYYMM), 최근 3개월(기준월 포함), 이전 3개월 목록"""
+        number = _month_number(self.data['기준년월'].max() if as_of is None else as_of)
+        recent_months = [_month_label(number - offset) for offset in (2, 1, 0)]
+        prev_months = [_month_label(number - offset) for offset in (5, 4, 3)]
+        return _month_label(number), recent_months, prev_months
+    
+    def find_cross_selling_opportunities(self, n_neighbors=None, top_n=None):
+        """교차판매 기회 발굴
+
+        기본값(CROSS_SELL_NEIGHBORS, CROSS_SELL_TOP_N) 결과는 'cross_sell' 단계로 캐시되며 (반환값은 사본),
+        다른 값을 지정하면 캐시 없이 새로 계산합니다.
+        """
+        n_neighbors = self.CROSS_SELL_NEIGHBORS if n_neighbors is None else n_neighbors
+        top_n = self.CROSS_SELL_TOP_N if top_n is None else top_n
+        if (n_neighbors, top_n) == (self.CROSS_SELL_NEIGHBORS, self.CROSS_SELL_TOP_N):
+            return _copy_frame(self.stages.get('cross_sell'))
+        return self._find_cross_selling_opportunities(n_neighbors, top_n)
+    
+    @timed_stage('cross_selling')
+    def _find_cross_selling_opportunities(self, n_neighbors, top_n):
+        """교차판매 기회 계산
+
+        고객-품목 매출 희소 행렬에서 코사인 유사도 상위 n_neighbors 명의 유사 고객을 찾고,
+        (유사도 가중치 x 구매 여부) 희소 행렬 곱 한 번으로 미구매 품목 점수를 계산해
+        점수 상위 top_n 개 품목을 순위대로 추천합니다. 점수는 해당 품목을 구매한 유사 고객들의 유사도 합입니다.
+        """
+        
+        # 고객-품목 매출 희소 행렬 (거래처코드 / 품목군 정렬 순서)
+        customer_codes, customers = pd.factorize(self.data['거래처코드'], sort=True)
+        product_codes, products = pd.factorize(self.data['품목군'], sort=True)
+        valid = product_codes >= 0
+        customer_product_matrix = csr_matrix(
+            (self.data['총매출'].to_numpy(dtype=float)[valid], (customer_codes[valid], product_codes[valid])),
+            shape=(len(customers), len(products))
         )
-        
-        # 코사인 유사도로 고객 간 유사성 계산
-        customer_similarity = cosine_similarity(customer_product_matrix)
-        customer_similarity_df = pd.DataFrame(
-            customer_similarity, 
-            index=customer_product_matrix.index, 
-            columns=customer_product_matrix.index
+        customer_product_matrix.sum_duplicates()
+        customer_product_matrix.eliminate_zeros()
+        purchased = customer_product_matrix.copy()
+        purchased.data[:] = 1.0
+        
+        # 유사 고객 (자기 자신 제외 상위 n_neighbors 명, 유사도 0 인 고객은 제외)
+        neighbor_indices, neighbor_weights = top_k_similar_rows(customer_product_matrix, n_neighbors)
+        neighbor_weights = np.where(neighbor_weights > 0, neighbor_weights, 0.0)
+        neighbor_matrix = csr_matrix(
+            (neighbor_weights.ravel(), (np.repeat(np.arange(len(customers)), neighbor_indices.shape[1]), neighbor_indices.ravel())),
+            shape=(len(customers), len(customers))
         )
-        
-        cross_sell_opportunities = []
-        
-        for customer_code in customer_product_matrix.index:
-            # 해당 고객이 구매한 품목
-            purchased_products = customer_product_matrix.loc[customer_code]
-            purchased_products = purchased_products[purchased_products > 0].index.tolist()
-            
-            # 유사한 고객들 찾기 (상위 5명)
-            similar_customers = customer_similarity_df[customer_code].sort_values(ascending=False)[1:6]
-            
-            # 유사 고객들이 구매했지만 해당 고객이 구매하지 않은 품목들
-            recommended_products = set()
-            for similar_customer in similar_customers.index:
-                similar_purchased = customer_product_matrix.loc[similar_customer]
-                similar_purchased = similar_purchased[similar_purchased > 0].index.tolist()
-                
-                for product in similar_purchased:
-                    if product not in purchased_products:
-                        recommended_products.add(product)
-            
-            if recommended_products:
-                customer_name = self.data[self.data['거래처코드'] == customer_code]['거래처명'].iloc[0]
-                cross_sell_opportunities.append({
-                    '거래처코드': customer_code,
-                    '거래처명': customer_name,
-                    '현재품목수': len(purchased_products),
-                    '추천품목': list(recommended_products)[:5],  # 상위 5개만
-                    '추천품목수': len(list(recommended_products)[:5])
-                })
-        
-        return pd.DataFrame(cross_sell_opportunities)
+        neighbor_matrix.eliminate_zeros()
+        
+        # 품목 점수 = 유사 고객 가중치 x 구매 여부 (이미 구매한 품목 제외)
+        scores = (neighbor_matrix @ purchased).tocsr()
+        scores = (scores - scores.multiply(purchased)).tocoo()
+        scores.eliminate_zeros()
+        
+        # 고객별 점수 내림차순(동점은 품목군 순) 상위 top_n
+        order = np.lexsort((scores.col, -scores.data, scores.row))
+        rows, cols, values = scores.row[order], scores.col[order], scores.data[order]
+        keep = np.arange(len(rows)) - np.searchsorted(rows, rows) < top_n
+        rows, cols, values = rows[keep], cols[keep], values[keep]
+        
+        if len(rows) == 0:
+            return pd.DataFrame(columns=['거래처코드', '거래처명', '현재품목수', '추천품목', '추천점수', '추천품목수'])
+        
+        target_rows, starts = np.unique(rows, return_index=True)
+        customer_names = self.data.drop_duplicates('거래처코드').set_index('거래처코드')['거래처명']
+        target_codes = customers[target_rows]
+        
+        return pd.DataFrame({
+            '거래처코드': target_codes,
+            '거래처명': customer_names.reindex(target_codes).to_numpy(),
+            '현재품목수': np.diff(purchased.indptr)[target_rows],
+            '추천품목': [items.tolist() for items in np.split(products.to_numpy()[cols], starts[1:])],
+            '추천점수': [items.tolist() for items in np.split(np.round(values, 4), starts[1:])],
+            '추천품목수': np.diff(np.append(starts, len(rows)))
+        })
     
     def detect_churn_risk(self):
-        """이탈 위험 고객 감지"""
-        
-        churn_risk_customers = []
-        
-        for _, customer in self.customer_segments.iterrows():
-            risk_score = 0
-            risk_factors = []
-            
-            # 위험 요소 1: 최근 구매일이 오래됨
-            if customer['최근구매일수'] > 90:
-                risk_score += 30
-                risk_factors.append('최근 구매 없음 (90일 이상)')
-            elif customer['최근구매일수'] > 60:
-                risk_score += 15
-                risk_factors.append('구매 간격 증가 (60일 이상)')
-            
-            # 위험 요소 2: 매출 감소
-            if customer['성장률'] < -20:
-                risk_score += 25
-                risk_factors.append(f'매출 급감 ({customer["성장률"]}%)')
-            elif customer['성장률'] < -10:
-                risk_score += 15
-                risk_factors.append(f'매출 감소 ({customer["성장률"]}%)')
-            
-            # 위험 요소 3: 활동 빈도 감소
-            if customer['Frequency점수'] < 0.3:
-                risk_score += 20
-                risk_factors.append('활동 빈도 낮음')
-            
-            # 위험 요소 4: 품목 다양성 부족
-            if customer['품목수'] <= 3 and customer['총매출'] > 5000000:  # 500만원 이상인데 품목이 3개 이하
-                risk_score += 10
-                risk_factors.append('품목 집중도 높음')
-            
-            # 위험 등급 결정
-            if risk_score >= 50:
-                risk_level = '높음'
-            elif risk_score >= 30:
-                risk_level = '중간'
-            elif risk_score >= 15:
-                risk_level = '낮음'
-            else:
-                risk_level = '안전'
-            
-            if risk_score >= 15:  # 위험도가 있는 고객만 포함
-                churn_risk_customers.append({
-                    '거래처코드': customer['거래처코드'],
-                    '거래처명': customer['거래처명'],
-                    '담당자': customer['담당자'],
-                    '위험점수': risk_score,
-                    '위험등급': risk_level,
-                    '위험요소': ', '.join(risk_factors),
-                    '총매출': customer['총매출'],
-                    '최근3개월매출': customer['최근3개월매출'],
-                    '성장률': customer['성장률']
-                })
-        
-        return pd.DataFrame(churn_risk_customers).sort_values('위험점수', ascending=False)
+        """이탈 위험 고객 감지 (결과는 'churn' 단계로 캐시되며 사본 반환)"""
+        return _copy_frame(self.stages.get('churn'))
+    
+    @timed_stage('churn_risk')
+    def _detect_churn_risk(self):
+        """이탈 위험 고객 계산
+
+        CHURN_RISK_RULES 의 규칙을 고객 세분화 결과 전체에 열 단위로 적용해 위험점수를 합산하고,
+        위험점수 15 이상인 고객에 대해서만 위험요소 문구를 만듭니다. 규칙별 실행 시간은
+        'churn_risk/rule:<이름>' 단계로 기록됩니다.
+        """
+        
+        segments = self.stages.get('customers').reset_index(drop=True)
+        risk_score = np.zeros(len(segments), dtype=np.int64)
+        rule_masks = []
+        
+        for rule in self.CHURN_RISK_RULES:
+            with self.metrics.stage(f"rule:{rule['name']}", rows=len(segments)):
+                mask = np.asarray(rule['condition'](segments), dtype=bool)
+                risk_score += np.where(mask, rule['points'], 0)
+            rule_masks.append(mask)
+        
+        # 위험도가 있는 고객만 포함
+        flagged = np.flatnonzero(risk_score >= 15)
+        flagged_segments = segments.iloc[flagged]
+        
+        # 위험 요소 문구 (규칙 순서대로 ', ' 로 연결)
+        risk_factors = np.full(len(flagged), '', dtype=object)
+        for rule, mask in zip(self.CHURN_RISK_RULES, rule_masks):
+            hits = np.flatnonzero(mask[flagged])
+            labels = _render_labels(rule['label'], flagged_segments.iloc[hits])
+            current = risk_factors[hits]
+            risk_factors[hits] = np.where(current == '', labels, current + ', ' + labels)
+        
+        # 위험 등급 결정
+        flagged_score = risk_score[flagged]
+        risk_level = np.select([flagged_score >= 50, flagged_score >= 30, flagged_score >= 15], ['높음', '중간', '낮음'], '안전')
+        
+        churn_risk_customers = pd.DataFrame({
+            '거래처코드': flagged_segments['거래처코드'].to_numpy(),
+            '거래처명': flagged_segments['거래처명'].to_numpy(),
+            '담당자': flagged_segments['담당자'].to_numpy(),
+            '위험점수': flagged_score,
+            '위험등급': risk_level,
+            '위험요소': risk_factors,
+            '총매출': flagged_segments['총매출'].to_numpy(),
+            '최근3개월매출': flagged_segments['최근3개월매출'].to_numpy(),
+            '성장률': flagged_segments['성장률'].to_numpy()
+        })
+        
+        return churn_risk_customers.sort_values('위험점수', ascending=False)
     
     def generate_sales_recommendations(self):
-        """종합 영업 추천 생성"""
+        """종합 영업 추천 생성 (결과는 'recommendations' 단계로 캐시되며 사본 반환, 필요한 분석 단계는 자동 계산)"""
+        return _copy_frame(self.stages.get('recommendations'))
+    
+    @timed_stage('sales_recommendations')
+    def _generate_sales_recommendations(self):
+        """종합 영업 추천 계산"""
         
+        customer_segments = self.stages.get('customers')
+        product_analysis = self.stages.get('products')
         recommendations = []
         
         # 1. 고객 세그먼트별 추천
@@ -352,7 +547,7 @@ class SalesRecommendationEngine:
         }
         
         for segment, strategy in segment_strategies.items():
-            segment_customers = self.customer_segments[self.customer_segments['세그먼트'] == segment]
+            segment_customers = customer_segments[customer_segments['세그먼트'] == segment]
             if len(segment_customers) > 0:
                 recommendations.append({
                     '추천유형': '세그먼트별 전략',
@@ -364,7 +559,7 @@ class SalesRecommendationEngine:
                 })
         
         # 2. 고성장 기회 품목 추천
-        high_growth_products = self.product_analysis[self.product_analysis['성장률'] > 20].head(5)
+        high_growth_products = product_analysis[product_analysis['성장률'] > 20].head(5)
         if len(high_growth_products) > 0:
             recommendations.append({
                 '추천유형': '성장 품목 집중',
@@ -381,7 +576,7 @@ class SalesRecommendationEngine:
             })
         
         # 3. 교차판매 기회
-        cross_sell_opps = self.find_cross_selling_opportunities()
+        cross_sell_opps = self.stages.get('cross_sell')
         top_cross_sell = cross_sell_opps.nlargest(10, '추천품목수')
         if len(top_cross_sell) > 0:
             recommendations.append({
@@ -399,7 +594,7 @@ class SalesRecommendationEngine:
             })
         
         # 4. 이탈 위험 고객 대응
-        churn_risks = self.detect_churn_risk()
+        churn_risks = self.stages.get('churn')
         high_risk_customers = churn_risks[churn_risks['위험등급'].isin(['높음', '중간'])]
         if len(high_risk_customers) > 0:
             recommendations.append({
@@ -420,8 +615,17 @@ class SalesRecommendationEngine:
         return self.recommendations
     
     def generate_monthly_action_plan(self, target_month=None):
-        """월별 액션 플랜 생성"""
+        """월별 액션 플랜 생성 (target_month 미지정 시 결과는 'action_plan' 단계로 캐시되며 사본 반환)"""
+        if target_month is None:
+            return copy.deepcopy(self.stages.get('action_plan'))
+        return self._generate_monthly_action_plan(target_month)
+    
+    @timed_stage('monthly_action_plan')
+    def _generate_monthly_action_plan(self, target_month=None):
+        """월별 액션 플랜 계산"""
         
+        recommendations = self.stages.get('recommendations')
+        customer_segments = self.stages.get('customers')
         if target_month is None:
             target_month = datetime.now().strftime('%Y년 %m월')
         
@@ -434,7 +638,7 @@ class SalesRecommendationEngine:
         }
         
         # 우선순위별 액션 분류
-        for _, rec in self.recommendations.iterrows():
+        for _, rec in recommendations.iterrows():
             action_item = {
                 '제목': rec['추천유형'],
                 '대상': rec['대상'],
@@ -450,9 +654,9 @@ class SalesRecommendationEngine:
                 action_plan['장기액션'].append(action_item)
         
         # 주요 목표 설정
-        total_sales = self.customer_segments['총매출'].sum()
-        high_priority_sales = self.customer_segments[
-            self.customer_segments['우선순위'] <= 2
+        total_sales = customer_segments['총매출'].sum()
+        high_priority_sales = customer_segments[
+            customer_segments['우선순위'] <= 2
         ]['총매출'].sum()
         
         action_plan['주요목표'] = [
@@ -464,16 +668,17 @@ class SalesRecommendationEngine:
         
         return action_plan
     
+    @timed_stage('export')
     def export_analysis_report(self, output_path='sales_analysis_report.xlsx'):
-        """분석 결과를 Excel 파일로 내보내기"""
+        """분석 결과를 Excel 파일로 내보내기 (캐시된 단계 결과를 사용하므로 분석을 반복하지 않음)"""
         
         try:
             with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
                 # 고객 세분화 결과
-                self.customer_segments.to_excel(writer, sheet_name='고객세분화', index=False)
+                self.analyze_customers().to_excel(writer, sheet_name='고객세분화', index=False)
                 
                 # 품목 분석 결과
-                self.product_analysis.to_excel(writer, sheet_name='품목분석', index=False)
+                self.analyze_products().to_excel(writer, sheet_name='품목분석', index=False)
                 
                 # 교차판매 기회
                 cross_sell = self.find_cross_selling_opportunities()
@@ -484,7 +689,7 @@ class SalesRecommendationEngine:
                 churn_risk.to_excel(writer, sheet_name='이탈위험고객', index=False)
                 
                 # 추천사항
-                self.recommendations.to_excel(writer, sheet_name='영업추천', index=False)
+                self.generate_sales_recommendations().to_excel(writer, sheet_name='영업추천', index=False)
                 
                 # 월별 액션 플랜
                 action_plan = self.generate_monthly_action_plan()
@@ -498,17 +703,38 @@ class SalesRecommendationEngine:
             print(f"보고서 저장 실패: {e}")
             return False
     
+    def get_stage_metrics(self, summary=False):
+        """단계별 계측 기록 DataFrame (summary=True 이면 단계별 합계 요약)"""
+        return self.metrics.summary() if summary else self.metrics.to_frame()
+    
+    def get_stage_status(self):
+        """분석 단계별 선행 단계 / 캐시 여부 / 계산 횟수 / 캐시 사용 횟수 / 최근 계산 시간"""
+        return self.stages.status()
+    
+    def invalidate_stages(self, stage=None):
+        """단계 캐시 무효화 (stage 와 후속 단계, None 이면 전체). self.data 를 직접 수정한 경우 호출"""
+        self.stages.invalidate(stage)
+    
+    def set_metrics_log(self, log_path, track_memory=None):
+        """단계별 계측 기록을 JSON lines 파일에 추가 기록 (None 이면 기록 중단, track_memory 로 메모리 측정 전환)"""
+        self.metrics.log_path = log_path
+        if track_memory is not None:
+            self.metrics.track_memory = track_memory
+    
     def print_summary_report(self):
         """요약 보고서 출력"""
         
+        customer_segments = self.analyze_customers()
+        recommendations = self.generate_sales_recommendations()
+        
         print("\n" + "="*60)
         print("           영업 활동 추천 분석 보고서")
         print("="*60)
         
         # 전체 현황
-        total_customers = len(self.customer_segments)
-        total_sales = self.customer_segments['총매출'].sum()
-        avg_growth = self.customer_segments['성장률'].mean()
+        total_customers = len(customer_segments)
+        total_sales = customer_segments['총매출'].sum()
+        avg_growth = customer_segments['성장률'].mean()
         
         print(f"\n📊 전체 현황")
         print(f"   • 총 거래처 수: {total_customers:,}개")
@@ -517,7 +743,7 @@ class SalesRecommendationEngine:
         
         # 고객 세분화 현황
         print(f"\n🎯 고객 세분화 현황")
-        segment_summary = self.customer_segments.groupby('세그먼트').agg({
+        segment_summary = customer_segments.groupby('세그먼트').agg({
             '거래처코드': 'count',
             '총매출': 'sum',
             '성장률': 'mean'
@@ -530,16 +756,16 @@ class SalesRecommendationEngine:
         
         # 상위 추천사항
         print(f"\n💡 주요 추천사항 (상위 3개)")
-        for i, (_, rec) in enumerate(self.recommendations.head(3).iterrows(), 1):
+        for i, (_, rec) in enumerate(recommendations.head(3).iterrows(), 1):
             print(f"   {i}. {rec['추천유형']}")
             print(f"      → 대상: {rec['대상']}")
             print(f"      → 전략: {rec['전략']}")
             print(f"      → 예상효과: {rec['예상효과']}\n")
         
         # 즉시 액션 필요 고객
-        urgent_customers = self.customer_segments[
-            (self.customer_segments['세그먼트'].isin(['At Risk', 'Cannot Lose Them'])) |
-            (self.customer_segments['성장률'] < -20)
+        urgent_customers = customer_segments[
+            (customer_segments['세그먼트'].isin(['At Risk', 'Cannot Lose Them'])) |
+            (customer_segments['성장률'] < -20)
         ]
         
         if len(urgent_customers) > 0:
@@ -553,6 +779,45 @@ class SalesRecommendationEngine:
         print("\n" + "="*60)
 
 
+def _render_labels(template, rows):
+    """문구 템플릿의 {컬럼} 을 행별 값으로 치환한 object 배열 (치환 필드가 없으면 그대로 반복)"""
+    fields = [field for _, field, _, _ in Formatter().parse(template) if field]
+    if not fields:
+        return np.full(len(rows), template, dtype=object)
+    columns = [rows[field].tolist() for field in fields]
+    labels = np.empty(len(rows), dtype=object)
+    labels[:] = [template.format(**dict(zip(fields, values))) for values in zip(*columns)]
+    return labels
+
+
+def _copy_frame(frame):
+    """캐시된 단계 결과의 사본 (목록 값도 복사하므로 호출자가 수정해도 캐시는 바뀌지 않음)"""
+    frame = frame.copy()
+    for column in frame.columns[frame.dtypes == object]:
+        frame[column] = frame[column].map(lambda value: list(value) if isinstance(value, list) else value)
+    return frame
+
+
+def _month_number(value):
+    """기준년월(202504, '202504', '2025-04', Timestamp 등)을 연 * 12 + (월 - 1) 정수로 변환"""
+    if isinstance(value, (int, np.integer)) or (isinstance(value, str) and value.isdigit() and len(value) == 6):
+        value = int(value)
+        return value // 100 * 12 + value % 100 - 1
+    value = pd.Timestamp(value)
+    return value.year * 12 + value.month - 1
+
+
+def _month_label(number):
+    """_month_number 의 역변환 (YYYYMM 정수)"""
+    return int(number // 12 * 100 + number % 12 + 1)
+
+
+def _month_start_days(numbers):
+    """월 번호 배열 -> 해당 월 1일의 1970-01-01 기준 일수"""
+    months = np.asarray(numbers, dtype=np.int64) - 1970 * 12
+    return months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+
+
 # 사용 예시
 if __name__ == "__main__":
     # 엔진 초기화
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+엔진 규모별 벤치마크 실행기
+합성 데이터(10k / 100k / 1M 행)로 SmartSalesTargetingEngine, SalesRecommendationEngine,
+HanmiProductClassifier 의 단계별 경과 시간 / CPU 시간을 측정하고 결과를 JSON 으로 저장합니다.
+smart_append 는 SmartSalesTargetingEngine.append_month 의 신규 행 수별 증분 반영 비용을 측정합니다.
+결과 파일에는 git 커밋이 기록되므로 커밋 간 비교에 사용할 수 있습니다.
+
+사용법:
+python benchmarks/run_benchmarks.py --sizes 10000 100000
+python benchmarks/run_benchmarks.py --engines smart --compare latest
+python benchmarks/run_benchmarks.py --engines smart_append --sizes 100000 300000
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.engines import SmartSalesTargetingEngine, SalesRecommendationEngine, HanmiProductClassifier
+from src.core.utils.stage_metrics import StageMetrics
+from benchmarks.synthetic_data import write_sales_csv
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+ENGINES = ['smart', 'smart_append', 'sales', 'classifier']
+# smart_append 에서 반영할 마지막 월 행 비율
+APPEND_FRACTIONS = [0.01, 0.1, 1.0]
+APPEND_STAT_COLUMNS = ['reaggregated_rows', 'rebuilt_neighbor_rows', 'updated_neighbor_rows']
+RESULTS_DIR = Path(__file__).parent / 'results'
+
+
+def benchmark_smart_engine(csv_path, training_profile, track_memory):
+    """SmartSalesTargetingEngine 단계별 측정 (엔진 자체 계측 기록 사용)"""
+    engine = SmartSalesTargetingEngine()
+    engine.set_metrics_log(None, track_memory=track_memory)
+
+    with engine.metrics.stage('read_csv') as record:
+        data = pd.read_csv(csv_path, encoding='utf-8')
+        record['rows'] = len(data)
+    engine.load_and_prepare_data(data)
+    engine.build_predictive_models(training_profile)
+
+    products = engine.product_profiles.sort_values('총매출', ascending=False)['품목군'].head(5).tolist()
+    for product in products:
+        engine.recommend_targets_for_product(product, top_n=20)
+    engine.recommend_targets_for_all_product_groups(top_n=15, exclude_existing=False)
+    engine.recommend_targets_for_all_products(top_n=20)
+    with tempfile.TemporaryDirectory() as output_dir:
+        engine.export_recommendations(products[0], os.path.join(output_dir, 'export.xlsx'))
+
+    return engine.get_stage_metrics()
+
+
+def benchmark_smart_append(csv_path, track_memory, seed):
+    """SmartSalesTargetingEngine.append_month 측정 (신규 행 수별 경과 시간과 재계산 규모)
+
+    마지막 월을 뺀 데이터로 준비한 엔진을 아티팩트로 저장해 두고, 마지막 월에서 무작위로 뽑은
+    APPEND_FRACTIONS 비율의 행을 매번 새로 복원한 엔진에 반영한다. 단계 이름은
+    append_month_<비율> 이며 rows 는 신규 행 수다.
+    """
+    data = pd.read_csv(csv_path, encoding='utf-8')
+    last_month = data['기준년월'].max()
+    base = data[data['기준년월'] < last_month].reset_index(drop=True)
+    month = data[data['기준년월'] == last_month].reset_index(drop=True)
+
+    engine = SmartSalesTargetingEngine()
+    engine.load_and_prepare_data(base)
+    records = []
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        engine.save_artifacts(artifact_dir)
+        for fraction in APPEND_FRACTIONS:
+            new_rows = month.sample(n=max(1, int(len(month) * fraction)), random_state=seed).sort_index()
+            engine = SmartSalesTargetingEngine()
+            engine.load_artifacts(artifact_dir)
+            engine.set_metrics_log(None, track_memory=track_memory)
+            result = engine.append_month(new_rows)
+
+            frame = engine.get_stage_metrics()
+            record = frame[frame['stage'] == 'append_month'].iloc[-1].to_dict()
+            record.update({'stage': f'append_month_{fraction:.0%}', 'rows': len(new_rows)})
+            record.update({column: result[column] for column in APPEND_STAT_COLUMNS})
+            records.append(record)
+
+    return pd.DataFrame(records)
+
+
+def benchmark_sales_engine(csv_path, track_memory):
+    """SalesRecommendationEngine 단계별 측정 (엔진 자체 계측 기록 사용)"""
+    engine = SalesRecommendationEngine()
+    engine.set_metrics_log(None, track_memory=track_memory)
+
+    if not engine.load_data(csv_path):
+        raise RuntimeError(f"데이터 로드 실패: {csv_path}")
+    engine.analyze_customers()
+    engine.analyze_customer_snapshots()
+    engine.analyze_products()
+    engine.generate_sales_recommendations()
+    engine.generate_monthly_action_plan()
+    with tempfile.TemporaryDirectory() as output_dir:
+        engine.export_analysis_report(os.path.join(output_dir, 'report.xlsx'))
+
+    return engine.get_stage_metrics()
+
+
+def benchmark_classifier(csv_path, track_memory):
+    """HanmiProductClassifier 단계별 측정 (분류기는 자체 계측이 없어 외부에서 감쌈)"""
+    classifier = HanmiProductClassifier()
+    metrics = StageMetrics(track_memory=track_memory)
+
+    with metrics.stage('load_data') as record:
+        classifier.load_data(csv_path)
+        record['rows'] = len(classifier.data)
+    rows = len(classifier.data)
+    with metrics.stage('classify_all_products', rows=rows):
+        classifier.classify_all_products()
+    with metrics.stage('hanmi_sales_analysis', rows=rows):
+        classifier.generate_hanmi_sales_analysis()
+
+    return metrics.to_frame()
+
+
+def git_commit():
+    """현재 git 커밋 (짧은 해시, 작업 트리 변경 시 '-dirty')"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=project_root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f'{commit}-dirty' if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_benchmarks(sizes, engines, training_profile='fast', track_memory=False, seed=42, verbose=False):
+    """규모 x 엔진별 벤치마크 실행, 단계별 기록 DataFrame 반환"""
+    records = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        for size in sizes:
+            csv_path = os.path.join(data_dir, f'synthetic_{size}.csv')
+            print(f"[{size:,}행] 합성 데이터 생성 중...")
+            write_sales_csv(csv_path, size, seed=seed)
+
+            for engine_name in engines:
+                print(f"[{size:,}행] {engine_name} 벤치마크 실행 중...")
+                # 엔진 진행 메시지는 --verbose 일 때만 출력
+                with _quiet(not verbose):
+                    if engine_name == 'smart':
+                        frame = benchmark_smart_engine(csv_path, training_profile, track_memory)
+                    elif engine_name == 'smart_append':
+                        frame = benchmark_smart_append(csv_path, track_memory, seed)
+                    elif engine_name == 'sales':
+                        frame = benchmark_sales_engine(csv_path, track_memory)
+                    else:
+                        frame = benchmark_classifier(csv_path, track_memory)
+
+                frame.insert(0, 'engine', engine_name)
+                frame.insert(0, 'size', size)
+                records.append(frame)
+                print(f"[{size:,}행] {engine_name} 완료: 최상위 단계 합계 "
+                      f"{frame.loc[~frame['stage'].str.contains('/'), 'wall_seconds'].sum():.2f}초")
+
+    return pd.concat(records, ignore_index=True)
+
+
+@contextmanager
+def _quiet(enabled):
+    """enabled 이면 블록 안의 print 출력을 버림"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        yield
+
+
+def save_results(results, output_dir, training_profile, track_memory):
+    """벤치마크 결과를 JSON 으로 저장 (파일명: 일시_커밋.json)"""
+    os.makedirs(output_dir, exist_ok=True)
+    commit = git_commit()
+    path = os.path.join(output_dir, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit}.json")
+    payload = {
+        'created_at': datetime.now().isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'training_profile': training_profile,
+        'track_memory': track_memory,
+        'records': results.replace({np.nan: None}).to_dict(orient='records')
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2, default=str)
+    return path
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        payload = json.load(f)
+    return payload, pd.DataFrame(payload['records'])
+
+
+def compare_results(previous, current):
+    """(규모, 엔진, 단계)별 경과 시간 비교표 (배속 = 이전 / 현재)"""
+    keys = ['size', 'engine', 'stage']
+    previous = previous.groupby(keys)['wall_seconds'].sum().rename('이전(초)')
+    current = current.groupby(keys)['wall_seconds'].sum().rename('현재(초)')
+    table = pd.concat([previous, current], axis=1, join='inner')
+    table['배속'] = (table['이전(초)'] / table['현재(초)']).round(2)
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='엔진 규모별 벤치마크')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='합성 데이터 행 수 목록')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES)
+    parser.add_argument('--training-profile', default='fast', choices=['standard', 'fast'],
+                        help='SmartSalesTargetingEngine 학습 프로필')
+    parser.add_argument('--track-memory', action='store_true', help='tracemalloc 최대 메모리 측정 (느려짐)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', default=str(RESULTS_DIR))
+    parser.add_argument('--compare', default=None,
+                        help="비교할 이전 결과 파일 경로 또는 'latest' (output-dir 의 가장 최근 결과)")
+    parser.add_argument('--verbose', action='store_true', help='엔진 진행 메시지 출력')
+    args = parser.parse_args()
+
+    previous_path = args.compare
+    if previous_path == 'latest':
+        existing = sorted(glob.glob(os.path.join(args.output_dir, 'bench_*.json')))
+        previous_path = existing[-1] if existing else None
+
+    results = run_benchmarks(args.sizes, args.engines, args.training_profile, args.track_memory,
+                             args.seed, args.verbose)
+    path = save_results(results, args.output_dir, args.training_profile, args.track_memory)
+
+    pd.set_option('display.width', 200)
+    print("\n" + "=" * 60)
+    print(results[['size', 'engine', 'stage', 'rows', 'wall_seconds', 'cpu_seconds', 'peak_memory_mb']]
+          .to_string(index=False))
+    if 'rebuilt_neighbor_rows' in results.columns:
+        appended = results.dropna(subset=['rebuilt_neighbor_rows'])
+        print("\nappend_month 재계산 규모")
+        print(appended[['size', 'stage', 'rows', 'wall_seconds'] + APPEND_STAT_COLUMNS].to_string(index=False))
+    print(f"\n결과 저장: {path}")
+
+    if previous_path:
+        previous_payload, previous = load_results(previous_path)
+        print(f"\n이전 결과와 비교: {previous_path} (커밋 {previous_payload['git_commit']})")
+        print(compare_results(previous, results).to_string())
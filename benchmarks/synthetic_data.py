@@ -0,0 +1,153 @@
+"""
+합성 영업 데이터 생성기
+rx-rawdata.csv 와 같은 스키마(기준년월, 거래처코드, 거래처명, 품목군, 품목명, 총매출,
+총수량, 단가, 원내/원외 매출 및 할인율, 권역, 담당자)의 데이터를 원하는 행 수로 생성합니다.
+
+사용법:
+python benchmarks/synthetic_data.py --rows 100000 --output synthetic_rx.csv
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# 한미약품 주력 품목군 -> 품목명 (함량 변형 포함)
+HANMI_PRODUCTS = {
+    '아모잘탄': ['아모잘탄정5/50밀리그램', '아모잘탄정5/100밀리그램', '아모잘탄플러스정'],
+    '아모잘탄큐': ['아모잘탄큐정5/50/10밀리그램'],
+    '로수젯': ['로수젯정10/5밀리그램', '로수젯정10/10밀리그램', '로수젯정10/20밀리그램'],
+    '팔팔정': ['팔팔정50mg', '팔팔정100mg'],
+    '한미탐스': ['한미탐스캡슐0.2밀리그램'],
+    '에소메졸': ['에소메졸캡슐20밀리그램', '에소메졸캡슐40밀리그램'],
+    '피도글': ['피도글정75밀리그램'],
+    '졸피드': ['졸피드정10밀리그램'],
+    '히알루미니': ['히알루미니점안액0.1%', '히알루미니점안액0.3%'],
+    '모테손플러스나잘스프레이': ['모테손플러스나잘스프레이'],
+    '세포독심건조시럽': ['세포독심건조시럽(세프포독심프록세틸)'],
+}
+
+# 일반 품목군 이름 구성용 (질환 키워드 + 제형)
+GENERIC_STEMS = [
+    '고혈압', '심장', '콜레스테롤', '위산', '소화', '기침', '비염', '천식', '관절', '근육',
+    '수면', '신경', '당뇨', '혈당', '항생', '피부', '습진', '점안', '요로', '소아', '진통', '해열'
+]
+GENERIC_FORMS = ['정', '캡슐', '시럽', '연고', '크림', '패취', '현탁액', '주사']
+
+# 거래처명 접미사 (의원 / 병원 / 약국 비중을 실제 데이터와 유사하게)
+CLINIC_SUFFIXES = [
+    ('내과의원', 0.22), ('의원', 0.12), ('가정의학과의원', 0.08), ('이비인후과의원', 0.08),
+    ('정형외과의원', 0.07), ('소아청소년과의원', 0.06), ('피부과의원', 0.05), ('안과의원', 0.05),
+    ('비뇨의학과의원', 0.04), ('신경과의원', 0.03), ('산부인과의원', 0.03), ('병원', 0.06),
+    ('요양병원', 0.03), ('클리닉', 0.03), ('약국', 0.05),
+]
+NAME_PREFIXES = ['서울', '연세', '삼성', '하나', '우리', '미래', '건강한', '밝은', '튼튼', '365',
+                 '365열린', '새봄', '푸른', '행복', '사랑', '중앙', '제일', '으뜸', '참', '늘봄']
+
+REGIONS = ['서울', '경기', '인천', '부산', '대구', '광주', '대전', '울산', '강원', '충청', '전라', '경상', '제주']
+MANAGER_NAMES = ['김병민', '이인철', '박서준', '최지우', '정하늘', '강민호', '조은비', '윤태영',
+                 '장수진', '임도현', '한지민', '오세훈', '서유리', '신동욱', '권나래']
+
+
+def generate_sales_data(n_rows, n_customers=None, n_products=None, n_months=24, seed=42):
+    """합성 영업 데이터 생성
+
+    거래처 / 품목군 수는 지정하지 않으면 행 수에 비례해 정하며, 거래처 활동량과
+    품목 인기도는 롱테일 분포(Zipf 유사)를 따른다.
+    """
+    rng = np.random.default_rng(seed)
+    n_customers = n_customers or int(np.clip(n_rows // 40, 50, 50000))
+    n_products = n_products or int(np.clip(n_rows // 400, 30, 1500))
+
+    # 거래처 마스터
+    suffixes, suffix_weights = zip(*CLINIC_SUFFIXES)
+    suffix_weights = np.array(suffix_weights) / np.sum(suffix_weights)
+    customer_suffix = rng.choice(len(suffixes), n_customers, p=suffix_weights)
+    customer_prefix = rng.integers(0, len(NAME_PREFIXES), n_customers)
+    customer_region = rng.integers(0, len(REGIONS), n_customers)
+    customers = pd.DataFrame({
+        '거래처코드': [f'{100000 + i}' for i in range(n_customers)],
+        '거래처명': [f'{NAME_PREFIXES[p]}{suffixes[s]}' if i % 7 else f'{NAME_PREFIXES[p]}{i}{suffixes[s]}'
+                 for i, (p, s) in enumerate(zip(customer_prefix, customer_suffix))],
+        '권역': [REGIONS[r] for r in customer_region],
+        # 담당자는 권역 단위로 배정 (권역당 1~2명)
+        '담당자': [MANAGER_NAMES[(r * 2 + (i % 2)) % len(MANAGER_NAMES)] for i, r in enumerate(customer_region)],
+        '원내비중': rng.beta(2, 5, n_customers)
+    })
+
+    # 품목 마스터 (한미 주력 품목군 + 일반 품목군)
+    product_rows = []
+    for group, names in HANMI_PRODUCTS.items():
+        for name in names:
+            product_rows.append((group, name))
+    for j in range(max(0, n_products - len(HANMI_PRODUCTS))):
+        stem = GENERIC_STEMS[j % len(GENERIC_STEMS)]
+        form = GENERIC_FORMS[(j // len(GENERIC_STEMS)) % len(GENERIC_FORMS)]
+        group = f'{stem}{form}{j:03d}'
+        for k in range(1 + j % 3):
+            product_rows.append((group, f'{group}{[5, 10, 20][k]}밀리그램'))
+    products = pd.DataFrame(product_rows, columns=['품목군', '품목명'])
+    products['기준단가'] = np.round(rng.lognormal(mean=6.0, sigma=1.0, size=len(products)), -1).clip(50, 50000)
+
+    # 거래 행: 거래처 / 품목은 롱테일, 월은 균등
+    customer_weights = 1.0 / np.arange(1, n_customers + 1) ** 0.8
+    product_weights = 1.0 / np.arange(1, len(products) + 1) ** 0.9
+    customer_idx = rng.choice(n_customers, n_rows, p=customer_weights / customer_weights.sum())
+    product_idx = rng.choice(len(products), n_rows, p=product_weights / product_weights.sum())
+
+    first_month = pd.Period('2023-01', freq='M')
+    months = np.array([int((first_month + m).strftime('%Y%m')) for m in range(n_months)])
+    month_idx = rng.integers(0, n_months, n_rows)
+
+    quantity = rng.geometric(0.02, n_rows).astype(float)
+    unit_price = products['기준단가'].to_numpy()[product_idx]
+    inpatient_discount = np.round(rng.uniform(0, 0.15, n_rows), 3)
+    outpatient_discount = np.where(rng.random(n_rows) < 0.05, np.nan, np.round(rng.uniform(0, 0.1, n_rows), 3))
+    total_sales = np.round(quantity * unit_price * (1 - inpatient_discount), 0)
+    # 반품 / 취소 (매출 0 또는 음수) 일부 포함
+    returns = rng.random(n_rows)
+    total_sales[returns < 0.03] = 0
+    total_sales[(returns >= 0.03) & (returns < 0.04)] *= -1
+
+    inpatient_share = customers['원내비중'].to_numpy()[customer_idx]
+    inpatient_sales = np.round(total_sales * inpatient_share, 0)
+
+    return pd.DataFrame({
+        '기준년월': months[month_idx],
+        '거래처코드': customers['거래처코드'].to_numpy()[customer_idx],
+        '거래처명': customers['거래처명'].to_numpy()[customer_idx],
+        '품목군': products['품목군'].to_numpy()[product_idx],
+        '품목명': products['품목명'].to_numpy()[product_idx],
+        '총매출': total_sales,
+        '총수량': quantity,
+        '단가': unit_price,
+        '원내매출': inpatient_sales,
+        '원외매출': total_sales - inpatient_sales,
+        '원내할인율': inpatient_discount,
+        '원외할인율': outpatient_discount,
+        '권역': customers['권역'].to_numpy()[customer_idx],
+        '담당자': customers['담당자'].to_numpy()[customer_idx],
+    })
+
+
+def write_sales_csv(path, n_rows, **kwargs):
+    """합성 데이터를 CSV(utf-8)로 저장하고 DataFrame 반환"""
+    data = generate_sales_data(n_rows, **kwargs)
+    data.to_csv(path, index=False, encoding='utf-8')
+    return data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='합성 영업 데이터 생성')
+    parser.add_argument('--rows', type=int, default=100000, help='생성할 행 수')
+    parser.add_argument('--customers', type=int, default=None, help='거래처 수 (기본: 행 수 비례)')
+    parser.add_argument('--products', type=int, default=None, help='품목군 수 (기본: 행 수 비례)')
+    parser.add_argument('--months', type=int, default=24, help='기간 (개월)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='synthetic_rx.csv')
+    args = parser.parse_args()
+
+    data = write_sales_csv(args.output, args.rows, n_customers=args.customers,
+                           n_products=args.products, n_months=args.months, seed=args.seed)
+    print(f"합성 데이터 생성 완료: {args.output} ({len(data):,}행, 거래처 {data['거래처코드'].nunique():,}개, "
+          f"품목군 {data['품목군'].nunique():,}개)")
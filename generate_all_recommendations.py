@@ -89,6 +89,13 @@ def generate_manager_recommendations(manager_name):
         manager_product_groups = data['품목군'].unique()
         logger.info(f"  - {manager_name} 담당 품목군: {len(manager_product_groups)}개")
         
+        # 전체 품목군 추천을 한 번에 계산
+        all_group_recommendations = engine.recommend_targets_for_all_product_groups(
+            top_n=15,
+            exclude_existing=False,
+            product_groups=manager_product_groups
+        )
+        
         # 고품질 추천 결과 생성
         manager_recommendations = {}
         manager_market_analyses = {}
@@ -101,11 +108,7 @@ def generate_manager_recommendations(manager_name):
                 logger.info(f"    [{i}/{len(manager_product_groups)}] {product_group} 분석 중...")
                 
                 # SmartSalesTargetingEngine을 활용한 고품질 추천
-                recommendations = engine.recommend_targets_for_product_group(
-                    target_product_group=product_group, 
-                    top_n=15,
-                    exclude_existing=False
-                )
+                recommendations = all_group_recommendations.get(product_group, [])
                 
                 if recommendations and len(recommendations) > 0:
                     # 추천 결과를 고품질 형식으로 변환
@@ -136,21 +136,44 @@ class LogConstants:
 class EngineConstants:
     """분석 엔진 설정"""
     
-    # 머신러닝 모델 파라미터
-    RANDOM_FOREST_PARAMS = {
+    # 예측 모델 학습 프로필 ('standard': RandomForest + GradientBoosting, 'fast': HistGradientBoosting)
+    TRAINING_PROFILE = 'standard'
+    
+    # standard 프로필 머신러닝 모델 파라미터 (n_jobs: 랜덤포레스트 병렬 학습 코어 수, -1 은 전체 코어)
+    STANDARD_RANDOM_FOREST_PARAMS = {
         'n_estimators': 100,
         'random_state': 42,
-        'max_depth': 10,
-        'min_samples_split': 5
+        'n_jobs': -1
     }
     
-    GRADIENT_BOOSTING_PARAMS = {
+    STANDARD_GRADIENT_BOOSTING_PARAMS = {
         'n_estimators': 100,
-        'random_state': 42,
+        'random_state': 42
+    }
+    
+    # fast 프로필 파라미터 (조기 종료 포함)
+    FAST_HIST_GRADIENT_BOOSTING_PARAMS = {
+        'max_iter': 200,
         'learning_rate': 0.1,
-        'max_depth': 6
+        'max_leaf_nodes': 31,
+        'early_stopping': True,
+        'validation_fraction': 0.1,
+        'n_iter_no_change': 10,
+        'random_state': 42
     }
     
+    # fast 프로필 학습 행 샘플링 상한 (None 이면 전체 행 사용)
+    FAST_TRAINING_MAX_ROWS = 200000
+    
+    # 학습 프로필 비교 리포트 홀드아웃 비율
+    PROFILE_COMPARISON_TEST_SIZE = 0.2
+    
+    # 단계별 계측에서 tracemalloc 최대 메모리 측정 여부 (실행 시간이 2~3배 늘어남)
+    STAGE_METRICS_TRACK_MEMORY = False
+    
+    # 유사도 블록 계산 시 한 번에 만드는 dense 원소 수 상한 (float64 기준 약 32MB)
+    SIMILARITY_BLOCK_ELEMENTS = 4000000
+    
     KMEANS_PARAMS = {
         'n_clusters': 4,
         'random_state': 42,
@@ -10,79 +10,177 @@
 5. 지역적/계절적 특성 고려
 """
 
+import re
+import os
+import json
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import joblib
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingClassifier
+from sklearn.ensemble import (RandomForestRegressor, GradientBoostingClassifier,
+                              HistGradientBoostingRegressor, HistGradientBoostingClassifier)
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import r2_score, mean_absolute_error, accuracy_score, roc_auc_score
 from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.preprocessing import StandardScaler, LabelEncoder, normalize
 from scipy.sparse import csr_matrix
+from openpyxl import Workbook
+import pyarrow as pa
+import pyarrow.parquet as pq
 from scipy.spatial.distance import cdist
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from ..config.constants import EngineConstants
+    from ..utils.similarity import similarity_blocks, top_k_columns, top_k_similar_rows
+    from ..utils.stage_metrics import StageMetrics, timed_stage
+except ImportError:  # 패키지 밖(프로젝트 루트 스크립트)에서 실행되는 경우
+    from src.core.config.constants import EngineConstants
+    from src.core.utils.similarity import similarity_blocks, top_k_columns, top_k_similar_rows
+    from src.core.utils.stage_metrics import StageMetrics, timed_stage
+
 class SmartSalesTargetingEngine:
-    def __init__(self):
+    SCALE_ENCODING = {'Micro': 1, 'Small': 2, 'Medium': 3, 'Large': 4}
+    
+    # 품목명 키워드 -> 질환분류 규칙 (앞 규칙 우선, 한미약품 제품 우선 + 진료과 매칭 고려)
+    DISEASE_KEYWORD_RULES = [
+        ('고혈압/심혈관', ['아모잘탄']),
+        ('이상지질혈증', ['로수젯']),
+        ('비뇨기과', ['팔팔', '한미탐스']),
+        ('소화기계', ['에소메졸']),
+        ('심혈관/혈전', ['피도글']),
+        ('정신과/신경과', ['졸피드']),
+        ('안과', ['히알루미니']),
+        ('고혈압/심혈관', ['심', '혈압', '고혈압', '심장', '아모디핀', '발사르탄', '로사르탄']),
+        ('이상지질혈증', ['콜레스테롤', '지질', '스타틴', '로수바스타틴', '아토르바스타틴']),
+        ('소화기계', ['위', '소화', '장', '위산', '제산', '오메프라졸', '란소프라졸']),
+        ('호흡기계', ['폐', '기침', '천식', '호흡', '알레르기', '비염']),
+        ('정형외과', ['뼈', '관절', '류마티스', '근육', '정형외과']),
+        ('정신과/신경과', ['뇌', '신경', '우울', '불안', '수면', '졸피뎀']),
+        ('감염내과', ['감염', '항생', '바이러스', '세균', '아목시실린']),
+        ('내분비내과', ['당뇨', '혈당', '인슐린', '메트포르민']),
+        ('비뇨기과', ['신장', '요로', '방광', '전립선', '비뇨기']),
+        ('피부과', ['피부', '알레르기', '아토피', '습진']),
+        ('안과', ['안과', '점안', '녹내장', '히알루론산']),
+        ('이비인후과', ['이비인후', '귀', '코', '목']),
+        ('산부인과', ['산부인과', '부인과', '임신']),
+        ('소아청소년과', ['소아', '어린이']),
+    ]
+    DEFAULT_DISEASE_CATEGORY = '일반내과'
+    
+    # 내부에서 범주형(정수 코드)으로 보관하는 문자열 컬럼 (출력 시 문자열로 복원)
+    CATEGORICAL_COLUMNS = ['거래처코드', '거래처명', '품목군', '품목명', '권역', '담당자', '질환분류']
+    
+    # 합계 / 평균을 계산하는 실수 컬럼 (정밀도를 위해 float64 유지, 나머지 실수 컬럼은 float32 후보)
+    AGGREGATED_FLOAT_COLUMNS = ['총매출', '총수량', '원내할인율', '원외할인율']
+    
+    # 품목 프로필 컬럼 (품목 자체 지표 / 전체 컬럼 순서)
+    PRODUCT_LOCAL_COLUMNS = ['품목군', '질환분류', '총매출', '총수량', '평균단가', '고객수',
+                             '성장률', '계절성지수', '고객집중도']
+    PRODUCT_PROFILE_COLUMNS = ['품목군', '질환분류', '총매출', '총수량', '평균단가', '고객수', '시장침투율',
+                               '성장률', '계절성지수', '경쟁강도', '가격포지셔닝', '고객집중도', '시장점유율']
+    
+    # 영업 계획 / 내보내기에 사용하는 추천 거래처 수
+    PLAN_RECOMMENDATION_COUNT = 20
+    EXPORT_RECOMMENDATION_COUNT = 50
+    
+    # 예측 모델 특성 수 (_build_feature_frame 컬럼 수, 품목 일괄 추천 블록 크기 계산용)
+    PREDICTION_FEATURE_COUNT = 10
+    
+    # 추천 결과 LRU 캐시 최대 항목 수
+    RECOMMENDATION_CACHE_SIZE = 256
+    
+    # 증분 이웃 갱신용 후보 버퍼 여유분 (거래처별 n_neighbors + 여유분 만큼 이웃 후보 보관)
+    NEIGHBOR_BUFFER_SLACK = 10
+    
+    # save_artifacts 저장 형식 버전 (형식이 바뀌면 증가)
+    ARTIFACT_VERSION = 2
+    
+    def __init__(self, n_neighbors=10):
         self.data = None
         self.customer_profiles = None
         self.product_profiles = None
         self.similarity_matrix = None
+        self.n_neighbors = n_neighbors
+        self.interaction_matrix = None      # 거래처 x 품목 CSR (행별 0-1 정규화)
+        self.customer_index = None          # 행 번호 -> 거래처코드
+        self.product_index = None           # 열 번호 -> 품목군
+        self.neighbor_indices = None        # 거래처별 상위 k 유사 거래처 행 번호
+        self.neighbor_weights = None        # 거래처별 상위 k 유사도
+        self.product_similarity = None
+        self._product_gram = None           # 품목 x 품목 상호작용 내적 (품목 유사도 증분 갱신용)
+        self._neighbor_buffer_indices = None  # 거래처별 이웃 후보 버퍼 (유사도 내림차순, 빈 칸은 -1)
+        self._neighbor_buffer_weights = None  # 이웃 후보 유사도 (빈 칸은 -inf)
+        self._neighbor_floor = None         # 버퍼 밖 거래처와의 유사도 상한 (버퍼가 전체 거래처를 담으면 -inf)
+        self._row_positions = None          # {'거래처코드' / '품목군': {값: self.data 행 위치 배열}}
+        self.regional_demand = None         # (권역, 품목군) -> 평균 거래액
+        self.profile_index = None           # customer_profiles 행 번호 -> 거래처코드
+        self.profile_features = None        # 거래처 특성 행렬 (규모 인코딩, 행 단위 L2 정규화)
+        self._disease_pattern = self._compile_disease_pattern()
+        self._disease_category_cache = {}   # 품목명 -> 질환분류
+        self.data_fingerprint = None        # 입력 데이터 내용 해시
+        self.changed_customers = None       # 마지막 append_month 에서 변경된 거래처 (모델 재채점 대상)
+        self.changed_products = None        # 마지막 append_month 에서 변경된 품목군
+        self._category_stats = None         # 질환분류별 품목군 수 / 매출 / 수량
+        self._category_products = None      # 데이터에 등장한 (질환분류, 품목군) 조합 (품목군 수 증분 갱신용)
+        self._total_sales = None            # 전체 매출 합계 (시장점유율 분모)
         self.sales_predictor = None
         self.success_classifier = None
+        self.training_profile = None        # 마지막 학습에 사용한 프로필 ('standard' / 'fast')
+        self._recommendation_cache = OrderedDict()  # (종류, 대상, top_n, exclude_existing, fingerprint) -> 추천 목록
+        self._cache_lock = threading.Lock()  # export_all_recommendations 병렬 작업 간 캐시 보호
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # 단계별 경과 시간 / CPU 시간 / 최대 메모리 / 행 수
+        self.metrics = StageMetrics(track_memory=EngineConstants.STAGE_METRICS_TRACK_MEMORY)
         self.customer_segments = None
         
+    def _compile_disease_pattern(self):
+        """질환분류 키워드 규칙을 하나의 정규식으로 컴파일
+        
+        규칙마다 이름 있는 그룹(r0, r1, ...)을 두고 전방탐색으로 감싸 모든 시작 위치에서
+        겹치는 키워드까지 찾는다. 같은 위치에서는 앞 규칙이 먼저 시도된다.
+        """
+        alternatives = '|'.join(
+            f"(?P<r{priority}>{'|'.join(map(re.escape, keywords))})"
+            for priority, (_, keywords) in enumerate(self.DISEASE_KEYWORD_RULES)
+        )
+        return re.compile(f'(?=(?:{alternatives}))')
+        
     def _infer_disease_category(self, product_name):
-        """품목명에서 질환분류 추정 (한미약품 제품 우선 + 진료과 매칭 강화)"""
-        product_lower = product_name.lower()
-        
-        # 한미약품 제품 우선 인식
-        if any(keyword in product_lower for keyword in ['아모잘탄', '로수젯', '팔팔', '한미탐스', '에소메졸', '피도글', '졸피드', '히알루미니']):
-            if '아모잘탄' in product_lower:
-                return '고혈압/심혈관'
-            elif '로수젯' in product_lower:
-                return '이상지질혈증'
-            elif any(keyword in product_lower for keyword in ['팔팔', '한미탐스']):
-                return '비뇨기과'
-            elif '에소메졸' in product_lower:
-                return '소화기계'
-            elif '피도글' in product_lower:
-                return '심혈관/혈전'
-            elif '졸피드' in product_lower:
-                return '정신과/신경과'
-            elif '히알루미니' in product_lower:
-                return '안과'
-        
-        # 일반적인 키워드 기반 분류 (진료과 매칭 고려)
-        if any(keyword in product_lower for keyword in ['심', '혈압', '고혈압', '심장', '아모디핀', '발사르탄', '로사르탄']):
-            return '고혈압/심혈관'
-        elif any(keyword in product_lower for keyword in ['콜레스테롤', '지질', '스타틴', '로수바스타틴', '아토르바스타틴']):
-            return '이상지질혈증'
-        elif any(keyword in product_lower for keyword in ['위', '소화', '장', '위산', '제산', '오메프라졸', '란소프라졸']):
-            return '소화기계'
-        elif any(keyword in product_lower for keyword in ['폐', '기침', '천식', '호흡', '알레르기', '비염']):
-            return '호흡기계'
-        elif any(keyword in product_lower for keyword in ['뼈', '관절', '류마티스', '근육', '정형외과']):
-            return '정형외과'
-        elif any(keyword in product_lower for keyword in ['뇌', '신경', '우울', '불안', '수면', '졸피뎀']):
-            return '정신과/신경과'
-        elif any(keyword in product_lower for keyword in ['감염', '항생', '바이러스', '세균', '아목시실린']):
-            return '감염내과'
-        elif any(keyword in product_lower for keyword in ['당뇨', '혈당', '인슐린', '메트포르민']):
-            return '내분비내과'
-        elif any(keyword in product_lower for keyword in ['신장', '요로', '방광', '전립선', '비뇨기']):
-            return '비뇨기과'
-        elif any(keyword in product_lower for keyword in ['피부', '알레르기', '아토피', '습진']):
-            return '피부과'
-        elif any(keyword in product_lower for keyword in ['안과', '점안', '녹내장', '히알루론산']):
-            return '안과'
-        elif any(keyword in product_lower for keyword in ['이비인후', '귀', '코', '목']):
-            return '이비인후과'
-        elif any(keyword in product_lower for keyword in ['산부인과', '부인과', '임신']):
-            return '산부인과'
-        elif any(keyword in product_lower for keyword in ['소아', '어린이']):
-            return '소아청소년과'
+        """품목명에서 질환분류 추정 (한미약품 제품 우선 + 진료과 매칭 강화, 품목명별 캐시)"""
+        category = self._disease_category_cache.get(product_name)
+        if category is not None:
+            return category
+        
+        best_priority = len(self.DISEASE_KEYWORD_RULES)
+        for match in self._disease_pattern.finditer(product_name.lower()):
+            best_priority = min(best_priority, int(match.lastgroup[1:]))
+            if best_priority == 0:
+                break
+        
+        if best_priority < len(self.DISEASE_KEYWORD_RULES):
+            category = self.DISEASE_KEYWORD_RULES[best_priority][0]
         else:
-            return '일반내과'
+            category = self.DEFAULT_DISEASE_CATEGORY
+        
+        self._disease_category_cache[product_name] = category
+        return category
+        
+    def _infer_disease_categories(self, product_names):
+        """품목명 Series의 질환분류 일괄 추정 (고유 품목명별 1회 추정 후 코드 매핑)"""
+        codes, unique_names = pd.factorize(product_names)
+        # 결측 품목명(code -1)은 마지막 원소인 기본 분류로 매핑
+        categories = np.array(
+            [self._infer_disease_category(name) for name in unique_names] + [self.DEFAULT_DISEASE_CATEGORY],
+            dtype=object
+        )
+        return pd.Series(categories[codes], index=product_names.index)
         
     def _extract_clinic_specialty(self, clinic_name):
         """거래처명에서 진료과 추출"""
@@ -153,351 +251,1099 @@ class SmartSalesTargetingEngine:
         
         return 1.0  # 기본 점수
         
+    @timed_stage('prepare')
     def load_and_prepare_data(self, sales_data):
         """영업 데이터 로드 및 전처리"""
-        self.data = sales_data.copy()
+        with self.metrics.stage('compact', rows=len(sales_data)):
+            self.data = self._compact_sales_frame(sales_data)
+            self.data_fingerprint = self.compute_data_fingerprint(sales_data)
+        self.clear_recommendation_cache()
         
         # 질환분류 컬럼이 없으면 추정
         if '질환분류' not in self.data.columns:
-            self.data['질환분류'] = self.data['품목명'].apply(self._infer_disease_category)
+            with self.metrics.stage('disease_categories', rows=len(self.data)):
+                self.data['질환분류'] = self._infer_disease_categories(self.data['품목명']).astype('category')
+        
+        rows = len(self.data)
+        with self.metrics.stage('customer_profiles', rows=rows):
+            self._create_customer_profiles()
+        with self.metrics.stage('product_profiles', rows=rows):
+            self._create_product_profiles()
+        with self.metrics.stage('interaction_matrix', rows=rows):
+            self._build_interaction_matrix()
+        with self.metrics.stage('profile_features', rows=rows):
+            self._build_profile_feature_matrix()
+        with self.metrics.stage('regional_demand', rows=rows):
+            self.regional_demand = self._build_regional_demand_table()
+        with self.metrics.stage('row_positions', rows=rows):
+            self._build_row_positions()
+        
+    def _compact_sales_frame(self, sales_data):
+        """영업 데이터를 내부 표현으로 변환 (문자열 컬럼은 범주형, 정수 컬럼은 최소 정수형, 일부 실수 컬럼은 float32)
+        
+        범주는 정렬된 순서로 유지하므로 groupby / 비교 / 정렬은 정수 코드 기준으로 수행된다.
+        합계 / 평균을 내는 실수 컬럼(AGGREGATED_FLOAT_COLUMNS)은 float64 를 유지하고, 나머지
+        실수 컬럼(단가, 원내/원외매출 등)은 float32 로 바꿔도 값이 그대로 복원될 때만 float32 로 저장한다.
+        """
+        frame = sales_data.copy()
+        for col in self.CATEGORICAL_COLUMNS:
+            if col in frame.columns and not isinstance(frame[col].dtype, pd.CategoricalDtype):
+                frame[col] = frame[col].astype('category')
+        for col in frame.select_dtypes(include='integer').columns:
+            frame[col] = pd.to_numeric(frame[col], downcast='integer')
+        for col in frame.select_dtypes(include='float64').columns:
+            if col in self.AGGREGATED_FLOAT_COLUMNS:
+                continue
+            values = frame[col].to_numpy()
+            compact = values.astype(np.float32)
+            if np.array_equal(compact.astype(np.float64), values, equal_nan=True):
+                frame[col] = compact
+        return frame
+        
+    def _align_categories(self, new_rows):
+        """신규 행과 self.data 의 범주를 정렬된 합집합으로 맞춤 (concat 후에도 범주형 유지)"""
+        for col in self.CATEGORICAL_COLUMNS:
+            if col not in new_rows.columns or not isinstance(self.data[col].dtype, pd.CategoricalDtype):
+                continue
+            current = self.data[col].cat.categories
+            categories = current.union(pd.Index(new_rows[col].dropna().unique()).astype(current.dtype))
+            if len(categories) != len(current):
+                self.data[col] = self.data[col].cat.set_categories(categories)
+            new_rows[col] = pd.Categorical(new_rows[col], categories=categories)
+        return new_rows
+        
+    def _decode_categories(self, frame):
+        """범주형 컬럼/인덱스를 원래 문자열 값으로 복원 (프로필 등 출력 경계에서 사용)"""
+        for col in frame.columns:
+            if isinstance(frame[col].dtype, pd.CategoricalDtype):
+                frame[col] = frame[col].astype(frame[col].cat.categories.dtype)
+        if isinstance(frame.index, pd.MultiIndex):
+            frame.index = pd.MultiIndex.from_arrays(
+                [self._decode_index(frame.index.get_level_values(i)) for i in range(frame.index.nlevels)],
+                names=frame.index.names
+            )
+        else:
+            frame.index = self._decode_index(frame.index)
+        return frame
+        
+    def _decode_index(self, index):
+        """CategoricalIndex 를 문자열 Index 로 복원"""
+        if isinstance(index, pd.CategoricalIndex):
+            return pd.Index(index.astype(index.categories.dtype), name=index.name)
+        return index
+        
+    def _lookup_positions(self, index, values):
+        """values 각각의 index 내 위치 (없으면 -1). 범주형이면 범주별로 한 번만 조회한 뒤 코드로 펼침"""
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            category_positions = np.append(index.get_indexer(values.cat.categories), -1)
+            return category_positions[values.cat.codes.to_numpy()]
+        return index.get_indexer(values)
+        
+    def _build_row_positions(self):
+        """거래처코드 / 품목군별 self.data 행 위치 색인 생성 (증분 반영 시 전체 행 isin 스캔 대신 사용)"""
+        self._row_positions = {
+            key: self.data.groupby(key, sort=False, observed=True).indices for key in ('거래처코드', '품목군')
+        }
+        
+    def _append_row_positions(self, new_rows, offset):
+        """self.data 의 offset 위치부터 추가된 new_rows 의 행 위치를 색인에 추가"""
+        for key, positions in self._row_positions.items():
+            for value, rows in new_rows.groupby(key, sort=False, observed=True).indices.items():
+                rows = rows + offset
+                positions[value] = np.concatenate([positions[value], rows]) if value in positions else rows
+        
+    def _rows_for(self, key, values):
+        """key 값이 values 중 하나인 self.data 행 (원래 행 순서 유지, 행 위치 색인 사용)"""
+        positions = [self._row_positions[key][value] for value in values if value in self._row_positions[key]]
+        positions = np.sort(np.concatenate(positions)) if positions else np.zeros(0, dtype=int)
+        return self.data.take(positions)
+        
+    @timed_stage('append_month')
+    def append_month(self, month_data, verify=False):
+        """신규 월 데이터를 추가하고 변경된 거래처/품목만 증분 갱신
+        
+        새 행에 등장한 거래처와 품목군만 자신의 전체 이력(행 위치 색인으로 조회)으로 프로필,
+        상호작용 행, 특성 행을 다시 계산하고, 질환분류 집계 / 전체 매출 / 품목 내적 행렬은
+        신규 행만큼만 더한다. 이웃은 변경 거래처와의 유사도만 다시 계산해 후보 버퍼에 병합하고,
+        후보가 n_neighbors 보다 모자라진 거래처만 전체 거래처와 다시 비교한다.
+        변경된 엔티티는 changed_customers / changed_products 에 기록된다 (모델 재채점 대상).
+        
+        반환값에는 다시 집계한 이력 행 수(reaggregated_rows), 이웃을 전체 거래처와 다시 비교한
+        행 수(rebuilt_neighbor_rows), 후보 버퍼만 갱신한 행 수(updated_neighbor_rows)가 포함된다.
+        verify=True 이면 전체 재구축 결과와 비교한 불일치 목록을 함께 반환한다.
+        """
+        if self.data is None or self.customer_profiles is None:
+            print("엔진이 준비되지 않았습니다. load_and_prepare_data 를 먼저 실행하세요.")
+            return None
         
-        self._create_customer_profiles()
-        self._create_product_profiles()
-        self._build_interaction_matrix()
+        new_rows = self._compact_sales_frame(month_data)
+        if '질환분류' not in new_rows.columns:
+            new_rows['질환분류'] = self._infer_disease_categories(new_rows['품목명'])
+        new_rows = self._align_categories(new_rows)
+        print(f"월 데이터 증분 반영 중... ({len(new_rows)}건)")
+        
+        offset = len(self.data)
+        self.data = pd.concat([self.data, new_rows], ignore_index=True)
+        self._append_row_positions(new_rows, offset)
+        self.clear_recommendation_cache()
+        self.data_fingerprint = hashlib.sha256(
+            (self.data_fingerprint + self.compute_data_fingerprint(month_data)).encode('utf-8')
+        ).hexdigest()
+        
+        changed_customers = self._decode_index(pd.Index(new_rows['거래처코드'].dropna().unique()))
+        changed_products = self._decode_index(pd.Index(new_rows['품목군'].dropna().unique()))
+        customer_rows = self._rows_for('거래처코드', changed_customers)
+        product_rows = self._rows_for('품목군', changed_products)
+        
+        # 거래처 프로필: 변경 거래처만 재계산, 신규 거래처는 뒤에 추가
+        self.customer_profiles = self._merge_profiles(
+            self.customer_profiles, self._build_customer_profiles(customer_rows), '거래처코드'
+        )
+        
+        # 품목 프로필: 변경 품목만 재계산, 질환분류 집계와 전체 매출은 신규 행만큼 더한 뒤 시장 지표 갱신
+        self._update_category_stats(new_rows)
+        self._total_sales += new_rows['총매출'].sum()
+        local_profiles = self.product_profiles[self.PRODUCT_LOCAL_COLUMNS]
+        self.product_profiles = self._apply_product_market_context(self._merge_profiles(
+            local_profiles, self._build_product_profiles(product_rows), '품목군'
+        ))
+        
+        # 상호작용 행렬, 이웃 후보 버퍼, 거래처 특성 행
+        rebuilt_neighbor_rows, updated_neighbor_rows = self._update_interaction_matrix(customer_rows, changed_customers)
+        self._update_profile_feature_rows(changed_customers)
+        
+        # 권역 x 품목군 수요: 변경 품목군만 재계산
+        product_level = self.regional_demand.index.get_level_values('품목군')
+        self.regional_demand = pd.concat([
+            self.regional_demand[changed_products.get_indexer(product_level) < 0],
+            self._build_regional_demand_table(product_rows)
+        ])
+        
+        self.changed_customers = changed_customers
+        self.changed_products = changed_products
+        print(f"증분 반영 완료: 거래처 {len(changed_customers)}개, 품목 {len(changed_products)}개 변경 "
+              f"(이웃 재계산 {rebuilt_neighbor_rows}행, 후보 갱신 {updated_neighbor_rows}행)")
+        
+        result = {
+            'changed_customers': changed_customers,
+            'changed_products': changed_products,
+            'reaggregated_rows': len(customer_rows) + len(product_rows),
+            'rebuilt_neighbor_rows': rebuilt_neighbor_rows,
+            'updated_neighbor_rows': updated_neighbor_rows
+        }
+        if verify:
+            result['mismatches'] = self._verify_against_full_rebuild()
+        return result
+        
+    def _merge_profiles(self, profiles, updated, key):
+        """기존 프로필에 재계산된 행을 반영 (기존 순서 유지, 신규 key 는 등장 순으로 뒤에 추가)
+        
+        기존 key 의 위치를 한 번 조회해 행 위치 배열로 두 프레임을 이어 붙인 결과에서 take 한다.
+        """
+        positions = pd.Index(profiles[key]).get_indexer(updated[key])
+        existing = positions >= 0
+        updated_rows = len(profiles) + np.arange(len(updated))
+        
+        source = np.arange(len(profiles))
+        source[positions[existing]] = updated_rows[existing]
+        source = np.concatenate([source, updated_rows[~existing]])
+        
+        merged = pd.concat([profiles, updated[profiles.columns]], ignore_index=True).take(source)
+        return merged.astype(updated.dtypes.to_dict()).reset_index(drop=True)
+        
+    def _verify_against_full_rebuild(self):
+        """현재(증분) 상태를 같은 데이터의 전체 재구축 결과와 비교하여 불일치 항목 반환"""
+        print("증분 결과 검증용 전체 재구축 중...")
+        reference = SmartSalesTargetingEngine(n_neighbors=self.n_neighbors)
+        reference.load_and_prepare_data(self.data)
+        
+        mismatches = []
+        for name in ['customer_profiles', 'product_profiles']:
+            try:
+                pd.testing.assert_frame_equal(getattr(self, name), getattr(reference, name),
+                                              check_dtype=False, rtol=1e-9)
+            except AssertionError as e:
+                mismatches.append(f"{name}: {e}")
+        
+        if not (self.customer_index.equals(reference.customer_index)
+                and self.product_index.equals(reference.product_index)):
+            mismatches.append("interaction_matrix: 인덱스 불일치")
+        elif abs(self.interaction_matrix - reference.interaction_matrix).max() > 1e-9:
+            mismatches.append("interaction_matrix: 값 불일치")
+        # 동점 이웃은 순서가 달라질 수 있으므로 유사도 값으로 비교
+        elif not np.allclose(self.neighbor_weights, reference.neighbor_weights, atol=1e-9):
+            mismatches.append("neighbor_weights: 값 불일치")
+        elif not np.allclose(self.product_similarity, reference.product_similarity, atol=1e-9):
+            mismatches.append("product_similarity: 값 불일치")
+        
+        if not np.allclose(self.profile_features, reference.profile_features, atol=1e-12):
+            mismatches.append("profile_features: 값 불일치")
+        
+        regional = self.regional_demand.sort_index()
+        reference_regional = reference.regional_demand.sort_index()
+        if not (regional.index.equals(reference_regional.index)
+                and np.allclose(regional.to_numpy(), reference_regional.to_numpy(), rtol=1e-9)):
+            mismatches.append("regional_demand: 불일치")
+        
+        if mismatches:
+            print(f"증분 결과 검증 실패: {len(mismatches)}개 항목 불일치")
+        else:
+            print("증분 결과 검증 완료: 전체 재구축과 일치")
+        return mismatches
         
     def _create_customer_profiles(self):
         """거래처별 프로필 생성"""
         print("거래처 프로필 생성 중...")
+        self.customer_profiles = self._build_customer_profiles(self.data)
+        print(f"거래처 프로필 생성 완료: {len(self.customer_profiles)}개")
         
-        customer_features = []
+    def _build_customer_profiles(self, rows):
+        """rows 에 포함된 거래처의 프로필 집계 (거래처코드 단위 groupby 한 번으로 전체 거래처 집계)"""
+        grouped = rows.groupby('거래처코드', sort=False, observed=True)
+        
+        # 기본 정보 (거래처별 첫 거래 행 기준)
+        first_rows = rows.drop_duplicates('거래처코드').set_index('거래처코드')
+        profiles = pd.DataFrame(index=first_rows.index)
+        profiles['거래처명'] = first_rows['거래처명']
+        profiles['권역'] = first_rows['권역'] if '권역' in rows.columns else '미분류'
+        profiles['담당자'] = first_rows['담당자'] if '담당자' in rows.columns else '미분류'
+        
+        # 매출 특성 및 품목 다양성
+        profiles['총매출'] = grouped['총매출'].sum()
+        profiles['평균거래액'] = grouped['총매출'].mean()
+        profiles['거래횟수'] = grouped.size()
+        profiles['활동월수'] = grouped['기준년월'].nunique()
+        profiles['품목수'] = grouped['품목군'].nunique()
+        profiles['질환카테고리수'] = grouped['질환분류'].nunique()
+        
+        # 성장률 / 계절성 (월별 매출 기반)
+        trend = self._calculate_monthly_trend(rows, '거래처코드').reindex(profiles.index)
+        profiles['성장률'] = trend['성장률']
+        profiles['계절성지수'] = trend['계절성지수']
+        
+        # 가격 민감도 (할인율 기반)
+        if '원내할인율' in rows.columns and '원외할인율' in rows.columns:
+            discounts = rows[['원내할인율', '원외할인율']].fillna(0).groupby(rows['거래처코드'], sort=False, observed=True).mean()
+            profiles['할인민감도'] = (discounts['원내할인율'] + discounts['원외할인율']) / 2
+        else:
+            profiles['할인민감도'] = 0
+        
+        # 거래처 규모 추정
+        total_sales = profiles['총매출']
+        profiles['거래처규모'] = np.select(
+            [total_sales >= 100000000,  # 1억 이상
+             total_sales >= 50000000,   # 5천만 이상
+             total_sales >= 10000000],  # 1천만 이상
+            ['Large', 'Medium', 'Small'],
+            default='Micro'
+        )
         
-        for customer_code in self.data['거래처코드'].unique():
-            customer_data = self.data[self.data['거래처코드'] == customer_code]
-            
-            # 기본 정보
-            customer_name = customer_data['거래처명'].iloc[0]
-            region = customer_data['권역'].iloc[0] if '권역' in customer_data.columns else '미분류'
-            manager = customer_data['담당자'].iloc[0] if '담당자' in customer_data.columns else '미분류'
-            
-            # 매출 특성
-            total_sales = customer_data['총매출'].sum()
-            avg_transaction = customer_data['총매출'].mean()
-            transaction_count = len(customer_data)
-            active_months = customer_data['기준년월'].nunique()
-            
-            # 품목 다양성
-            unique_products = customer_data['품목군'].nunique()
-            unique_categories = customer_data['질환분류'].nunique()
-            
-            # 성장률 계산 (최근 3개월 vs 이전 3개월)
-            months = sorted(customer_data['기준년월'].unique())
-            if len(months) >= 6:
-                mid_point = len(months) // 2
-                recent_months = months[mid_point:]
-                prev_months = months[:mid_point]
-            else:
-                recent_months = months[-3:] if len(months) >= 3 else months
-                prev_months = months[:-3] if len(months) >= 3 else []
-            
-            recent_sales = customer_data[customer_data['기준년월'].isin(recent_months)]['총매출'].sum()
-            prev_sales = customer_data[customer_data['기준년월'].isin(prev_months)]['총매출'].sum()
-            growth_rate = ((recent_sales - prev_sales) / prev_sales * 100) if prev_sales > 0 else 0
-            
-            # 계절성 분석
-            monthly_sales = customer_data.groupby('기준년월')['총매출'].sum()
-            seasonality = monthly_sales.std() / monthly_sales.mean() if monthly_sales.mean() > 0 else 0
-            
-            # 가격 민감도 (할인율 기반)
-            if '원내할인율' in customer_data.columns and '원외할인율' in customer_data.columns:
-                avg_discount = (customer_data['원내할인율'].fillna(0).mean() + 
-                              customer_data['원외할인율'].fillna(0).mean()) / 2
-            else:
-                avg_discount = 0
-            
-            # 거래처 규모 추정
-            if total_sales >= 100000000:  # 1억 이상
-                scale = 'Large'
-            elif total_sales >= 50000000:  # 5천만 이상
-                scale = 'Medium'
-            elif total_sales >= 10000000:  # 1천만 이상
-                scale = 'Small'
-            else:
-                scale = 'Micro'
-            
-            # 거래처 유형 추정 (거래처명 기반)
-            if any(keyword in customer_name for keyword in ['병원', '의료원', '센터']):
-                facility_type = 'Hospital'
-            elif any(keyword in customer_name for keyword in ['의원', '클리닉']):
-                facility_type = 'Clinic'
-            elif '약국' in customer_name:
-                facility_type = 'Pharmacy'
-            else:
-                facility_type = 'Unknown'
-            
-            # 진료과 추출
-            clinic_specialty = self._extract_clinic_specialty(customer_name)
-            
-            customer_features.append({
-                '거래처코드': customer_code,
-                '거래처명': customer_name,
-                '권역': region,
-                '담당자': manager,
-                '총매출': total_sales,
-                '평균거래액': avg_transaction,
-                '거래횟수': transaction_count,
-                '활동월수': active_months,
-                '품목수': unique_products,
-                '질환카테고리수': unique_categories,
-                '성장률': growth_rate,
-                '계절성지수': seasonality,
-                '할인민감도': avg_discount,
-                '거래처규모': scale,
-                '시설유형': facility_type,
-                '진료과': clinic_specialty,
-                '최근활동성': 1 if recent_sales > 0 else 0,
-                '품목다양성점수': unique_products / unique_categories if unique_categories > 0 else 0
-            })
+        # 거래처 유형 추정 (거래처명 기반)
+        names = profiles['거래처명'].astype(str)
+        profiles['시설유형'] = np.select(
+            [names.str.contains('병원|의료원|센터', regex=True),
+             names.str.contains('의원|클리닉', regex=True),
+             names.str.contains('약국', regex=False)],
+            ['Hospital', 'Clinic', 'Pharmacy'],
+            default='Unknown'
+        )
         
-        self.customer_profiles = pd.DataFrame(customer_features)
-        print(f"거래처 프로필 생성 완료: {len(self.customer_profiles)}개")
+        # 진료과 추출 (거래처명별 1회)
+        profiles['진료과'] = profiles['거래처명'].map(self._extract_clinic_specialty)
+        
+        profiles['최근활동성'] = (trend['최근매출'] > 0).astype(int)
+        profiles['품목다양성점수'] = np.where(
+            profiles['질환카테고리수'] > 0,
+            profiles['품목수'] / profiles['질환카테고리수'].where(profiles['질환카테고리수'] > 0, 1),
+            0
+        )
+        
+        return self._decode_categories(profiles).reset_index()
+        
+    def _calculate_monthly_trend(self, rows, key):
+        """key별 월매출로부터 최근/이전 기간 매출, 성장률, 계절성지수 계산
+        
+        월이 6개 이상이면 절반씩, 3~5개월이면 최근 3개월과 그 이전, 3개월 미만이면
+        전체를 최근 기간으로 비교한다.
+        """
+        monthly = rows.groupby([key, '기준년월'], sort=False, observed=True)['총매출'].sum().reset_index()
+        
+        month_rank = monthly.groupby(key, sort=False, observed=True)['기준년월'].rank(method='first') - 1
+        month_count = monthly.groupby(key, sort=False, observed=True)['기준년월'].transform('size')
+        recent_start = np.select(
+            [month_count >= 6, month_count >= 3],
+            [month_count // 2, month_count - 3],
+            default=0
+        )
+        is_recent = month_rank >= recent_start
+        
+        monthly_by_key = monthly.groupby(key, sort=False, observed=True)['총매출']
+        recent_sales = monthly['총매출'].where(is_recent, 0).groupby(monthly[key], sort=False, observed=True).sum()
+        prev_sales = monthly['총매출'].where(~is_recent, 0).groupby(monthly[key], sort=False, observed=True).sum()
+        mean_sales = monthly_by_key.mean()
+        
+        trend = pd.DataFrame({
+            '최근매출': recent_sales,
+            '이전매출': prev_sales,
+        })
+        trend['성장률'] = np.where(
+            prev_sales > 0,
+            (recent_sales - prev_sales) / prev_sales.where(prev_sales > 0, 1) * 100,
+            0
+        )
+        trend['계절성지수'] = np.where(
+            mean_sales > 0,
+            monthly_by_key.std() / mean_sales.where(mean_sales > 0, 1),
+            0
+        )
+        return trend
+        
+    def _build_profile_feature_matrix(self):
+        """품목군 유사도 계산용 거래처 특성 행렬 생성 (customer_profiles 행 순서)"""
+        self.profile_index = pd.Index(self.customer_profiles['거래처코드'])
+        self.profile_features = self._calculate_profile_features(self.customer_profiles)
+        
+    def _calculate_profile_features(self, profiles):
+        """거래처 프로필 행의 특성 벡터 (거래처규모 인코딩 후 행 단위 L2 정규화)"""
+        features = profiles[['총매출', '품목수', '성장률', '최근활동성']].astype(float)
+        features['거래처규모_encoded'] = profiles['거래처규모'].map(self.SCALE_ENCODING)
+        return normalize(features.to_numpy(dtype=float), norm='l2', axis=1)
+        
+    def _update_profile_feature_rows(self, customer_codes):
+        """customer_codes 거래처의 특성 행만 다시 계산 (_merge_profiles 순서대로 신규 거래처 행은 뒤에 추가)"""
+        self.profile_index = pd.Index(self.customer_profiles['거래처코드'])
+        rows = self.profile_index.get_indexer(customer_codes)
+        
+        features = np.zeros((len(self.profile_index), self.profile_features.shape[1]))
+        features[:len(self.profile_features)] = self.profile_features
+        features[rows] = self._calculate_profile_features(self.customer_profiles.iloc[rows])
+        self.profile_features = features
         
     def _create_product_profiles(self):
-        """품목별 프로필 생성"""
+        """품목별 프로필 생성 (품목군 groupby + 질환분류 groupby 조인)"""
         print("품목 프로필 생성 중...")
         
-        product_features = []
-        
-        for product in self.data['품목군'].unique():
-            product_data = self.data[self.data['품목군'] == product]
-            
-            # 기본 정보
-            total_sales = product_data['총매출'].sum()
-            total_qty = product_data['총수량'].sum()
-            avg_price = total_sales / total_qty if total_qty > 0 else 0
-            customer_count = product_data['거래처코드'].nunique()
-            
-            # 시장 침투율
-            total_customers = self.data['거래처코드'].nunique()
-            penetration_rate = customer_count / total_customers
-            
-            # 성장률 계산
-            months = sorted(product_data['기준년월'].unique())
-            if len(months) >= 6:
-                mid_point = len(months) // 2
-                recent_months = months[mid_point:]
-                prev_months = months[:mid_point]
-            else:
-                recent_months = months[-3:] if len(months) >= 3 else months
-                prev_months = months[:-3] if len(months) >= 3 else []
-            
-            recent_sales = product_data[product_data['기준년월'].isin(recent_months)]['총매출'].sum()
-            prev_sales = product_data[product_data['기준년월'].isin(prev_months)]['총매출'].sum()
-            growth_rate = ((recent_sales - prev_sales) / prev_sales * 100) if prev_sales > 0 else 0
-            
-            # 계절성
-            monthly_sales = product_data.groupby('기준년월')['총매출'].sum()
-            seasonality = monthly_sales.std() / monthly_sales.mean() if monthly_sales.mean() > 0 else 0
-            
-            # 경쟁강도 (같은 질환 카테고리 내 제품 수)
-            category = product_data['질환분류'].iloc[0]
-            category_products = self.data[self.data['질환분류'] == category]['품목군'].nunique()
-            competition_intensity = category_products - 1  # 자신 제외
-            
-            # 가격 포지셔닝
-            category_sales = self.data[self.data['질환분류'] == category]['총매출'].sum()
-            category_qty = self.data[self.data['질환분류'] == category]['총수량'].sum()
-            category_avg_price = category_sales / category_qty if category_qty > 0 else 1
-            price_positioning = avg_price / category_avg_price if category_avg_price > 0 else 1
-            
-            # 거래처 집중도 (상위 20% 거래처가 차지하는 매출 비중)
-            customer_sales = product_data.groupby('거래처코드')['총매출'].sum().sort_values(ascending=False)
-            top_20_pct_count = max(1, int(len(customer_sales) * 0.2))
-            concentration = customer_sales.head(top_20_pct_count).sum() / customer_sales.sum()
-            
-            product_features.append({
-                '품목군': product,
-                '질환분류': category,
-                '총매출': total_sales,
-                '총수량': total_qty,
-                '평균단가': avg_price,
-                '고객수': customer_count,
-                '시장침투율': penetration_rate,
-                '성장률': growth_rate,
-                '계절성지수': seasonality,
-                '경쟁강도': competition_intensity,
-                '가격포지셔닝': price_positioning,
-                '고객집중도': concentration,
-                '시장점유율': total_sales / self.data['총매출'].sum()
-            })
+        self._category_stats = self._calculate_category_stats(self.data)
+        self._category_products = self._category_product_pairs(self.data)
+        self._total_sales = self.data['총매출'].sum()
+        self.product_profiles = self._apply_product_market_context(self._build_product_profiles(self.data))
         
-        self.product_profiles = pd.DataFrame(product_features)
         print(f"품목 프로필 생성 완료: {len(self.product_profiles)}개")
         
-    def _build_interaction_matrix(self):
-        """거래처-품목 상호작용 매트릭스 구축"""
-        print("상호작용 매트릭스 구축 중...")
+    def _build_product_profiles(self, rows):
+        """rows 에 포함된 품목군의 품목 자체 지표 집계 (PRODUCT_LOCAL_COLUMNS)"""
+        grouped = rows.groupby('품목군', sort=False, observed=True)
+        
+        # 기본 정보
+        profiles = pd.DataFrame(index=rows['품목군'].drop_duplicates())
+        profiles['질환분류'] = rows.drop_duplicates('품목군').set_index('품목군')['질환분류']
+        profiles['총매출'] = grouped['총매출'].sum()
+        profiles['총수량'] = grouped['총수량'].sum()
+        profiles['평균단가'] = np.where(
+            profiles['총수량'] > 0,
+            profiles['총매출'] / profiles['총수량'].where(profiles['총수량'] > 0, 1),
+            0
+        )
+        profiles['고객수'] = grouped['거래처코드'].nunique()
+        
+        # 성장률 / 계절성
+        trend = self._calculate_monthly_trend(rows, '품목군').reindex(profiles.index)
+        profiles['성장률'] = trend['성장률']
+        profiles['계절성지수'] = trend['계절성지수']
+        
+        # 거래처 집중도 (상위 20% 거래처가 차지하는 매출 비중)
+        customer_sales = (
+            rows.groupby(['품목군', '거래처코드'], sort=False, observed=True)['총매출'].sum()
+            .reset_index()
+            .sort_values('총매출', ascending=False, kind='stable')
+        )
+        by_product = customer_sales.groupby('품목군', sort=False, observed=True)['총매출']
+        sales_rank = by_product.cumcount()
+        top_20_pct_count = np.maximum(1, (by_product.transform('size') * 0.2).astype(int))
+        top_sales = customer_sales['총매출'].where(sales_rank < top_20_pct_count, 0)
+        profiles['고객집중도'] = top_sales.groupby(customer_sales['품목군'], observed=True).sum() / by_product.sum()
+        
+        return self._decode_categories(profiles).reset_index()
+        
+    def _calculate_category_stats(self, rows):
+        """질환분류별 품목군 수, 매출, 수량 집계"""
+        return self._decode_categories(rows.groupby('질환분류', observed=True).agg(
+            품목군수=('품목군', 'nunique'),
+            총매출=('총매출', 'sum'),
+            총수량=('총수량', 'sum')
+        ))
+        
+    def _category_product_pairs(self, rows):
+        """rows 에 등장한 (질환분류, 품목군) 조합 집합"""
+        pairs = self._decode_categories(rows[['질환분류', '품목군']].dropna().drop_duplicates())
+        return set(zip(pairs['질환분류'], pairs['품목군']))
+        
+    def _update_category_stats(self, new_rows):
+        """신규 행의 질환분류별 매출 / 수량과 새로 등장한 (질환분류, 품목군) 조합 수만 기존 집계에 더함"""
+        new_pairs = self._category_product_pairs(new_rows) - self._category_products
+        self._category_products |= new_pairs
+        
+        added = self._decode_categories(
+            new_rows.groupby('질환분류', observed=True)[['총매출', '총수량']].sum()
+        )
+        added.insert(0, '품목군수', pd.Series(Counter(category for category, _ in new_pairs), dtype=int))
+        stats = self._category_stats.reindex(self._category_stats.index.union(added.index), fill_value=0)
+        self._category_stats = stats.add(added.reindex(stats.index, fill_value=0).fillna(0)).astype(stats.dtypes.to_dict())
+        
+    def _apply_product_market_context(self, profiles):
+        """품목 자체 지표에 전체 시장 대비 지표(침투율, 경쟁강도, 가격포지셔닝, 점유율) 추가"""
+        profiles = profiles.copy()
+        
+        # 시장 침투율
+        total_customers = len(self.customer_profiles)
+        profiles['시장침투율'] = profiles['고객수'] / total_customers
         
-        # Pivot table 생성 (거래처 x 품목)
-        interaction_matrix = self.data.pivot_table(
-            index='거래처코드',
-            columns='품목군',
-            values='총매출',
-            aggfunc='sum',
-            fill_value=0
+        # 질환분류별 집계 (경쟁강도, 가격 포지셔닝)
+        category = profiles[['질환분류']].join(self._category_stats, on='질환분류').fillna(
+            {'품목군수': 0, '총매출': 0, '총수량': 0}
         )
+        profiles['경쟁강도'] = category['품목군수'].astype(int) - 1  # 자신 제외
         
-        # 정규화 (0-1 스케일)
-        self.interaction_matrix = interaction_matrix.div(interaction_matrix.max(axis=1), axis=0).fillna(0)
+        category_avg_price = np.where(
+            category['총수량'] > 0,
+            category['총매출'] / category['총수량'].where(category['총수량'] > 0, 1),
+            1
+        )
+        profiles['가격포지셔닝'] = np.where(
+            category_avg_price > 0,
+            profiles['평균단가'] / np.where(category_avg_price > 0, category_avg_price, 1),
+            1
+        )
         
-        # 코사인 유사도 계산
-        self.customer_similarity = cosine_similarity(self.interaction_matrix)
-        self.product_similarity = cosine_similarity(self.interaction_matrix.T)
+        profiles['시장점유율'] = profiles['총매출'] / self._total_sales
+        
+        return profiles[self.PRODUCT_PROFILE_COLUMNS]
+        
+    def _build_interaction_matrix(self):
+        """거래처-품목 상호작용 매트릭스 구축 (희소 행렬 + 상위 k 이웃 인덱스)"""
+        print("상호작용 매트릭스 구축 중...")
+        
+        self.customer_index = self._decode_index(pd.Index(self.data['거래처코드'].dropna().unique()).sort_values())
+        self.product_index = self._decode_index(pd.Index(self.data['품목군'].dropna().unique()).sort_values())
+        self.interaction_matrix = self._build_interaction_rows(self.data, self.customer_index, self.product_index)
+        
+        # 코사인 유사도: 거래처는 상위 이웃 후보 버퍼만 보관, 품목은 품목 수 기준 dense
+        self._set_neighbor_buffer(*self._build_neighbor_index(self.interaction_matrix))
+        self._product_gram = (self.interaction_matrix.T @ self.interaction_matrix).toarray()
+        self._update_product_similarity()
         
         print("상호작용 매트릭스 구축 완료")
         
-    def build_predictive_models(self):
-        """예측 모델 구축"""
-        print("예측 모델 구축 중...")
+    def _build_interaction_rows(self, rows, customer_index, product_index):
+        """rows 의 거래처 x 품목 매출 합계를 행 최대값 기준 0-1 정규화한 CSR 행렬 생성"""
+        customer_codes = self._lookup_positions(customer_index, rows['거래처코드'])
+        product_codes = self._lookup_positions(product_index, rows['품목군'])
+        valid = (customer_codes >= 0) & (product_codes >= 0)
+        
+        # 거래처 x 품목 희소 행렬 생성 (중복 좌표는 합산)
+        interaction_matrix = csr_matrix(
+            (rows['총매출'].fillna(0).to_numpy(dtype=float)[valid],
+             (customer_codes[valid], product_codes[valid])),
+            shape=(len(customer_index), len(product_index))
+        )
+        interaction_matrix.sum_duplicates()
+        interaction_matrix.eliminate_zeros()
+        
+        # 정규화 (0-1 스케일, 행 최대값 기준)
+        row_max = interaction_matrix.max(axis=1).toarray().ravel()
+        row_scale = np.divide(1.0, row_max, out=np.zeros_like(row_max), where=row_max != 0)
+        interaction_matrix.data *= np.repeat(row_scale, np.diff(interaction_matrix.indptr))
+        interaction_matrix.eliminate_zeros()
+        return interaction_matrix
+        
+    def _update_interaction_matrix(self, customer_rows, changed_customers):
+        """변경 거래처 행만 다시 만들어 상호작용 행렬, 품목 내적 행렬, 이웃 후보 버퍼를 증분 갱신
+        
+        (이웃을 전체 거래처와 다시 비교한 행 수, 후보 버퍼만 갱신한 행 수) 를 반환한다.
+        """
+        customer_index = self.customer_index.append(
+            changed_customers[self.customer_index.get_indexer(changed_customers) < 0]
+        ).sort_values()
+        product_index = self.product_index.append(
+            self._decode_index(pd.Index(customer_rows['품목군'].dropna().unique())).difference(self.product_index)
+        ).sort_values()
+        row_map = customer_index.get_indexer(self.customer_index)
+        col_map = product_index.get_indexer(self.product_index)
+        
+        changed_rows = customer_index.get_indexer(changed_customers)
+        is_changed = np.zeros(len(customer_index), dtype=bool)
+        is_changed[changed_rows] = True
+        
+        # 기존 행(위치 재배치) + 변경 거래처 행
+        shape = (len(customer_index), len(product_index))
+        previous = self.interaction_matrix.tocoo()
+        keep = ~is_changed[row_map[previous.row]]
+        unchanged_part = csr_matrix(
+            (previous.data[keep], (row_map[previous.row[keep]], col_map[previous.col[keep]])), shape=shape
+        )
+        previous_part = csr_matrix(
+            (previous.data[~keep], (row_map[previous.row[~keep]], col_map[previous.col[~keep]])), shape=shape
+        )
+        changed_part = self._build_interaction_rows(customer_rows, customer_index, product_index)
+        self.interaction_matrix = (unchanged_part + changed_part).tocsr()
+        self.customer_index = customer_index
+        self.product_index = product_index
+        
+        # 품목 내적 행렬: 변경 거래처 행의 기여분만 교체
+        gram = np.zeros((len(product_index), len(product_index)))
+        gram[np.ix_(col_map, col_map)] = self._product_gram
+        gram -= (previous_part.T @ previous_part).toarray()
+        gram += (changed_part.T @ changed_part).toarray()
+        self._product_gram = gram
+        self._update_product_similarity()
+        
+        return self._update_neighbor_buffer(row_map, changed_rows, is_changed)
+        
+    def _update_product_similarity(self):
+        """품목 내적 행렬로부터 품목 x 품목 코사인 유사도 계산"""
+        norms = np.sqrt(np.clip(np.diag(self._product_gram), 0, None))
+        scale = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        self.product_similarity = self._product_gram * scale[:, None] * scale[None, :]
+        
+    def _update_neighbor_buffer(self, row_map, changed_rows, is_changed):
+        """변경 거래처와의 유사도만 다시 계산해 이웃 후보 버퍼를 증분 갱신
+        
+        변경 거래처는 전체 거래처와의 유사도 블록으로 버퍼를 새로 만들고, 코사인 유사도는
+        대칭이므로 같은 블록으로 나머지 거래처의 버퍼에서 변경 거래처 항목을 새 유사도로 바꾼다.
+        버퍼 밖 거래처의 유사도는 상한(floor) 이하이므로 상한 이상인 후보만 버퍼에 남기며,
+        남은 후보가 n_neighbors 보다 적어진 거래처만 전체 거래처와 다시 비교한다.
+        (전체 거래처와 다시 비교한 행 수, 후보 버퍼만 갱신한 행 수) 반환
+        """
+        n_rows = self.interaction_matrix.shape[0]
+        width = max(0, min(self.n_neighbors + self.NEIGHBOR_BUFFER_SLACK, n_rows - 1))
+        k = max(0, min(self.n_neighbors, n_rows - 1))
+        if width != self._neighbor_buffer_indices.shape[1]:
+            self._set_neighbor_buffer(*self._build_neighbor_index(self.interaction_matrix))
+            return n_rows, 0
+        
+        # 기존 버퍼를 새 행 번호로 옮기고 변경 거래처 항목은 비움
+        indices = np.full((n_rows, width), -1, dtype=np.int32)
+        weights = np.full((n_rows, width), -np.inf)
+        floor = np.full(n_rows, -np.inf)
+        indices[row_map] = np.where(self._neighbor_buffer_indices >= 0, row_map[self._neighbor_buffer_indices], -1)
+        weights[row_map] = self._neighbor_buffer_weights
+        floor[row_map] = self._neighbor_floor
+        
+        dropped = (indices >= 0) & is_changed[np.maximum(indices, 0)]
+        indices[dropped], weights[dropped] = -1, -np.inf
+        updated = dropped.any(axis=1) & ~is_changed
+        rows = np.flatnonzero(updated)
+        order = np.argsort(-weights[rows], axis=1, kind='stable')
+        indices[rows] = np.take_along_axis(indices[rows], order, axis=1)
+        weights[rows] = np.take_along_axis(weights[rows], order, axis=1)
+        
+        if width > 0:
+            for block_rows, block in similarity_blocks(self.interaction_matrix, changed_rows):
+                # 변경 거래처: 전체 거래처 대상 후보 버퍼 재생성
+                indices[block_rows], weights[block_rows] = top_k_columns(block, width)
+                floor[block_rows] = -np.inf if width == n_rows - 1 else weights[block_rows, -1]
+                
+                # 나머지 거래처: 상한보다 큰 (버퍼에 빈 칸이 있으면 상한과 같은) 변경 거래처 유사도만 병합
+                similarity = block.T
+                has_space = indices[:, -1] < 0
+                accepted = ((similarity > floor[:, None]) | ((similarity == floor[:, None]) & has_space[:, None]))
+                accepted &= ~is_changed[:, None]
+                rows = np.flatnonzero(accepted.any(axis=1))
+                if len(rows) == 0:
+                    continue
+                
+                candidate_weights = np.hstack([weights[rows], np.where(accepted[rows], similarity[rows], -np.inf)])
+                candidate_indices = np.hstack([indices[rows], np.broadcast_to(block_rows, (len(rows), len(block_rows)))])
+                order = np.argsort(-candidate_weights, axis=1, kind='stable')[:, :width]
+                weights[rows] = np.take_along_axis(candidate_weights, order, axis=1)
+                indices[rows] = np.where(weights[rows] > -np.inf, np.take_along_axis(candidate_indices, order, axis=1), -1)
+                # 버퍼가 가득 차면 잘려 나간 후보는 마지막 후보 유사도 이하
+                full = indices[rows, -1] >= 0
+                floor[rows[full]] = np.maximum(floor[rows[full]], weights[rows[full], -1])
+                updated[rows] = True
+        
+        # 후보가 n_neighbors 보다 적어진 거래처만 전체 거래처와 다시 비교
+        stale_rows = np.flatnonzero((indices[:, :k] < 0).any(axis=1) & ~is_changed)
+        if len(stale_rows) > 0:
+            indices[stale_rows], weights[stale_rows], floor[stale_rows] = self._build_neighbor_index(
+                self.interaction_matrix, stale_rows
+            )
+        
+        self._set_neighbor_buffer(indices, weights, floor)
+        updated[stale_rows] = False
+        return len(changed_rows) + len(stale_rows), int(updated.sum())
         
-        # 학습 데이터 준비
-        training_data = []
+    def _build_neighbor_index(self, matrix, rows=None):
+        """행별 코사인 유사도 상위 이웃 후보 버퍼 (n_neighbors + NEIGHBOR_BUFFER_SLACK 개, 자기 자신 제외)
         
-        for _, row in self.data.iterrows():
-            customer_code = row['거래처코드']
-            product = row['품목군']
-            sales = row['총매출']
-            
-            # 거래처 특성
-            customer_profile = self.customer_profiles[
-                self.customer_profiles['거래처코드'] == customer_code
-            ].iloc[0]
-            
-            # 품목 특성
-            product_profile = self.product_profiles[
-                self.product_profiles['품목군'] == product
-            ].iloc[0]
-            
-            # 특성 조합
-            features = {
-                'customer_total_sales': customer_profile['총매출'],
-                'customer_growth_rate': customer_profile['성장률'],
-                'customer_product_diversity': customer_profile['품목수'],
-                'customer_scale_encoded': self._encode_scale(customer_profile['거래처규모']),
-                'product_penetration_rate': product_profile['시장침투율'],
-                'product_growth_rate': product_profile['성장률'],
-                'product_avg_price': product_profile['평균단가'],
-                'product_competition': product_profile['경쟁강도'],
-                'category_match': 1 if customer_profile['질환카테고리수'] > 1 else 0,
-                'regional_demand': self._calculate_regional_demand(customer_profile['권역'], product),
-                'actual_sales': sales,
-                'success': 1 if sales > 0 else 0
-            }
-            
-            training_data.append(features)
+        (행 번호, 유사도, 버퍼 밖 유사도 상한) 을 반환하며 rows 지정 시 해당 행만 계산한다.
+        버퍼가 자기 자신을 제외한 전체 행을 담으면 상한은 -inf 이다.
+        """
+        indices, weights = top_k_similar_rows(matrix, self.n_neighbors + self.NEIGHBOR_BUFFER_SLACK, rows)
+        if indices.shape[1] == 0 or indices.shape[1] == matrix.shape[0] - 1:
+            floor = np.full(len(indices), -np.inf)
+        else:
+            floor = weights[:, -1].copy()
+        return indices, weights, floor
+        
+    def _set_neighbor_buffer(self, indices, weights, floor):
+        """이웃 후보 버퍼 저장 및 상위 n_neighbors 이웃(neighbor_indices / neighbor_weights) 갱신"""
+        self._neighbor_buffer_indices = indices
+        self._neighbor_buffer_weights = weights
+        self._neighbor_floor = floor
+        k = max(0, min(self.n_neighbors, len(indices) - 1))
+        self.neighbor_indices = indices[:, :k]
+        self.neighbor_weights = weights[:, :k]
+        
+    @timed_stage('train')
+    def build_predictive_models(self, training_profile=None):
+        """예측 모델 구축
+        
+        training_profile: 'standard' (RandomForest + GradientBoosting) 또는
+        'fast' (HistGradientBoosting, 조기 종료 + 행 샘플링). 기본값은 EngineConstants.TRAINING_PROFILE
+        """
+        training_profile = training_profile or EngineConstants.TRAINING_PROFILE
+        print(f"예측 모델 구축 중... (학습 프로필: {training_profile})")
+        
+        X, y_sales, y_success = self._build_training_set()
+        self.sales_predictor, self.success_classifier = self._fit_models(training_profile, X, y_sales, y_success)
+        self.training_profile = training_profile
+        self.clear_recommendation_cache()
+        
+        print("예측 모델 구축 완료")
+        
+    def _build_training_set(self):
+        """학습 데이터 준비 (거래 행 x 거래처/품목 프로필 인덱스 조인)"""
+        customers = self.customer_profiles.set_index('거래처코드').reindex(self.data['거래처코드'])
+        products = self.product_profiles.set_index('품목군').reindex(self.data['품목군'])
+        
+        X = self._build_feature_frame(customers, products, self.regional_demand).fillna(0)
+        y_sales = pd.Series(self.data['총매출'].to_numpy(), name='actual_sales')
+        y_success = (y_sales > 0).astype(int).rename('success')
+        return X, y_sales, y_success
+        
+    def _create_models(self, training_profile):
+        """학습 프로필별 (매출 회귀 모델, 성공 분류 모델) 생성"""
+        if training_profile == 'standard':
+            return (
+                RandomForestRegressor(**EngineConstants.STANDARD_RANDOM_FOREST_PARAMS),
+                GradientBoostingClassifier(**EngineConstants.STANDARD_GRADIENT_BOOSTING_PARAMS)
+            )
+        if training_profile == 'fast':
+            params = EngineConstants.FAST_HIST_GRADIENT_BOOSTING_PARAMS
+            return HistGradientBoostingRegressor(**params), HistGradientBoostingClassifier(**params)
+        raise ValueError(f"알 수 없는 학습 프로필: {training_profile}")
         
-        training_df = pd.DataFrame(training_data)
+    def _fit_models(self, training_profile, X, y_sales, y_success):
+        """학습 프로필에 맞춰 모델 생성 및 학습 (fast 프로필은 행 수 상한까지 샘플링)"""
+        sales_predictor, success_classifier = self._create_models(training_profile)
         
-        # 특성과 타겟 분리
-        feature_columns = [col for col in training_df.columns if col not in ['actual_sales', 'success']]
-        X = training_df[feature_columns].fillna(0)
-        y_sales = training_df['actual_sales']
-        y_success = training_df['success']
+        max_rows = EngineConstants.FAST_TRAINING_MAX_ROWS
+        if training_profile == 'fast' and max_rows is not None and len(X) > max_rows:
+            X = X.sample(n=max_rows, random_state=42)
+            y_sales = y_sales.loc[X.index]
+            y_success = y_success.loc[X.index]
         
         # 매출 예측 모델 (회귀)
-        self.sales_predictor = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.sales_predictor.fit(X, y_sales)
+        sales_predictor.fit(X, y_sales)
         
         # 성공 확률 모델 (분류)
-        self.success_classifier = GradientBoostingClassifier(n_estimators=100, random_state=42)
-        self.success_classifier.fit(X, y_success)
+        success_classifier.fit(X, y_success)
+        return sales_predictor, success_classifier
+        
+    @timed_stage('compare_training_profiles')
+    def compare_training_profiles(self, profiles=('standard', 'fast'), test_size=None):
+        """학습 프로필별 학습 시간과 홀드아웃 성능 비교 리포트
+        
+        동일한 학습/검증 분할에서 각 프로필을 학습해 매출 모델(R², MAE)과
+        성공 모델(정확도, ROC AUC)을 평가한다. 엔진에 설정된 모델은 바꾸지 않는다.
+        """
+        test_size = test_size or EngineConstants.PROFILE_COMPARISON_TEST_SIZE
+        print("학습 프로필 비교 중...")
+        
+        X, y_sales, y_success = self._build_training_set()
+        X_train, X_test, sales_train, sales_test, success_train, success_test = train_test_split(
+            X, y_sales, y_success, test_size=test_size, random_state=42
+        )
         
-        print("예측 모델 구축 완료")
+        report = []
+        for training_profile in profiles:
+            start = datetime.now()
+            sales_predictor, success_classifier = self._fit_models(
+                training_profile, X_train, sales_train, success_train
+            )
+            fit_seconds = (datetime.now() - start).total_seconds()
+            
+            sales_pred = sales_predictor.predict(X_test)
+            success_prob = success_classifier.predict_proba(X_test)[:, -1]
+            report.append({
+                '학습프로필': training_profile,
+                '학습시간(초)': round(fit_seconds, 3),
+                '매출_R2': r2_score(sales_test, sales_pred),
+                '매출_MAE': mean_absolute_error(sales_test, sales_pred),
+                '성공_정확도': accuracy_score(success_test, success_classifier.predict(X_test)),
+                '성공_AUC': roc_auc_score(success_test, success_prob) if success_test.nunique() > 1 else np.nan
+            })
+            print(f"  {training_profile}: 학습 {fit_seconds:.2f}초")
+        
+        print("학습 프로필 비교 완료")
+        return pd.DataFrame(report)
+        
+    def _build_feature_frame(self, customers, products, regional_demand):
+        """거래처 프로필 행과 품목 프로필 행(행 단위로 짝지어진)을 예측 특성으로 조합"""
+        region_product = pd.MultiIndex.from_arrays([customers['권역'], products.index])
+        
+        return pd.DataFrame({
+            'customer_total_sales': customers['총매출'].to_numpy(),
+            'customer_growth_rate': customers['성장률'].to_numpy(),
+            'customer_product_diversity': customers['품목수'].to_numpy(),
+            'customer_scale_encoded': customers['거래처규모'].map(self.SCALE_ENCODING).fillna(1).astype(int).to_numpy(),
+            'product_penetration_rate': products['시장침투율'].to_numpy(),
+            'product_growth_rate': products['성장률'].to_numpy(),
+            'product_avg_price': products['평균단가'].to_numpy(),
+            'product_competition': products['경쟁강도'].to_numpy(),
+            'category_match': (customers['질환카테고리수'] > 1).astype(int).to_numpy(),
+            'regional_demand': regional_demand.reindex(region_product).fillna(0).to_numpy()
+        })
+        
+    def _build_regional_demand_table(self, rows=None):
+        """권역 x 품목군 평균 거래액 테이블 (_calculate_regional_demand 와 동일한 정의)"""
+        rows = self.data if rows is None else rows
+        if '권역' not in rows.columns:
+            return pd.Series(dtype=float, index=pd.MultiIndex.from_arrays([[], []], names=['권역', '품목군']))
+        
+        grouped = rows.groupby(['권역', '품목군'], observed=True)['총매출']
+        return self._decode_categories((grouped.sum() / grouped.size()).to_frame())['총매출']
         
     def _encode_scale(self, scale):
         """거래처 규모 인코딩"""
-        scale_map = {'Micro': 1, 'Small': 2, 'Medium': 3, 'Large': 4}
-        return scale_map.get(scale, 1)
+        return self.SCALE_ENCODING.get(scale, 1)
         
     def _calculate_regional_demand(self, region, product):
-        """지역별 수요 계산"""
-        regional_data = self.data[
-            (self.data['권역'] == region) & (self.data['품목군'] == product)
-        ]
-        return regional_data['총매출'].sum() / len(regional_data) if len(regional_data) > 0 else 0
+        """지역별 수요 계산 (사전 집계된 권역 x 품목군 테이블 조회)"""
+        if self.regional_demand is None:
+            self.regional_demand = self._build_regional_demand_table()
+        return self.regional_demand.get((region, product), 0)
+        
+    def get_stage_metrics(self, summary=False):
+        """단계별 계측 기록 DataFrame (summary=True 이면 단계별 합계 요약)"""
+        return self.metrics.summary() if summary else self.metrics.to_frame()
+        
+    def set_metrics_log(self, log_path, track_memory=None):
+        """단계별 계측 기록을 JSON lines 파일에 추가 기록 (None 이면 기록 중단, track_memory 로 메모리 측정 전환)"""
+        self.metrics.log_path = log_path
+        if track_memory is not None:
+            self.metrics.track_memory = track_memory
+        
+    def compute_data_fingerprint(self, sales_data):
+        """입력 데이터 내용 해시 (컬럼, dtype, 행 값 기준)"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in sales_data.dtypes.items()],
+                                 ensure_ascii=False).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(sales_data, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+        
+    @timed_stage('save_artifacts')
+    def save_artifacts(self, path):
+        """프로필, 행렬, 학습된 모델을 디렉토리에 저장 (재시작 시 load_artifacts 로 복원)"""
+        try:
+            os.makedirs(path, exist_ok=True)
+            
+            # 데이터 및 프로필 (Parquet)
+            self.data.to_parquet(os.path.join(path, 'data.parquet'), index=False)
+            self.customer_profiles.to_parquet(os.path.join(path, 'customer_profiles.parquet'), index=False)
+            self.product_profiles.to_parquet(os.path.join(path, 'product_profiles.parquet'), index=False)
+            self.regional_demand.rename('지역수요').reset_index().to_parquet(
+                os.path.join(path, 'regional_demand.parquet'), index=False
+            )
+            pd.DataFrame({'거래처코드': self.customer_index}).to_parquet(
+                os.path.join(path, 'customer_index.parquet'), index=False
+            )
+            pd.DataFrame({'품목군': self.product_index}).to_parquet(
+                os.path.join(path, 'product_index.parquet'), index=False
+            )
+            
+            # 행렬 (npz)
+            np.savez(
+                os.path.join(path, 'matrices.npz'),
+                interaction_data=self.interaction_matrix.data,
+                interaction_indices=self.interaction_matrix.indices,
+                interaction_indptr=self.interaction_matrix.indptr,
+                interaction_shape=np.array(self.interaction_matrix.shape),
+                neighbor_buffer_indices=self._neighbor_buffer_indices,
+                neighbor_buffer_weights=self._neighbor_buffer_weights,
+                neighbor_floor=self._neighbor_floor,
+                product_similarity=self.product_similarity,
+                profile_features=self.profile_features
+            )
+            
+            # 학습된 모델 (joblib)
+            has_models = self.sales_predictor is not None and self.success_classifier is not None
+            if has_models:
+                joblib.dump(
+                    {'sales_predictor': self.sales_predictor, 'success_classifier': self.success_classifier},
+                    os.path.join(path, 'models.joblib')
+                )
+            
+            manifest = {
+                'artifact_version': self.ARTIFACT_VERSION,
+                'data_fingerprint': self.data_fingerprint,
+                'n_neighbors': self.n_neighbors,
+                'has_models': has_models,
+                'training_profile': self.training_profile,
+                'rows': len(self.data),
+                'created_at': datetime.now().isoformat()
+            }
+            with open(os.path.join(path, 'manifest.json'), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            
+            print(f"엔진 아티팩트 저장 완료: {path}")
+            return True
+            
+        except Exception as e:
+            print(f"엔진 아티팩트 저장 실패: {e}")
+            return False
+        
+    @timed_stage('load_artifacts')
+    def load_artifacts(self, path, expected_fingerprint=None):
+        """save_artifacts 로 저장한 엔진 상태 복원
+        
+        expected_fingerprint 가 주어지면 저장 당시 데이터 해시와 일치할 때만 복원한다.
+        복원하지 못하면 False 를 반환하며 엔진 상태는 변경하지 않는다.
+        """
+        manifest_path = os.path.join(path, 'manifest.json')
+        if not os.path.exists(manifest_path):
+            return False
+        
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            
+            if manifest.get('artifact_version') != self.ARTIFACT_VERSION:
+                print("엔진 아티팩트 버전이 달라 재구축합니다.")
+                return False
+            if expected_fingerprint is not None and manifest.get('data_fingerprint') != expected_fingerprint:
+                print("입력 데이터가 변경되어 엔진 아티팩트를 사용하지 않습니다.")
+                return False
+            
+            data = pd.read_parquet(os.path.join(path, 'data.parquet'))
+            customer_profiles = pd.read_parquet(os.path.join(path, 'customer_profiles.parquet'))
+            product_profiles = pd.read_parquet(os.path.join(path, 'product_profiles.parquet'))
+            regional_demand = pd.read_parquet(os.path.join(path, 'regional_demand.parquet'))
+            customer_index = pd.Index(pd.read_parquet(os.path.join(path, 'customer_index.parquet'))['거래처코드'])
+            product_index = pd.Index(pd.read_parquet(os.path.join(path, 'product_index.parquet'))['품목군'])
+            
+            with np.load(os.path.join(path, 'matrices.npz')) as matrices:
+                interaction_matrix = csr_matrix(
+                    (matrices['interaction_data'], matrices['interaction_indices'], matrices['interaction_indptr']),
+                    shape=tuple(matrices['interaction_shape'])
+                )
+                neighbor_buffer = (
+                    matrices['neighbor_buffer_indices'], matrices['neighbor_buffer_weights'], matrices['neighbor_floor']
+                )
+                product_similarity = matrices['product_similarity']
+                profile_features = matrices['profile_features']
+            
+            models = {'sales_predictor': None, 'success_classifier': None}
+            if manifest.get('has_models'):
+                models = joblib.load(os.path.join(path, 'models.joblib'))
+            
+        except Exception as e:
+            print(f"엔진 아티팩트 로드 실패: {e}")
+            return False
         
+        self.data = data
+        self.customer_profiles = customer_profiles
+        self.product_profiles = product_profiles
+        self.regional_demand = regional_demand.set_index(['권역', '품목군'])['지역수요']
+        self.customer_index = customer_index
+        self.product_index = product_index
+        self.interaction_matrix = interaction_matrix
+        self.n_neighbors = manifest['n_neighbors']
+        self._set_neighbor_buffer(*neighbor_buffer)
+        self.product_similarity = product_similarity
+        self.profile_index = pd.Index(self.customer_profiles['거래처코드'])
+        self.profile_features = profile_features
+        
+        # append_month 증분 갱신용 보조 상태 (저장하지 않고 데이터에서 다시 계산)
+        self._product_gram = (interaction_matrix.T @ interaction_matrix).toarray()
+        self._category_stats = self._calculate_category_stats(self.data)
+        self._category_products = self._category_product_pairs(self.data)
+        self._total_sales = self.data['총매출'].sum()
+        self._build_row_positions()
+        self.data_fingerprint = manifest['data_fingerprint']
+        self.sales_predictor = models['sales_predictor']
+        self.success_classifier = models['success_classifier']
+        self.training_profile = manifest.get('training_profile')
+        self.clear_recommendation_cache()
+        
+        print(f"엔진 아티팩트 로드 완료: {path}")
+        return True
+        
+    @timed_stage('score_product')
     def recommend_targets_for_product(self, target_product, top_n=10, exclude_existing=True):
         """특정 품목에 대한 최적 타겟 거래처 추천"""
         print(f"'{target_product}' 품목 타겟 추천 생성 중...")
         
+        cache_key = ('product', target_product, top_n, exclude_existing, self.data_fingerprint)
+        cached = self._get_cached_recommendations(cache_key)
+        if cached is not None:
+            print(f"추천 완료 (캐시): 상위 {len(cached)}개 거래처")
+            return cached
+        
         if target_product not in self.product_profiles['품목군'].values:
             print(f"품목 '{target_product}'을 찾을 수 없습니다.")
             return None
         
-        # 기존 구매 거래처 (제외할 경우)
-        existing_customers = set()
-        if exclude_existing:
-            existing_customers = set(
-                self.data[self.data['품목군'] == target_product]['거래처코드'].unique()
+        scores = self._score_products([target_product], exclude_existing)
+        recommendations = self._rank_product_candidates(scores, 0, top_n)
+        
+        print(f"추천 완료: 상위 {len(recommendations)}개 거래처")
+        self._store_cached_recommendations(cache_key, recommendations)
+        return recommendations
+        
+    @timed_stage('score_all_products')
+    def recommend_targets_for_all_products(self, top_n=10, exclude_existing=True, products=None):
+        """전체(또는 지정한) 품목의 타겟 거래처 추천을 한 번에 계산
+        
+        후보 거래처 x 품목 점수를 품목 블록 단위로 일괄 계산하며 (블록당 모델 예측 1회),
+        반환값은 {품목: recommend_targets_for_product 와 같은 추천 목록, 없는 품목은 None} 이다.
+        캐시에 있는 품목은 다시 계산하지 않으며, 계산한 결과는 캐시에 저장한다.
+        """
+        if products is None:
+            products = self.product_profiles['품목군'].tolist()
+        print(f"{len(products)}개 품목 타겟 거래처 일괄 추천 중...")
+        
+        available_products = set(self.product_profiles['품목군'])
+        results = {product: None for product in products}
+        known_products = []
+        cached_count = 0
+        for product in results:
+            if product not in available_products:
+                continue
+            cached = self._get_cached_recommendations(
+                ('product', product, top_n, exclude_existing, self.data_fingerprint)
             )
+            if cached is None:
+                known_products.append(product)
+            else:
+                results[product] = cached
+                cached_count += 1
+        
+        # 후보 쌍 x 예측 특성 원소 수가 블록 상한을 넘지 않도록 품목 블록 크기 결정
+        block_size = max(1, EngineConstants.SIMILARITY_BLOCK_ELEMENTS // max(
+            1, len(self.customer_profiles) * self.PREDICTION_FEATURE_COUNT
+        ))
+        customer_records = self.customer_profiles.to_dict('records') if known_products else []
+        for start in range(0, len(known_products), block_size):
+            block_products = known_products[start:start + block_size]
+            scores = self._score_products(block_products, exclude_existing)
+            for column, product in enumerate(block_products):
+                results[product] = self._rank_product_candidates(scores, column, top_n, customer_records)
+                self._store_cached_recommendations(
+                    ('product', product, top_n, exclude_existing, self.data_fingerprint), results[product]
+                )
         
-        recommendations = []
+        print(f"일괄 추천 완료: {len(known_products)}개 품목 계산, 캐시 {cached_count}개")
+        return results
         
-        for _, customer in self.customer_profiles.iterrows():
-            customer_code = customer['거래처코드']
-            
-            # 기존 구매 거래처 제외
-            if exclude_existing and customer_code in existing_customers:
-                continue
-            
-            # 예측 특성 준비
-            product_profile = self.product_profiles[
-                self.product_profiles['품목군'] == target_product
-            ].iloc[0]
-            
-            features = pd.DataFrame([{
-                'customer_total_sales': customer['총매출'],
-                'customer_growth_rate': customer['성장률'],
-                'customer_product_diversity': customer['품목수'],
-                'customer_scale_encoded': self._encode_scale(customer['거래처규모']),
-                'product_penetration_rate': product_profile['시장침투율'],
-                'product_growth_rate': product_profile['성장률'],
-                'product_avg_price': product_profile['평균단가'],
-                'product_competition': product_profile['경쟁강도'],
-                'category_match': 1 if customer['질환카테고리수'] > 1 else 0,
-                'regional_demand': self._calculate_regional_demand(customer['권역'], target_product)
-            }])
-            
-            # 예측 수행
-            predicted_sales = self.sales_predictor.predict(features)[0]
-            success_probability = self.success_classifier.predict_proba(features)[0][1]
-            
-            # 유사 고객 기반 추천 점수
-            similar_customers_score = self._calculate_similarity_score(customer_code, target_product)
-            
-            # 진료과 매칭 점수 계산
-            target_product_category = product_profile['질환분류']
-            clinic_specialty = customer['진료과']
-            specialty_match_score = self._calculate_specialty_match_score(target_product_category, clinic_specialty)
-            
-            # 종합 점수 계산 (진료과 매칭 점수 반영)
-            composite_score = (
-                predicted_sales * 0.3 +
-                success_probability * 1000000 * 0.25 +  # 확률을 매출 단위로 변환
-                similar_customers_score * 0.2 +
-                specialty_match_score * 100000 * 0.25  # 진료과 매칭 점수 추가
-            )
-            
+    def _score_products(self, target_products, exclude_existing=True):
+        """후보 거래처 x 품목 추천 점수 일괄 계산 (후보 쌍 단위)
+        
+        후보 쌍은 품목 순서, 같은 품목 안에서는 customer_profiles 행 순서로 정렬되며
+        품목 i 의 후보는 offsets[i]:offsets[i + 1] 구간이다. 전체 후보 쌍의 특성을
+        한 번에 조합하여 모델별로 한 번씩만 예측한다.
+        """
+        product_index = pd.Index(target_products)
+        product_table = self.product_profiles.set_index('품목군')
+        
+        # 후보 여부 (품목 x 거래처, 기존 구매 거래처 제외)
+        is_candidate = np.ones((len(product_index), len(self.profile_index)), dtype=bool)
+        if exclude_existing:
+            pairs = self.data.loc[self.data['품목군'].isin(product_index), ['거래처코드', '품목군']].drop_duplicates()
+            rows = self._lookup_positions(self.profile_index, pairs['거래처코드'])
+            columns = self._lookup_positions(product_index, pairs['품목군'])
+            valid = (rows >= 0) & (columns >= 0)
+            is_candidate[columns[valid], rows[valid]] = False
+        product_positions, customer_positions = np.nonzero(is_candidate)
+        offsets = np.concatenate([[0], np.cumsum(is_candidate.sum(axis=1))])
+        
+        # 전체 후보 쌍 특성을 한 번에 조합하여 일괄 예측
+        candidates = self.customer_profiles.iloc[customer_positions]
+        products = product_table.loc[product_index].iloc[product_positions]
+        features = self._build_feature_frame(candidates, products, self.regional_demand)
+        
+        if len(candidates) > 0:
+            predicted_sales = self.sales_predictor.predict(features)
+            success_probability = self.success_classifier.predict_proba(features)[:, 1]
+        else:
+            predicted_sales = success_probability = np.zeros(0)
+        
+        # 유사 고객 기반 추천 점수
+        similar_customers_score = self._calculate_similarity_scores(
+            self.profile_index[customer_positions], product_index[product_positions]
+        )
+        
+        # 진료과 매칭 점수 (질환분류 x 진료과 조합별 1회 계산)
+        specialty_codes, specialties = pd.factorize(self.customer_profiles['진료과'], use_na_sentinel=False)
+        specialty_table = np.array([
+            [self._calculate_specialty_match_score(category, specialty) for specialty in specialties]
+            for category in product_table.loc[product_index, '질환분류']
+        ], dtype=float).reshape(len(product_index), len(specialties))
+        specialty_match_score = specialty_table[product_positions, specialty_codes[customer_positions]]
+        
+        # 종합 점수 계산 (진료과 매칭 점수 반영)
+        composite_score = (
+            predicted_sales * 0.3 +
+            success_probability * 1000000 * 0.25 +  # 확률을 매출 단위로 변환
+            similar_customers_score * 0.2 +
+            specialty_match_score * 100000 * 0.25  # 진료과 매칭 점수 추가
+        )
+        
+        return {
+            'products': product_table.loc[product_index],
+            'offsets': offsets,
+            'customer_positions': customer_positions,
+            'predicted_sales': predicted_sales,
+            'success_probability': success_probability,
+            'similarity': similar_customers_score,
+            'specialty_match': specialty_match_score,
+            'composite_score': composite_score
+        }
+        
+    def _rank_product_candidates(self, scores, column, top_n, customer_records=None):
+        """품목 점수의 한 품목 구간에서 상위 top_n 추천 목록 생성
+        
+        customer_records 는 customer_profiles 의 행 dict 목록 (여러 품목을 순위화할 때 한 번만 변환해 전달)
+        """
+        start, stop = scores['offsets'][column], scores['offsets'][column + 1]
+        product_profile = scores['products'].iloc[column]
+        
+        # 반올림된 종합 점수 순으로 상위 top_n 선택 (동점은 거래처 순서 유지)
+        top_positions = start + self._select_top_positions(np.round(scores['composite_score'][start:stop], 0), top_n)
+        customer_positions = scores['customer_positions'][top_positions]
+        if customer_records is None:
+            customers = self.customer_profiles.iloc[customer_positions].to_dict('records')
+        else:
+            customers = [customer_records[position] for position in customer_positions]
+        
+        recommendations = []
+        for position, customer in zip(top_positions, customers):
+            success_probability = scores['success_probability'][position]
+            specialty_match_score = scores['specialty_match'][position]
             recommendations.append({
-                '거래처코드': customer_code,
+                '거래처코드': customer['거래처코드'],
                 '거래처명': customer['거래처명'],
                 '권역': customer['권역'],
                 '담당자': customer['담당자'],
-                '예상매출': int(predicted_sales),
+                '예상매출': int(scores['predicted_sales'][position]),
                 '성공확률': round(success_probability * 100, 1),
-                '유사도점수': round(similar_customers_score, 3),
+                '유사도점수': round(scores['similarity'][position], 3),
                 '진료과매칭점수': round(specialty_match_score, 1),
-                '종합점수': round(composite_score, 0),
-                '추천이유': self._generate_recommendation_reason(customer, product_profile, success_probability, specialty_match_score),
+                '종합점수': round(scores['composite_score'][position], 0),
+                '추천이유': self._generate_recommendation_reason(
+                    customer, product_profile, success_probability, specialty_match_score
+                ),
                 '거래처규모': customer['거래처규모'],
                 '시설유형': customer['시설유형'],
                 '진료과': customer['진료과'],
@@ -505,29 +1351,88 @@ class SmartSalesTargetingEngine:
                 '성장률': round(customer['성장률'], 1)
             })
         
-        # 종합 점수 순으로 정렬
-        recommendations.sort(key=lambda x: x['종합점수'], reverse=True)
+        return recommendations
         
-        print(f"추천 완료: 상위 {min(top_n, len(recommendations))}개 거래처")
-        return recommendations[:top_n]
+    def _get_cached_recommendations(self, cache_key):
+        """캐시된 추천 목록 조회 (적중 시 최근 사용으로 갱신하고 사본 반환, 없으면 None)"""
+        with self._cache_lock:
+            recommendations = self._recommendation_cache.get(cache_key)
+            if recommendations is None:
+                self.cache_misses += 1
+                return None
+            
+            self.cache_hits += 1
+            self._recommendation_cache.move_to_end(cache_key)
+            return [dict(rec) for rec in recommendations]
+        
+    def _store_cached_recommendations(self, cache_key, recommendations):
+        """추천 목록을 캐시에 저장 (최대 크기 초과 시 가장 오래 사용되지 않은 항목 제거)"""
+        with self._cache_lock:
+            self._recommendation_cache[cache_key] = [dict(rec) for rec in recommendations]
+            self._recommendation_cache.move_to_end(cache_key)
+            while len(self._recommendation_cache) > self.RECOMMENDATION_CACHE_SIZE:
+                self._recommendation_cache.popitem(last=False)
+        
+    def clear_recommendation_cache(self):
+        """추천 결과 캐시 비우기 (데이터 로드, 증분 반영, 모델 학습 시 자동 호출)"""
+        with self._cache_lock:
+            self._recommendation_cache.clear()
+        
+    def get_cache_stats(self):
+        """추천 결과 캐시 적중/미스 통계"""
+        requests = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / requests if requests > 0 else 0.0,
+            'size': len(self._recommendation_cache),
+            'max_size': self.RECOMMENDATION_CACHE_SIZE
+        }
         
-    def _calculate_similarity_score(self, customer_code, target_product):
-        """유사 고객 기반 점수 계산"""
-        if customer_code not in self.interaction_matrix.index:
-            return 0
+    def _select_top_positions(self, scores, top_n):
+        """점수 내림차순 상위 top_n 위치 반환 (argpartition 선택 후 정렬, 동점은 원래 순서)"""
+        if top_n <= 0 or len(scores) == 0:
+            return np.zeros(0, dtype=int)
         
-        customer_idx = self.interaction_matrix.index.get_loc(customer_code)
-        similar_customers = np.argsort(self.customer_similarity[customer_idx])[::-1][1:11]  # 상위 10명
+        if top_n < len(scores):
+            kth_score = -np.partition(-scores, top_n - 1)[top_n - 1]
+            positions = np.flatnonzero(scores >= kth_score)
+        else:
+            positions = np.arange(len(scores))
         
-        score = 0
-        for similar_idx in similar_customers:
-            similar_customer_code = self.interaction_matrix.index[similar_idx]
-            if target_product in self.interaction_matrix.columns:
-                similarity = self.customer_similarity[customer_idx][similar_idx]
-                purchase_score = self.interaction_matrix.loc[similar_customer_code, target_product]
-                score += similarity * purchase_score
+        order = np.lexsort((positions, -scores[positions]))
+        return positions[order][:top_n]
         
-        return score / len(similar_customers)
+    def _calculate_similarity_score(self, customer_code, target_product):
+        """유사 고객 기반 점수 계산 (상위 k 이웃 인덱스 사용)"""
+        return self._calculate_similarity_scores([customer_code], target_product)[0]
+        
+    def _calculate_similarity_scores(self, customer_codes, target_products):
+        """여러 (거래처, 품목) 쌍의 유사 고객 기반 점수를 한 번에 계산
+        
+        target_products 는 품목 1개 또는 customer_codes 와 같은 길이의 품목 배열이다.
+        필요한 품목 열만 한 번 꺼낸 뒤, 거래처별 이웃 위치를 gather 하여 이웃 유사도와 내적한다.
+        """
+        scores = np.zeros(len(customer_codes), dtype=float)
+        if self.customer_index is None:
+            return scores
+        
+        k = self.neighbor_indices.shape[1]
+        if np.ndim(target_products) == 0:
+            target_products = [target_products] * len(customer_codes)
+        rows = self.customer_index.get_indexer(customer_codes)
+        columns = self.product_index.get_indexer(target_products)
+        known = (rows >= 0) & (columns >= 0)
+        if k == 0 or not known.any():
+            return scores
+        
+        used_columns, block_columns = np.unique(columns[known], return_inverse=True)
+        purchase_scores = self.interaction_matrix[:, used_columns].toarray()
+        
+        neighbors = self.neighbor_indices[rows[known]]
+        weights = self.neighbor_weights[rows[known]]
+        scores[known] = np.einsum('ij,ij->i', weights, purchase_scores[neighbors, block_columns[:, None]]) / k
+        return scores
         
     def _generate_recommendation_reason(self, customer, product, success_prob, specialty_match_score):
         """추천 이유 생성 (진료과 매칭 정보 포함)"""
@@ -556,6 +1461,7 @@ class SmartSalesTargetingEngine:
         
         return ', '.join(reasons) if reasons else "표준 추천"
         
+    @timed_stage('market_analysis')
     def analyze_market_opportunity(self, target_product):
         """시장 기회 분석"""
         print(f"'{target_product}' 시장 기회 분석 중...")
@@ -568,16 +1474,46 @@ class SmartSalesTargetingEngine:
             self.product_profiles['품목군'] == target_product
         ].iloc[0]
         
+        # 잠재 시장 크기 계산용 동일 질환분류 평균 침투율
+        similar_products = self.product_profiles[
+            self.product_profiles['질환분류'] == product_profile['질환분류']
+        ]
+        return self._build_market_analysis(
+            target_product, product_data, product_profile, similar_products['시장침투율'].mean()
+        )
+        
+    def _analyze_market_opportunities(self, target_products):
+        """여러 품목의 시장 기회 분석 {품목: analyze_market_opportunity 와 같은 결과, 없는 품목은 None}
+        
+        품목별 거래 행 위치와 질환분류별 평균 침투율을 한 번만 계산해 재사용한다.
+        """
+        product_table = self.product_profiles.set_index('품목군')
+        product_rows = self.data.groupby('품목군', observed=True).indices
+        penetration = {
+            category: self.product_profiles.loc[self.product_profiles['질환분류'] == category, '시장침투율'].mean()
+            for category in self.product_profiles['질환분류'].unique()
+        }
+        
+        analyses = {}
+        for product in target_products:
+            if product not in product_table.index or product not in product_rows:
+                analyses[product] = None
+                continue
+            product_profile = product_table.loc[product]
+            analyses[product] = self._build_market_analysis(
+                product, self.data.iloc[product_rows[product]], product_profile,
+                penetration[product_profile['질환분류']]
+            )
+        return analyses
+        
+    def _build_market_analysis(self, target_product, product_data, product_profile, avg_penetration):
+        """품목 거래 행과 프로필, 동일 질환분류 평균 침투율로 시장 기회 분석 결과 구성"""
         # 현재 상태
         current_customers = product_data['거래처코드'].nunique()
         total_customers = self.customer_profiles.shape[0]
         current_sales = product_data['총매출'].sum()
         
-        # 잠재 시장 크기 계산
-        similar_products = self.product_profiles[
-            self.product_profiles['질환분류'] == product_profile['질환분류']
-        ]
-        avg_penetration = similar_products['시장침투율'].mean()
+        # 잠재 시장 크기
         potential_customers = int(total_customers * avg_penetration)
         
         # 성장 가능성
@@ -617,10 +1553,54 @@ class SmartSalesTargetingEngine:
         
         return ', '.join(strategies) if strategies else "안정적 시장 관리"
         
-    def generate_sales_plan(self, target_product, period_months=3):
-        """영업 계획 생성"""
-        recommendations = self.recommend_targets_for_product(target_product, top_n=20)
-        market_analysis = self.analyze_market_opportunity(target_product)
+    def build_analysis_context(self, target_product, top_n=None):
+        """품목 분석 컨텍스트 생성 (순위 추천 목록 + 시장 분석을 한 번만 계산)
+        
+        추천 순위는 top_n 과 무관하게 같은 순서이므로 top_n 이하의 추천, 영업 계획,
+        내보내기는 모두 이 컨텍스트의 앞부분을 잘라 사용한다.
+        """
+        top_n = max(top_n or 0, self.PLAN_RECOMMENDATION_COUNT)
+        return {
+            'target': target_product,
+            'top_n': top_n,
+            'recommendations': self.recommend_targets_for_product(target_product, top_n=top_n),
+            'market_analysis': self.analyze_market_opportunity(target_product)
+        }
+        
+    def build_analysis_contexts(self, target_products, top_n=None):
+        """여러 품목의 분석 컨텍스트 일괄 생성 {품목: build_analysis_context 와 같은 컨텍스트}
+        
+        추천은 recommend_targets_for_all_products 로 품목 블록 단위 일괄 계산하고,
+        시장 분석도 품목별 거래 행 위치를 한 번만 계산해 재사용한다.
+        """
+        top_n = max(top_n or 0, self.PLAN_RECOMMENDATION_COUNT)
+        recommendations = self.recommend_targets_for_all_products(top_n=top_n, products=target_products)
+        market_analyses = self._analyze_market_opportunities(target_products)
+        return {
+            product: {
+                'target': product,
+                'top_n': top_n,
+                'recommendations': recommendations[product],
+                'market_analysis': market_analyses[product]
+            }
+            for product in target_products
+        }
+        
+    def get_context_recommendations(self, context, top_n):
+        """분석 컨텍스트의 상위 top_n 추천 목록 (컨텍스트보다 큰 top_n 은 허용하지 않음)"""
+        if top_n > context['top_n']:
+            raise ValueError(f"분석 컨텍스트 추천 수({context['top_n']})보다 큰 top_n({top_n})입니다.")
+        if context['recommendations'] is None:
+            return None
+        return context['recommendations'][:top_n]
+        
+    @timed_stage('sales_plan')
+    def generate_sales_plan(self, target_product, period_months=3, context=None):
+        """영업 계획 생성 (context 를 넘기면 추천/시장 분석을 다시 계산하지 않음)"""
+        if context is None:
+            context = self.build_analysis_context(target_product)
+        recommendations = self.get_context_recommendations(context, self.PLAN_RECOMMENDATION_COUNT)
+        market_analysis = context['market_analysis']
         
         if not recommendations or not market_analysis:
             return None
@@ -658,41 +1638,18 @@ class SmartSalesTargetingEngine:
         
         return sales_plan
         
-    def export_recommendations(self, target_product, output_path=None):
-        """추천 결과 내보내기"""
+    @timed_stage('export')
+    def export_recommendations(self, target_product, output_path=None, context=None):
+        """추천 결과 내보내기 (추천 목록, 시장 분석, 영업 계획을 하나의 분석 컨텍스트에서 생성)"""
         if not output_path:
             output_path = f'{target_product}_추천결과.xlsx'
         
         try:
-            recommendations = self.recommend_targets_for_product(target_product, top_n=50)
-            market_analysis = self.analyze_market_opportunity(target_product)
-            sales_plan = self.generate_sales_plan(target_product)
+            sheets = self._build_export_sheets(target_product, context)
             
             with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                # 추천 거래처 목록
-                pd.DataFrame(recommendations).to_excel(
-                    writer, sheet_name='추천거래처', index=False
-                )
-                
-                # 시장 분석
-                pd.DataFrame([market_analysis]).to_excel(
-                    writer, sheet_name='시장분석', index=False
-                )
-                
-                # 영업 계획
-                if sales_plan:
-                    plan_summary = {
-                        '항목': ['품목명', '계획기간', '총타겟거래처', '총예상매출'],
-                        '값': [sales_plan['품목명'], sales_plan['계획기간'], 
-                              sales_plan['총타겟거래처'], sales_plan['총예상매출']]
-                    }
-                    pd.DataFrame(plan_summary).to_excel(
-                        writer, sheet_name='영업계획_요약', index=False
-                    )
-                    
-                    pd.DataFrame(sales_plan['월별계획']).to_excel(
-                        writer, sheet_name='월별계획', index=False
-                    )
+                for sheet_name, sheet in sheets.items():
+                    sheet.to_excel(writer, sheet_name=sheet_name, index=False)
             
             print(f"추천 결과 저장 완료: {output_path}")
             return True
@@ -700,116 +1657,287 @@ class SmartSalesTargetingEngine:
         except Exception as e:
             print(f"파일 저장 실패: {e}")
             return False
-
+            
+    def _build_export_sheets(self, target_product, context=None):
+        """내보내기 시트 구성 {시트명: DataFrame} (추천거래처, 시장분석, 영업계획_요약, 월별계획)"""
+        if context is None:
+            context = self.build_analysis_context(target_product, top_n=self.EXPORT_RECOMMENDATION_COUNT)
+        recommendations = self.get_context_recommendations(context, self.EXPORT_RECOMMENDATION_COUNT)
+        market_analysis = context['market_analysis']
+        if recommendations is None or market_analysis is None:
+            raise ValueError(f"품목 '{target_product}'을 찾을 수 없습니다.")
+        sales_plan = self.generate_sales_plan(target_product, context=context)
+        
+        # 추천 거래처 목록 / 시장 분석
+        sheets = {
+            '추천거래처': pd.DataFrame(recommendations),
+            '시장분석': pd.DataFrame([market_analysis])
+        }
+        
+        # 영업 계획
+        if sales_plan:
+            sheets['영업계획_요약'] = pd.DataFrame({
+                '항목': ['품목명', '계획기간', '총타겟거래처', '총예상매출'],
+                '값': [sales_plan['품목명'], sales_plan['계획기간'],
+                      sales_plan['총타겟거래처'], sales_plan['총예상매출']]
+            })
+            sheets['월별계획'] = pd.DataFrame(sales_plan['월별계획'])
+        
+        return sheets
+        
+    @timed_stage('export_all')
+    def export_all_recommendations(self, output_dir, products=None, workers=None, consolidated=None):
+        """여러 품목의 추천 결과를 계산하여 품목별 엑셀로 내보내기
+        
+        추천과 시장 분석은 build_analysis_contexts 로 품목 블록 단위 벡터화 일괄 계산하고
+        (모델 예측은 블록당 1회), workers 개 스레드에는 영업 계획 조합과 엑셀 저장만 맡긴다.
+        엑셀은 openpyxl write-only 모드로 스트리밍 기록한다. consolidated 에 'parquet' 또는
+        'xlsx' 를 지정하면 전체 추천 거래처를 품목 순서대로 하나의 파일에 이어 쓴다.
+        
+        반환값의 'failed' 는 실패한 품목 목록, 'errors' 는 품목별 예외다.
+        일괄 계산 자체가 실패하면 모든 품목이 같은 예외로 실패 처리된다.
+        """
+        if products is None:
+            products = self.product_profiles['품목군'].tolist()
+        if consolidated not in (None, 'parquet', 'xlsx'):
+            print(f"지원하지 않는 통합 파일 형식: {consolidated}")
+            return None
+        workers = workers or os.cpu_count() or 1
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"{len(products)}개 품목 추천 결과 일괄 내보내기 중... (작업자 {workers}개)")
+        
+        exported, failed, errors = [], [], {}
+        try:
+            contexts = self.build_analysis_contexts(products, top_n=self.EXPORT_RECOMMENDATION_COUNT)
+        except Exception as e:
+            print(f"추천 일괄 계산 실패: {e!r}")
+            errors = {product: e for product in products}
+            print(f"일괄 내보내기 완료: 0개 성공, {len(products)}개 실패")
+            return {'exported': exported, 'failed': list(products), 'errors': errors, 'consolidated_path': None}
+        
+        consolidated_path = None
+        consolidated_writer = None
+        if consolidated is not None:
+            consolidated_path = os.path.join(output_dir, f'전체_추천결과.{consolidated}')
+            consolidated_writer = _ConsolidatedRecommendationWriter(consolidated_path, consolidated)
+        
+        # 작업자 스레드의 단계 기록을 export_all 아래에 두기 위해 현재 단계 경로를 전달
+        parent_stage = self.metrics.current_path()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(self._export_product_workbook, product, output_dir, contexts[product], parent_stage)
+                    for product in products
+                ]
+                # 제출 순서대로 결과를 받으므로 통합 파일도 품목 순서를 유지한다
+                for product, future in zip(products, futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"'{product}' 내보내기 실패: {e!r}")
+                        failed.append(product)
+                        errors[product] = e
+                        continue
+                    
+                    exported.append(result['path'])
+                    if consolidated_writer is not None:
+                        consolidated_writer.write(product, result['recommendations'])
+        finally:
+            if consolidated_writer is not None:
+                consolidated_writer.close()
+        
+        print(f"일괄 내보내기 완료: {len(exported)}개 성공, {len(failed)}개 실패")
+        return {'exported': exported, 'failed': failed, 'errors': errors, 'consolidated_path': consolidated_path}
+        
+    def _export_product_workbook(self, target_product, output_dir, context, parent_stage=None):
+        """계산된 분석 컨텍스트로 품목 1개의 시트를 구성해 write-only 워크북으로 저장 (실패 시 예외를 그대로 전파)"""
+        with self.metrics.under(parent_stage):
+            sheets = self._build_export_sheets(target_product, context)
+        safe_name = re.sub(r'[\\/:*?"<>|]', '_', str(target_product))
+        path = os.path.join(output_dir, f'{safe_name}_추천결과.xlsx')
+        
+        workbook = Workbook(write_only=True)
+        for sheet_name, sheet in sheets.items():
+            _append_frame_rows(workbook.create_sheet(sheet_name), sheet)
+        workbook.save(path)
+        return {'path': path, 'recommendations': sheets['추천거래처']}
+            
+    @timed_stage('score_product_group')
     def recommend_targets_for_product_group(self, target_product_group, top_n=10, exclude_existing=True):
         """품목군에 대한 타겟 거래처 추천"""
         print(f"'{target_product_group}' 품목군 타겟 거래처 추천 중...")
         
+        cache_key = ('product_group', target_product_group, top_n, exclude_existing, self.data_fingerprint)
+        cached = self._get_cached_recommendations(cache_key)
+        if cached is not None:
+            print(f"캐시된 추천 {len(cached)}개 반환")
+            return cached
+        
         if target_product_group not in self.data['품목군'].values:
             print(f"'{target_product_group}' 품목군을 찾을 수 없습니다.")
             return []
         
-        # 해당 품목군 데이터
-        product_group_data = self.data[self.data['품목군'] == target_product_group]
+        scores = self._score_product_groups([target_product_group])
+        recommendations, candidate_count = self._rank_group_candidates(
+            scores, 0, target_product_group, top_n, exclude_existing
+        )
         
-        # 질환분류 추정 (품목군의 대표 품목으로)
-        representative_product = product_group_data['품목명'].iloc[0]
-        disease_category = self._infer_disease_category(representative_product)
+        print(f"총 {candidate_count}개 추천 거래처 발견")
+        self._store_cached_recommendations(cache_key, recommendations)
+        return recommendations
+        
+    @timed_stage('score_all_product_groups')
+    def recommend_targets_for_all_product_groups(self, top_n=10, exclude_existing=True, product_groups=None):
+        """전체(또는 지정한) 품목군의 타겟 거래처 추천을 한 번에 계산
+        
+        거래처 x 품목군 점수를 품목군 블록 단위로 일괄 계산하며,
+        반환값은 {품목군: recommend_targets_for_product_group 과 같은 추천 목록} 이다.
+        캐시에 있는 품목군은 다시 계산하지 않으며, 계산한 결과는 캐시에 저장한다.
+        """
+        if product_groups is None:
+            product_groups = self.data['품목군'].dropna().unique()
+        print(f"{len(product_groups)}개 품목군 타겟 거래처 일괄 추천 중...")
+        
+        available_groups = set(self.data['품목군'].dropna().unique())
+        results = {group: [] for group in product_groups}
+        known_groups = []
+        cached_count = 0
+        for group in results:
+            if group not in available_groups:
+                continue
+            cached = self._get_cached_recommendations(
+                ('product_group', group, top_n, exclude_existing, self.data_fingerprint)
+            )
+            if cached is None:
+                known_groups.append(group)
+            else:
+                results[group] = cached
+                cached_count += 1
+        
+        block_size = max(1, EngineConstants.SIMILARITY_BLOCK_ELEMENTS // max(1, len(self.customer_profiles)))
+        for start in range(0, len(known_groups), block_size):
+            block_groups = known_groups[start:start + block_size]
+            scores = self._score_product_groups(block_groups)
+            for column, group in enumerate(block_groups):
+                results[group], _ = self._rank_group_candidates(scores, column, group, top_n, exclude_existing)
+                self._store_cached_recommendations(
+                    ('product_group', group, top_n, exclude_existing, self.data_fingerprint), results[group]
+                )
         
-        recommendations = []
+        print(f"일괄 추천 완료: {len(known_groups)}개 품목군 계산, 캐시 {cached_count}개")
+        return results
+        
+    def _score_product_groups(self, product_groups):
+        """거래처 x 품목군 추천 점수 일괄 계산 (customer_profiles 행 x product_groups 열)
+        
+        진료과 매칭, 유사도, 성공확률, 예상매출, 정렬 점수를 모두 행렬로 반환한다.
+        """
+        group_data = self.data[self.data['품목군'].isin(product_groups)]
+        group_index = pd.Index(product_groups)
+        
+        # 구매 여부 (거래처 x 품목군)
+        pairs = group_data[['거래처코드', '품목군']].drop_duplicates()
+        rows = self._lookup_positions(self.profile_index, pairs['거래처코드'])
+        columns = self._lookup_positions(group_index, pairs['품목군'])
+        valid = (rows >= 0) & (columns >= 0)
+        purchased = np.zeros((len(self.profile_index), len(group_index)), dtype=bool)
+        purchased[rows[valid], columns[valid]] = True
+        
+        # 유사도 점수: 구매 고객 특성 합과의 행렬곱 (구매 고객 자신은 제외)
+        buyer_sums = purchased.T.astype(float) @ self.profile_features
+        similarity_sum = self.profile_features @ buyer_sums.T
+        self_similarity = np.einsum('ij,ij->i', self.profile_features, self.profile_features)
+        similarity_sum = np.where(purchased, similarity_sum - self_similarity[:, None], similarity_sum)
+        compared = purchased.sum(axis=0)[None, :] - purchased.astype(int)
+        similarity = np.where(compared > 0, similarity_sum / np.maximum(compared, 1), 0.5)
+        
+        # 진료과 매칭 점수 (품목군 대표 품목 질환분류 x 거래처 진료과)
+        representative_products = group_data.drop_duplicates('품목군').set_index('품목군')['품목명']
+        disease_categories = representative_products.reindex(group_index).map(self._infer_disease_category)
+        clinic_specialties = self.customer_profiles['거래처명'].map(self._extract_clinic_specialty)
+        specialty_codes, specialties = pd.factorize(clinic_specialties)
+        specialty_table = np.array([
+            [self._calculate_specialty_match_score(category, specialty) for specialty in specialties]
+            for category in disease_categories
+        ], dtype=float).reshape(len(group_index), len(specialties))
+        specialty_match = specialty_table[:, specialty_codes].T
+        
+        # 성공 확률 및 예상 매출
+        growth = self.customer_profiles['성장률'].to_numpy(dtype=float)[:, None]
+        success_prob = np.clip(similarity * 0.4 + specialty_match * 0.3 + growth / 100 * 0.3, 0.1, 0.98)
+        scale_encoded = self.customer_profiles['거래처규모'].map(self.SCALE_ENCODING).fillna(1).to_numpy(dtype=float)[:, None]
+        base_sales = group_data.groupby('품목군', observed=True)['총매출'].mean().reindex(group_index).to_numpy(dtype=float)[None, :]
+        expected_sales = base_sales * success_prob * (scale_encoded + 1) / 2
+        
+        # 진료과 매칭 점수와 성공확률을 종합한 정렬 점수 (출력 반올림 값 기준)
+        sort_key = np.round(specialty_match, 1) * 0.4 + np.round(success_prob * 100, 1) / 100 * 0.6
+        
+        return {
+            'purchased': purchased,
+            'similarity': similarity,
+            'specialty_match': specialty_match,
+            'clinic_specialty': clinic_specialties.to_numpy(),
+            'success_prob': success_prob,
+            'expected_sales': expected_sales,
+            'sort_key': sort_key
+        }
         
-        for _, customer in self.customer_profiles.iterrows():
-            customer_code = customer['거래처코드']
-            
-            # 기존 구매 여부 확인
-            has_purchased = customer_code in product_group_data['거래처코드'].values
-            if exclude_existing and has_purchased:
-                continue
-            
-            # 진료과 매칭 점수
-            clinic_specialty = self._extract_clinic_specialty(customer['거래처명'])
-            specialty_match_score = self._calculate_specialty_match_score(disease_category, clinic_specialty)
-            
-            # 유사도 점수 계산
-            similarity_score = self._calculate_similarity_score_for_group(customer_code, target_product_group)
-            
-            # 성공 확률 예측
-            success_prob = min(0.98, max(0.1, 
-                (similarity_score * 0.4 + specialty_match_score * 0.3 + customer['성장률']/100 * 0.3)))
-            
-            # 거래처규모 인코딩
-            scale_encoding = {'Micro': 1, 'Small': 2, 'Medium': 3, 'Large': 4}
-            scale_encoded = scale_encoding.get(customer['거래처규모'], 1)
-            
-            # 예상 매출 계산
-            base_sales = product_group_data['총매출'].mean()
-            expected_sales = int(base_sales * success_prob * (scale_encoded + 1) / 2)
+    def _rank_group_candidates(self, scores, column, target_product_group, top_n, exclude_existing):
+        """품목군 점수 행렬의 한 열에서 상위 top_n 추천 목록 생성 (추천 목록, 후보 거래처 수)"""
+        if exclude_existing:
+            candidates = np.flatnonzero(~scores['purchased'][:, column])
+        else:
+            candidates = np.arange(len(self.customer_profiles))
+        
+        top_positions = candidates[self._select_top_positions(scores['sort_key'][candidates, column], top_n)]
+        
+        recommendations = []
+        for position in top_positions:
+            customer = self.customer_profiles.iloc[position]
+            success_prob = scores['success_prob'][position, column]
+            specialty_match_score = float(scores['specialty_match'][position, column])
             
-            recommendation = {
-                '거래처코드': customer_code,
+            recommendations.append({
+                '거래처코드': customer['거래처코드'],
                 '거래처명': customer['거래처명'],
-                '유사도점수': round(similarity_score, 3),
+                '유사도점수': round(scores['similarity'][position, column], 3),
                 '성공확률': round(success_prob * 100, 1),
-                '예상매출': expected_sales,
-                '진료과': clinic_specialty,
+                '예상매출': int(scores['expected_sales'][position, column]),
+                '진료과': scores['clinic_specialty'][position],
                 '진료과매칭점수': round(specialty_match_score, 1),
                 '시설유형': customer.get('시설유형', 'Unknown'),
                 '거래처규모': customer.get('거래처규모', 'Unknown'),
                 '추천이유': self._generate_recommendation_reason_for_group(customer, target_product_group, success_prob, specialty_match_score)
-            }
-            
-            recommendations.append(recommendation)
+            })
         
-        # 진료과 매칭 점수와 성공확률을 종합한 정렬
-        recommendations.sort(key=lambda x: (x['진료과매칭점수'] * 0.4 + x['성공확률']/100 * 0.6), reverse=True)
+        return recommendations, len(candidates)
         
-        print(f"총 {len(recommendations)}개 추천 거래처 발견")
-        return recommendations[:top_n]
-    
     def _calculate_similarity_score_for_group(self, customer_code, target_product_group):
         """품목군에 대한 고객 유사도 점수 계산"""
-        customer_idx = self.customer_profiles[
-            self.customer_profiles['거래처코드'] == customer_code
-        ].index[0]
-        
-        # 같은 품목군을 구매한 유사 고객들 찾기
-        group_customers = self.data[self.data['품목군'] == target_product_group]['거래처코드'].unique()
-        similar_customers = []
-        
-        for other_customer in group_customers:
-            if other_customer != customer_code:
-                try:
-                    other_idx = self.customer_profiles[
-                        self.customer_profiles['거래처코드'] == other_customer
-                    ].index[0]
-                    similar_customers.append(other_idx)
-                except:
-                    continue
+        customer_idx = self.profile_index.get_loc(customer_code)
+        return self._calculate_similarity_scores_for_group(target_product_group)[customer_idx]
         
-        if not similar_customers:
-            return 0.5
+    def _calculate_similarity_scores_for_group(self, target_product_group):
+        """전체 거래처의 품목군 구매 고객 대비 평균 코사인 유사도 (customer_profiles 행 순서)
         
-        # 거래처규모를 숫자로 인코딩
-        scale_encoding = {'Micro': 1, 'Small': 2, 'Medium': 3, 'Large': 4}
-        customer_profiles_with_encoding = self.customer_profiles.copy()
-        customer_profiles_with_encoding['거래처규모_encoded'] = customer_profiles_with_encoding['거래처규모'].map(scale_encoding)
+        정규화된 특성 행렬과 구매 고객 특성 합의 행렬곱 한 번으로 계산하며,
+        구매 고객 자신은 비교 대상에서 제외한다. 비교 대상이 없으면 0.5.
+        """
+        group_customers = self.data.loc[self.data['품목군'] == target_product_group, '거래처코드'].unique()
+        buyers = self.profile_index.get_indexer(group_customers)
+        buyers = buyers[buyers >= 0]
         
-        # 유사도 계산
-        customer_features = customer_profiles_with_encoding.iloc[customer_idx][
-            ['총매출', '품목수', '성장률', '최근활동성', '거래처규모_encoded']
-        ].values.reshape(1, -1)
+        is_buyer = np.zeros(len(self.profile_index), dtype=bool)
+        is_buyer[buyers] = True
         
-        score = 0
-        for sim_idx in similar_customers:
-            sim_features = customer_profiles_with_encoding.iloc[sim_idx][
-                ['총매출', '품목수', '성장률', '최근활동성', '거래처규모_encoded']
-            ].values.reshape(1, -1)
-            
-            similarity = cosine_similarity(customer_features, sim_features)[0][0]
-            score += similarity
+        similarity_sum = self.profile_features @ self.profile_features[buyers].sum(axis=0)
+        self_similarity = np.einsum('ij,ij->i', self.profile_features, self.profile_features)
+        similarity_sum = np.where(is_buyer, similarity_sum - self_similarity, similarity_sum)
+        compared = len(buyers) - is_buyer.astype(int)
         
-        return score / len(similar_customers)
-    
+        return np.where(compared > 0, similarity_sum / np.maximum(compared, 1), 0.5)
+        
+    @timed_stage('market_analysis_by_group')
     def analyze_market_opportunity_by_group(self, target_product_group):
         """품목군 시장 기회 분석"""
         print(f"'{target_product_group}' 품목군 시장 기회 분석 중...")
@@ -831,11 +1959,9 @@ class SmartSalesTargetingEngine:
         # 품목군 내 품목 수
         products_in_group = product_group_data['품목명'].nunique()
         
-        # 잠재 시장 크기 계산 (같은 질환분류의 다른 품목군 기준)
-        same_category_data = self.data[
-            self.data['품목명'].apply(self._infer_disease_category) == disease_category
-        ]
-        avg_penetration = same_category_data.groupby('품목군')['거래처코드'].nunique().mean() / total_customers
+        # 잠재 시장 크기 계산 (같은 질환분류의 다른 품목군 기준, 전처리 시 저장한 질환분류 컬럼 사용)
+        same_category_data = self.data[self.data['질환분류'] == disease_category]
+        avg_penetration = same_category_data.groupby('품목군', observed=True)['거래처코드'].nunique().mean() / total_customers
         potential_customers = int(total_customers * avg_penetration)
         
         # 성장 가능성
@@ -892,10 +2018,23 @@ class SmartSalesTargetingEngine:
         
         return ', '.join(strategies) if strategies else "안정적 시장 관리"
     
-    def generate_sales_plan_by_group(self, target_product_group, period_months=3):
-        """품목군 영업 계획 생성"""
-        recommendations = self.recommend_targets_for_product_group(target_product_group, top_n=20)
-        market_analysis = self.analyze_market_opportunity_by_group(target_product_group)
+    def build_group_analysis_context(self, target_product_group, top_n=None):
+        """품목군 분석 컨텍스트 생성 (build_analysis_context 의 품목군 버전)"""
+        top_n = max(top_n or 0, self.PLAN_RECOMMENDATION_COUNT)
+        return {
+            'target': target_product_group,
+            'top_n': top_n,
+            'recommendations': self.recommend_targets_for_product_group(target_product_group, top_n=top_n),
+            'market_analysis': self.analyze_market_opportunity_by_group(target_product_group)
+        }
+    
+    @timed_stage('sales_plan_by_group')
+    def generate_sales_plan_by_group(self, target_product_group, period_months=3, context=None):
+        """품목군 영업 계획 생성 (context 를 넘기면 추천/시장 분석을 다시 계산하지 않음)"""
+        if context is None:
+            context = self.build_group_analysis_context(target_product_group)
+        recommendations = self.get_context_recommendations(context, self.PLAN_RECOMMENDATION_COUNT)
+        market_analysis = context['market_analysis']
         
         if not recommendations or not market_analysis:
             return None
@@ -962,6 +2101,67 @@ class SmartSalesTargetingEngine:
         return ', '.join(reasons) if reasons else "표준 추천"
 
 
+def _append_frame_rows(worksheet, frame):
+    """write-only 워크시트에 DataFrame 헤더와 행을 순서대로 추가"""
+    worksheet.append([str(col) for col in frame.columns])
+    for row in frame.itertuples(index=False):
+        worksheet.append(_excel_row(row))
+
+
+def _excel_row(row):
+    """openpyxl 이 기록할 수 있는 값으로 변환 (목록은 문자열, numpy 스칼라는 파이썬 값, 결측은 빈 셀)"""
+    values = []
+    for value in row:
+        if isinstance(value, (list, tuple, dict, set)):
+            value = str(value)
+        elif isinstance(value, np.generic):
+            value = value.item()
+        values.append(None if not isinstance(value, str) and pd.isna(value) else value)
+    return values
+
+
+class _ConsolidatedRecommendationWriter:
+    """품목별 추천 거래처를 하나의 parquet / xlsx 파일에 순차 기록 (메모리는 품목 1개분)"""
+    
+    def __init__(self, path, file_format):
+        self.path = path
+        self.file_format = file_format
+        self._columns = None
+        self._parquet_writer = None
+        self._workbook = None
+        self._worksheet = None
+        if file_format == 'xlsx':
+            self._workbook = Workbook(write_only=True)
+            self._worksheet = self._workbook.create_sheet('추천거래처')
+    
+    def write(self, product, recommendations):
+        if recommendations is None or len(recommendations) == 0:
+            return
+        frame = recommendations.copy()
+        frame.insert(0, '품목군', product)
+        
+        if self._columns is None:
+            self._columns = list(frame.columns)
+            if self._worksheet is not None:
+                self._worksheet.append(self._columns)
+        frame = frame.reindex(columns=self._columns)
+        
+        if self.file_format == 'parquet':
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+        else:
+            for row in frame.itertuples(index=False):
+                self._worksheet.append(_excel_row(row))
+    
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._workbook is not None:
+            self._workbook.save(self.path)
+
+
 # 사용 예시
 if __name__ == "__main__":
     import pandas as pd
@@ -976,13 +2176,16 @@ if __name__ == "__main__":
     print("스마트 세일즈 타겟팅 엔진 초기화 중...")
     engine = SmartSalesTargetingEngine()
     
-    # 데이터 로드
+    # 데이터 로드 (입력 데이터가 그대로면 저장된 아티팩트로 학습 생략)
+    ARTIFACT_DIR = 'engine_artifacts'
     try:
         print("데이터 로딩 중...")
         df = pd.read_csv('rx-rawdata.csv', encoding='utf-8')
-        engine.load_and_prepare_data(df)
-        print("예측 모델 구축 중...")
-        engine.build_predictive_models()
+        if not engine.load_artifacts(ARTIFACT_DIR, expected_fingerprint=engine.compute_data_fingerprint(df)):
+            engine.load_and_prepare_data(df)
+            print("예측 모델 구축 중...")
+            engine.build_predictive_models()
+            engine.save_artifacts(ARTIFACT_DIR)
         print("스마트 세일즈 타겟팅 엔진 준비 완료!")
     except Exception as e:
         print(f"초기화 오류: {e}")
@@ -1085,7 +2288,8 @@ if __name__ == "__main__":
         """서버 상태 확인"""
         return jsonify({
             'status': 'healthy',
-            'message': 'SmartSalesTargetingEngine API 서버가 정상 동작 중입니다.'
+            'message': 'SmartSalesTargetingEngine API 서버가 정상 동작 중입니다.',
+            'recommendation_cache': engine.get_cache_stats()
         })
     
     # 서버 실행
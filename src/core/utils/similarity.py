@@ -0,0 +1,60 @@
+"""
+희소 행렬 행 간 코사인 유사도 유틸리티 모듈
+행 블록 단위로만 dense 유사도를 만들어 행별 상위 k 이웃(자기 자신 제외)을 찾습니다.
+메모리는 행 수² 대신 nnz 와 행 수 * k 에 비례합니다.
+"""
+
+import numpy as np
+from sklearn.preprocessing import normalize
+
+from ..config.constants import EngineConstants
+
+
+def similarity_blocks(matrix, rows=None, block_elements=None):
+    """rows 의 행과 전체 행 간 코사인 유사도를 (블록 행 번호, dense 블록) 단위로 생성
+
+    블록 하나의 원소 수는 block_elements (기본값 EngineConstants.SIMILARITY_BLOCK_ELEMENTS) 이하이며,
+    블록에서 자기 자신과의 유사도는 -inf 로 채워 이웃에서 제외합니다.
+    """
+    n_rows = matrix.shape[0]
+    rows = np.arange(n_rows) if rows is None else np.asarray(rows)
+    block_elements = block_elements or EngineConstants.SIMILARITY_BLOCK_ELEMENTS
+    block_size = max(1, block_elements // max(1, n_rows))
+
+    unit_rows = normalize(matrix, norm='l2', axis=1)
+    unit_rows_t = unit_rows.T.tocsr()
+    for start in range(0, len(rows), block_size):
+        block_rows = rows[start:start + block_size]
+        block = (unit_rows[block_rows] @ unit_rows_t).toarray()
+        block[np.arange(len(block_rows)), block_rows] = -np.inf
+        yield block_rows, block
+
+
+def top_k_columns(block, k):
+    """dense 블록의 행별 상위 k 열 번호와 값 (값 내림차순, argpartition 선택 후 정렬)"""
+    top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+    top_weights = np.take_along_axis(block, top, axis=1)
+    order = np.argsort(-top_weights, axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_weights, order, axis=1)
+
+
+def top_k_similar_rows(matrix, k, rows=None, block_elements=None):
+    """행별 코사인 유사도 상위 k 이웃(자기 자신 제외)의 행 번호와 유사도
+
+    rows 를 지정하면 해당 행들의 이웃만 계산합니다. k 는 (행 수 - 1) 로 제한됩니다.
+    """
+    n_rows = matrix.shape[0]
+    rows = np.arange(n_rows) if rows is None else np.asarray(rows)
+    k = max(0, min(k, n_rows - 1))
+    indices = np.zeros((len(rows), k), dtype=np.int32)
+    weights = np.zeros((len(rows), k), dtype=np.float64)
+    if k == 0 or len(rows) == 0:
+        return indices, weights
+
+    start = 0
+    for block_rows, block in similarity_blocks(matrix, rows, block_elements):
+        stop = start + len(block_rows)
+        indices[start:stop], weights[start:stop] = top_k_columns(block, k)
+        start = stop
+
+    return indices, weights
@@ -0,0 +1,94 @@
+"""
+분석 단계 의존 그래프 모듈
+단계별 계산 함수와 선행 단계를 등록해 두면 결과가 필요할 때만(지연) 계산하고
+결과를 캐시합니다. 데이터가 바뀌면 invalidate() 로 해당 단계와 후속 단계 캐시를 지웁니다.
+"""
+
+import time
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+
+class StageGraph:
+    """지연 계산 / 결과 캐시 단계 그래프
+
+    get(name) 은 선행 단계를 먼저 확보한 뒤 해당 단계를 계산하므로, 기록되는 계산 시간은
+    선행 단계를 제외한 단계 자체의 시간입니다. 선행 단계는 먼저 등록된 단계만 지정할 수 있어
+    순환이 생기지 않습니다.
+    """
+
+    def __init__(self):
+        self._stages = {}
+        self._results = {}
+        self._stats = {}
+        self._lock = threading.RLock()
+
+    def add_stage(self, name, compute, dependencies=()):
+        """단계 등록 (compute 는 인자 없이 호출되어 결과를 반환)"""
+        unknown = [dependency for dependency in dependencies if dependency not in self._stages]
+        if unknown:
+            raise ValueError(f"등록되지 않은 선행 단계: {unknown}")
+        self._stages[name] = {'compute': compute, 'dependencies': list(dependencies)}
+        self._stats[name] = {'계산횟수': 0, '캐시사용횟수': 0, '최근계산시간': None, '최근계산일시': None}
+
+    def get(self, name):
+        """단계 결과 반환 (캐시에 없으면 선행 단계부터 계산)"""
+        with self._lock:
+            if name in self._results:
+                self._stats[name]['캐시사용횟수'] += 1
+                return self._results[name]
+
+            stage = self._stages[name]
+            for dependency in stage['dependencies']:
+                self.get(dependency)
+
+            started = time.perf_counter()
+            result = stage['compute']()
+            self._record(name, time.perf_counter() - started)
+            self._results[name] = result
+            return result
+
+    def set(self, name, result, elapsed=None):
+        """외부에서 계산한 결과를 단계 결과로 저장 (후속 단계 캐시는 무효화)"""
+        with self._lock:
+            self.invalidate(name)
+            if elapsed is not None:
+                self._record(name, elapsed)
+            self._results[name] = result
+
+    def invalidate(self, name=None):
+        """단계와 그 후속 단계의 캐시 삭제 (name 이 None 이면 전체)"""
+        with self._lock:
+            stages = self._stages if name is None else [name] + self.dependents(name)
+            for stage in stages:
+                self._results.pop(stage, None)
+
+    def dependents(self, name):
+        """name 에 (직간접적으로) 의존하는 후속 단계 목록 (등록 순서)"""
+        affected = {name}
+        dependents = []
+        for stage, spec in self._stages.items():
+            if any(dependency in affected for dependency in spec['dependencies']):
+                affected.add(stage)
+                dependents.append(stage)
+        return dependents
+
+    def is_cached(self, name):
+        return name in self._results
+
+    def status(self):
+        """단계별 선행 단계 / 캐시 여부 / 계산 횟수 / 캐시 사용 횟수 / 최근 계산 시간(초)"""
+        with self._lock:
+            return pd.DataFrame([
+                {'단계': name, '선행단계': ', '.join(spec['dependencies']),
+                 '캐시됨': name in self._results, **self._stats[name]}
+                for name, spec in self._stages.items()
+            ])
+
+    def _record(self, name, elapsed):
+        stats = self._stats[name]
+        stats['계산횟수'] += 1
+        stats['최근계산시간'] = round(elapsed, 6)
+        stats['최근계산일시'] = datetime.now().isoformat()
@@ -0,0 +1,175 @@
+"""
+엔진 단계별 실행 계측 모듈
+단계(프로필 생성, 행렬 구축, 모델 학습, 추천 계산, 내보내기)마다
+경과 시간, CPU 시간, 최대 메모리(tracemalloc), 처리 행 수를 기록합니다.
+"""
+
+import json
+import time
+import threading
+import functools
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+
+class StageMetrics:
+    """단계별 계측 기록 저장소
+
+    stage() 컨텍스트 매니저로 감싼 구간마다 기록 1건을 남기며, log_path 를 지정하면
+    기록을 JSON lines 로 즉시 추가 기록합니다. 단계는 중첩될 수 있고 (이름은
+    '상위/하위' 경로로 기록), 진행 중인 단계 스택은 스레드별로 관리합니다. 작업자 스레드의
+    단계를 호출 스레드의 단계 아래에 기록하려면 current_path() 로 얻은 경로를 작업자에
+    넘겨 under(path) 안에서 실행합니다.
+
+    최대 메모리는 tracemalloc 기준 단계 시작 대비 증가량입니다. tracemalloc 은 프로세스
+    전역이므로 다른 스레드의 단계(자신의 상위 단계 제외)와 겹쳐 실행된 단계는 메모리를
+    측정하지 않고 None 으로 기록합니다. tracemalloc 은 실행 시간을 2~3배 늘리므로 track_memory=True 일 때만 측정합니다.
+    """
+
+    def __init__(self, log_path=None, track_memory=False):
+        self.log_path = log_path
+        self.track_memory = track_memory
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open_frames = []
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """단계 계측 컨텍스트. yield 되는 기록의 'rows' 는 단계 안에서 갱신할 수 있음"""
+        stack = self._stack()
+        parent = stack[-1]['record']['stage'] if stack else getattr(self._local, 'parent', None)
+        record = {
+            'stage': f'{parent}/{name}' if parent else name,
+            'rows': rows,
+            'started_at': datetime.now().isoformat()
+        }
+        frame = {'record': record, 'thread': threading.get_ident(), 'overlapped': False, 'peak': 0}
+
+        with self._lock:
+            # 상위 단계: 같은 스레드의 스택 top, 없으면 under() 로 넘겨받은 경로의 진행 중인 단계
+            frame['parent'] = stack[-1] if stack else next(
+                (other for other in reversed(self._open_frames) if other['record']['stage'] == parent), None
+            )
+            ancestors = []
+            ancestor = frame['parent']
+            while ancestor is not None:
+                ancestors.append(ancestor)
+                ancestor = ancestor['parent']
+            # 상위 단계가 아닌 다른 스레드의 단계와 겹치면 양쪽 모두 메모리 측정 불가로 표시
+            others = [
+                other for other in self._open_frames
+                if other['thread'] != frame['thread'] and not any(other is ancestor for ancestor in ancestors)
+            ]
+            if others:
+                frame['overlapped'] = True
+                for other in others:
+                    other['overlapped'] = True
+
+            if self.track_memory:
+                if not self._open_frames and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._started_tracing = True
+                if not frame['overlapped'] and tracemalloc.is_tracing():
+                    current, peak = tracemalloc.get_traced_memory()
+                    if frame['parent'] is not None:
+                        frame['parent']['peak'] = max(frame['parent']['peak'], peak)
+                    tracemalloc.reset_peak()
+                    frame['start_memory'] = current
+            self._open_frames.append(frame)
+
+        stack.append(frame)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_seconds'] = round(time.process_time() - cpu_start, 6)
+            stack.pop()
+
+            with self._lock:
+                self._open_frames = [other for other in self._open_frames if other is not frame]
+                record['peak_memory_mb'] = None
+                if 'start_memory' in frame and not frame['overlapped'] and tracemalloc.is_tracing():
+                    _, peak = tracemalloc.get_traced_memory()
+                    peak = max(frame['peak'], peak)
+                    record['peak_memory_mb'] = round(max(0, peak - frame['start_memory']) / 1024 / 1024, 3)
+                    if frame['parent'] is not None:
+                        frame['parent']['peak'] = max(frame['parent']['peak'], peak)
+                if self._started_tracing and not self._open_frames:
+                    tracemalloc.stop()
+                    self._started_tracing = False
+
+            self._append(record)
+
+    def current_path(self):
+        """현재 스레드에서 진행 중인 단계 경로 (없으면 None). 작업자 스레드에 under() 로 전달"""
+        stack = self._stack()
+        return stack[-1]['record']['stage'] if stack else getattr(self._local, 'parent', None)
+
+    @contextmanager
+    def under(self, parent):
+        """현재 스레드의 최상위 단계를 parent 경로 아래에 기록 (작업자 스레드용)"""
+        previous = getattr(self._local, 'parent', None)
+        self._local.parent = parent
+        try:
+            yield
+        finally:
+            self._local.parent = previous
+
+    def _stack(self):
+        """스레드별 진행 중인 단계 스택"""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _append(self, record):
+        with self._lock:
+            self.records.append(record)
+            if self.log_path:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+    def to_frame(self):
+        """기록을 DataFrame 으로 반환"""
+        with self._lock:
+            return pd.DataFrame(self.records)
+
+    def summary(self):
+        """단계별 호출 수 / 총 경과 시간 / 총 CPU 시간 / 최대 메모리 요약 (경과 시간 내림차순)"""
+        frame = self.to_frame()
+        if frame.empty:
+            return frame
+        return (
+            frame.groupby('stage')
+            .agg(호출수=('stage', 'size'),
+                 경과시간=('wall_seconds', 'sum'),
+                 CPU시간=('cpu_seconds', 'sum'),
+                 최대메모리MB=('peak_memory_mb', 'max'),
+                 최대행수=('rows', 'max'))
+            .sort_values('경과시간', ascending=False)
+        )
+
+    def clear(self):
+        with self._lock:
+            self.records = []
+
+
+def timed_stage(name):
+    """엔진 메서드를 self.metrics 의 단계로 계측하는 데코레이터 (행 수는 종료 시점의 self.data 기준)"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.stage(name) as record:
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    if record['rows'] is None and getattr(self, 'data', None) is not None:
+                        record['rows'] = len(self.data)
+        return wrapper
+    return decorator
@@ -79,7 +79,10 @@ class SalesAIApplication:
         # 모든 엔진에 데이터 설정
         for engine_name, engine in self.engines.items():
             if engine:
-                if hasattr(engine, 'data'):
+                if hasattr(engine, 'set_data'):
+                    # 단계 캐시를 가진 엔진은 데이터 교체 시 캐시 무효화
+                    engine.set_data(data)
+                elif hasattr(engine, 'data'):
                     engine.data = data
                 elif hasattr(engine, 'load_data'):
                     # CSV 파일 경로로 로드하는 엔진
@@ -103,10 +106,11 @@ class SalesAIApplication:
             engine.load_and_prepare_data(engine.data)
             engine.build_predictive_models()
             
-            # 추천 생성
-            recommendations = engine.recommend_targets_for_product(product, top_n)
-            market_analysis = engine.analyze_market_opportunity(product)
-            sales_plan = engine.generate_sales_plan(product)
+            # 추천 생성 (추천 목록 / 시장 분석은 분석 컨텍스트에서 한 번만 계산)
+            context = engine.build_analysis_context(product, top_n)
+            recommendations = engine.get_context_recommendations(context, top_n)
+            market_analysis = context['market_analysis']
+            sales_plan = engine.generate_sales_plan(product, context=context)
             
             result = {
                 'product': product,
@@ -0,0 +1,149 @@
+"""
+SalesRecommendationEngine 테스트
+main.py 처럼 DataProcessor 로 전처리한 데이터(기준년월이 문자열)를 set_data 로 설정하는 경로를 검증합니다.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.engines import SalesRecommendationEngine
+from src.core.utils.data_processor import DataProcessor
+
+
+def make_sales_data(n_rows=2000, n_customers=60, n_products=12, seed=0):
+    """2024-01 ~ 2025-04 기간의 소규모 영업 데이터"""
+    rng = np.random.default_rng(seed)
+    months = [202401 + i for i in range(12)] + [202501, 202502, 202503, 202504]
+    customers = [f'C{i:04d}' for i in range(n_customers)]
+    products = [f'품목{j:02d}' for j in range(n_products)]
+    customer = rng.choice(customers, n_rows)
+    return pd.DataFrame({
+        '기준년월': rng.choice(months, n_rows),
+        '거래처코드': customer,
+        '거래처명': [f'{code}내과의원' for code in customer],
+        '품목군': rng.choice(products, n_rows),
+        '총매출': rng.integers(1, 3000000, n_rows).astype(float),
+        '총수량': rng.integers(1, 300, n_rows).astype(float),
+        '권역': '서울',
+        '담당자': '김담당'
+    })
+
+
+def processed_data(raw):
+    """main.py 의 SalesAIApplication.load_data 와 같은 DataProcessor 전처리"""
+    data = DataProcessor().preprocess_data(raw.copy())
+    assert not pd.api.types.is_integer_dtype(data['기준년월'])
+    return data
+
+
+def test_string_year_month_assigned_like_main():
+    raw = make_sales_data()
+    data = processed_data(raw)
+    engine = SalesRecommendationEngine()
+    engine.set_data(data)
+
+    customers = engine.analyze_customers()
+    products = engine.analyze_products()
+    recommendations = engine.generate_sales_recommendations()
+
+    assert len(customers) == raw['거래처코드'].nunique()
+    assert len(products) == raw['품목군'].nunique()
+    assert len(recommendations) > 0
+    # 다른 엔진과 공유하는 DataFrame 은 변경하지 않음
+    assert not pd.api.types.is_integer_dtype(data['기준년월'])
+
+
+def test_string_year_month_matches_csv_load(tmp_path):
+    data = processed_data(make_sales_data(seed=1))
+    csv_path = tmp_path / 'sales.csv'
+    data.drop(columns='기준년월_dt').to_csv(csv_path, index=False, encoding='utf-8')
+
+    # 같은 거래를 CSV(기준년월 정수)로 로드한 결과와 문자열 기준년월 그대로 설정한 결과 비교
+    from_csv = SalesRecommendationEngine()
+    assert from_csv.load_data(str(csv_path))
+    assigned = SalesRecommendationEngine()
+    assigned.set_data(data)
+
+    expected = from_csv.analyze_customers().set_index('거래처코드').sort_index()
+    actual = assigned.analyze_customers().set_index('거래처코드').sort_index()
+    pd.testing.assert_frame_equal(actual, expected, check_like=True)
+
+    expected = from_csv.analyze_products().set_index('품목군').sort_index()
+    actual = assigned.analyze_products().set_index('품목군').sort_index()
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_as_of_accepts_string_month():
+    engine = SalesRecommendationEngine()
+    engine.set_data(processed_data(make_sales_data(seed=2)))
+
+    latest = engine.analyze_customers()
+    earlier = engine.analyze_customers(as_of='202412')
+    products = engine.analyze_products(as_of='2024-12')
+
+    assert engine.analysis_as_of == 202412
+    assert len(earlier) <= len(latest)
+    assert products['최근3개월매출'].sum() > 0
+
+
+def test_as_of_none_returns_to_latest_month():
+    engine = SalesRecommendationEngine()
+    engine.set_data(processed_data(make_sales_data(seed=6)))
+
+    latest = engine.analyze_customers()
+    earlier = engine.analyze_customers(as_of=202412)
+    assert engine.analysis_as_of == 202412
+    assert not earlier['총매출'].equals(latest['총매출'])
+
+    # 인자 없이 다시 호출하면 마지막 월 기준으로 돌아가고 후속 단계도 다시 계산됨
+    engine.generate_sales_recommendations()
+    again = engine.analyze_customers()
+    assert engine.analysis_as_of is None
+    pd.testing.assert_frame_equal(again, latest)
+    assert not engine.get_stage_status().set_index('단계').loc['recommendations', '캐시됨']
+
+    # 마지막 월을 명시해도 최신 기준과 같은 캐시를 사용
+    engine.analyze_customers(as_of='2025-04')
+    status = engine.get_stage_status().set_index('단계')
+    assert engine.analysis_as_of is None
+    assert status.loc['customers', '계산횟수'] == 3
+
+
+def test_set_data_invalidates_cached_stages():
+    engine = SalesRecommendationEngine()
+    engine.set_data(processed_data(make_sales_data(n_customers=60, seed=3)))
+    engine.analyze_customers(as_of='202412')
+    engine.generate_sales_recommendations()
+
+    reloaded = processed_data(make_sales_data(n_customers=25, seed=4))
+    engine.set_data(reloaded)
+
+    assert engine.analysis_as_of is None
+    assert not engine.get_stage_status()['캐시됨'].any()
+    customers = engine.analyze_customers()
+    assert set(customers['거래처코드']) == set(reloaded['거래처코드'])
+
+
+def test_returned_frames_do_not_share_stage_cache():
+    engine = SalesRecommendationEngine()
+    engine.set_data(processed_data(make_sales_data(seed=5)))
+
+    customers = engine.analyze_customers()
+    customers['총매출'] = 0
+    cross_sell = engine.find_cross_selling_opportunities()
+    cross_sell['추천품목'].iloc[0].append('변경')
+    recommendations = engine.generate_sales_recommendations()
+    recommendations['구체적액션'].iloc[0].clear()
+
+    assert engine.analyze_customers()['총매출'].sum() > 0
+    assert '변경' not in engine.find_cross_selling_opportunities()['추천품목'].iloc[0]
+    assert engine.generate_sales_recommendations()['구체적액션'].iloc[0]
+    # 반환값 수정이 캐시를 바꾸지 않으므로 어떤 단계도 다시 계산되지 않음
+    assert (engine.get_stage_status().set_index('단계')['계산횟수'].drop('action_plan') == 1).all()
@@ -0,0 +1,43 @@
+"""
+유사도 유틸리티 테스트
+블록 단위 상위 k 이웃이 dense 코사인 유사도 기준 결과와 같은지 검증합니다.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+from scipy.sparse import random as sparse_random
+from sklearn.metrics.pairwise import cosine_similarity
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.utils.similarity import top_k_similar_rows
+
+
+def test_top_k_matches_dense_similarity():
+    matrix = sparse_random(300, 40, density=0.1, format='csr', random_state=0)
+    expected = cosine_similarity(matrix)
+    np.fill_diagonal(expected, -np.inf)
+    expected = -np.sort(-expected, axis=1)[:, :7]
+
+    # 블록 크기를 작게 잡아 여러 블록으로 나뉘는 경우도 검증
+    for block_elements in (None, 1000):
+        indices, weights = top_k_similar_rows(matrix, 7, block_elements=block_elements)
+        assert indices.shape == (300, 7)
+        assert not (indices == np.arange(300)[:, None]).any()
+        np.testing.assert_allclose(weights, expected, atol=1e-12)
+
+
+def test_top_k_for_selected_rows_and_small_matrix():
+    matrix = sparse_random(50, 10, density=0.3, format='csr', random_state=1)
+    all_indices, all_weights = top_k_similar_rows(matrix, 5)
+    rows = np.array([3, 17, 42])
+    indices, weights = top_k_similar_rows(matrix, 5, rows)
+    np.testing.assert_allclose(weights, all_weights[rows])
+
+    # k 는 (행 수 - 1) 로 제한
+    indices, weights = top_k_similar_rows(matrix[:3], 5)
+    assert indices.shape == (3, 2)
@@ -0,0 +1,221 @@
+"""
+SmartSalesTargetingEngine 테스트
+합성 데이터로 프로필 / 추천이 단순 구현(직접 집계, 거래처별 채점)과 같은지,
+품목 / 품목군 일괄 채점, 추천 캐시와 무효화, 아티팩트 저장/복원, 증분 반영(append_month),
+일괄 내보내기 실패 수집을 검증합니다.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.engines import SmartSalesTargetingEngine
+from benchmarks.synthetic_data import generate_sales_data
+
+
+def split_last_month(data):
+    """(마지막 월 이전 데이터, 마지막 월 데이터)"""
+    last_month = data['기준년월'].max()
+    base = data[data['기준년월'] < last_month].reset_index(drop=True)
+    month = data[data['기준년월'] == last_month].reset_index(drop=True)
+    return base, month
+
+
+def prepared_engine(data, train=False):
+    engine = SmartSalesTargetingEngine()
+    engine.load_and_prepare_data(data)
+    if train:
+        engine.build_predictive_models('fast')
+    return engine
+
+
+@pytest.fixture(scope='module')
+def sales_data():
+    return generate_sales_data(6000, seed=7)
+
+
+@pytest.fixture(scope='module')
+def trained_engine(sales_data):
+    return prepared_engine(sales_data, train=True)
+
+
+def naive_recommendations(engine, product, top_n):
+    """후보 거래처를 하나씩 채점하는 단순 구현 [(거래처코드, 종합점수)]
+
+    dense 코사인 유사도에서 거래처별 상위 n_neighbors 이웃을 고르고, 특성은 거래처 1행씩 조합해 예측한다.
+    """
+    profiles = engine.customer_profiles
+    products = engine.product_profiles.set_index('품목군')
+    buyers = set(engine.data.loc[engine.data['품목군'] == product, '거래처코드'].astype(str))
+
+    similarity = cosine_similarity(engine.interaction_matrix)
+    np.fill_diagonal(similarity, -np.inf)
+    purchases = engine.interaction_matrix[:, engine.product_index.get_loc(product)].toarray().ravel()
+    k = engine.n_neighbors
+
+    scored = []
+    for position in range(len(profiles)):
+        customer = profiles.iloc[position]
+        if customer['거래처코드'] in buyers:
+            continue
+        features = engine._build_feature_frame(profiles.iloc[[position]], products.loc[[product]], engine.regional_demand)
+        predicted_sales = engine.sales_predictor.predict(features)[0]
+        success_probability = engine.success_classifier.predict_proba(features)[0, 1]
+
+        row = engine.customer_index.get_loc(customer['거래처코드'])
+        neighbors = np.argsort(-similarity[row], kind='stable')[:k]
+        similarity_score = np.sum(similarity[row, neighbors] * purchases[neighbors]) / k
+        specialty_match = engine._calculate_specialty_match_score(products.loc[product, '질환분류'], customer['진료과'])
+
+        score = (predicted_sales * 0.3 + success_probability * 1000000 * 0.25
+                 + similarity_score * 0.2 + specialty_match * 100000 * 0.25)
+        scored.append((-round(score), position, customer['거래처코드']))
+
+    return [(code, -rounded) for rounded, _, code in sorted(scored)[:top_n]]
+
+
+def test_profiles_match_direct_aggregation(sales_data, trained_engine):
+    customers = trained_engine.customer_profiles.set_index('거래처코드').sort_index()
+    grouped = sales_data.groupby('거래처코드')
+    np.testing.assert_allclose(customers['총매출'], grouped['총매출'].sum().sort_index(), rtol=1e-12)
+    np.testing.assert_array_equal(customers['거래횟수'], grouped.size().sort_index())
+    np.testing.assert_array_equal(customers['품목수'], grouped['품목군'].nunique().sort_index())
+    np.testing.assert_array_equal(customers['활동월수'], grouped['기준년월'].nunique().sort_index())
+
+    products = trained_engine.product_profiles.set_index('품목군').sort_index()
+    grouped = sales_data.groupby('품목군')
+    np.testing.assert_allclose(products['총매출'], grouped['총매출'].sum().sort_index(), rtol=1e-12)
+    np.testing.assert_array_equal(products['고객수'], grouped['거래처코드'].nunique().sort_index())
+    np.testing.assert_allclose(products['시장침투율'], products['고객수'] / sales_data['거래처코드'].nunique())
+
+    # 범주형으로 보관한 문자열 컬럼은 출력 시 원래 문자열로 복원
+    assert not isinstance(customers['거래처명'].dtype, pd.CategoricalDtype)
+    assert not isinstance(products['질환분류'].dtype, pd.CategoricalDtype)
+
+
+def test_recommendations_match_naive_scoring(trained_engine):
+    trained_engine.clear_recommendation_cache()
+    for product in trained_engine.product_profiles['품목군'].head(3):
+        recommendations = trained_engine.recommend_targets_for_product(product, top_n=15)
+        actual = [(rec['거래처코드'], rec['종합점수']) for rec in recommendations]
+        assert actual == naive_recommendations(trained_engine, product, 15)
+
+
+def test_batched_product_and_group_scoring_match_single(trained_engine):
+    products = trained_engine.product_profiles['품목군'].tolist()
+
+    trained_engine.clear_recommendation_cache()
+    batched = trained_engine.recommend_targets_for_all_products(top_n=12, products=products + ['없는품목'])
+    trained_engine.clear_recommendation_cache()
+    for product in products:
+        assert batched[product] == trained_engine.recommend_targets_for_product(product, top_n=12)
+    assert batched['없는품목'] is None
+
+    trained_engine.clear_recommendation_cache()
+    batched = trained_engine.recommend_targets_for_all_product_groups(top_n=8, exclude_existing=False)
+    trained_engine.clear_recommendation_cache()
+    for group, recommendations in batched.items():
+        assert recommendations == trained_engine.recommend_targets_for_product_group(group, top_n=8, exclude_existing=False)
+
+
+def test_recommendation_cache_hits_and_invalidation(sales_data):
+    base, month = split_last_month(sales_data)
+    engine = prepared_engine(base, train=True)
+    # 미구매 거래처가 남아 추천 결과가 비지 않는 품목
+    product = engine.product_profiles.sort_values('시장침투율')['품목군'].iloc[0]
+
+    first = engine.recommend_targets_for_product(product, top_n=5)
+    first[0]['거래처명'] = '변경'
+    second = engine.recommend_targets_for_product(product, top_n=5)
+    assert engine.get_cache_stats()['hits'] == 1
+    # 캐시는 사본을 반환하므로 호출자가 수정해도 캐시는 바뀌지 않음
+    assert second[0]['거래처명'] != '변경'
+
+    fingerprint = engine.data_fingerprint
+    engine.append_month(month)
+    assert engine.get_cache_stats()['size'] == 0
+    assert engine.data_fingerprint != fingerprint
+
+    engine.recommend_targets_for_product(product, top_n=5)
+    engine.build_predictive_models('fast')
+    assert engine.get_cache_stats()['size'] == 0
+
+
+def test_artifacts_round_trip(tmp_path, sales_data):
+    base, month = split_last_month(sales_data)
+    engine = prepared_engine(base, train=True)
+    assert engine.save_artifacts(str(tmp_path))
+
+    restored = SmartSalesTargetingEngine()
+    assert not restored.load_artifacts(str(tmp_path), expected_fingerprint='다른데이터')
+    assert restored.data is None
+    assert restored.load_artifacts(str(tmp_path), expected_fingerprint=engine.data_fingerprint)
+
+    pd.testing.assert_frame_equal(restored.customer_profiles, engine.customer_profiles)
+    np.testing.assert_array_equal(restored.neighbor_weights, engine.neighbor_weights)
+    for product in engine.product_profiles['품목군'].head(3):
+        assert restored.recommend_targets_for_product(product, 10) == engine.recommend_targets_for_product(product, 10)
+
+    # 복원한 엔진도 증분 반영 가능
+    assert restored.append_month(month, verify=True)['mismatches'] == []
+
+
+def test_append_month_verify_with_new_customers_and_products(sales_data):
+    base, month = split_last_month(sales_data)
+    month = month.copy()
+    month.loc[:4, '거래처코드'] = 'NEW-C'
+    month.loc[:4, '거래처명'] = '새봄내과의원'
+    month.loc[5:9, '품목군'] = '신규품목'
+    month.loc[5:9, '품목명'] = '신규당뇨정'
+
+    engine = prepared_engine(base)
+    result = engine.append_month(month, verify=True)
+    assert result['mismatches'] == []
+    assert 'NEW-C' in result['changed_customers']
+    assert '신규품목' in engine.product_profiles['품목군'].values
+    assert len(engine.customer_profiles) == sales_data['거래처코드'].nunique() + 1
+
+
+def test_append_month_rebuilds_rows_in_proportion_to_delta():
+    base, month = split_last_month(generate_sales_data(20000, seed=3))
+
+    results = {}
+    for n_new in (10, len(month)):
+        engine = prepared_engine(base)
+        result = engine.append_month(month.sample(n=n_new, random_state=0).sort_index(), verify=True)
+        assert result['mismatches'] == []
+        # 변경 거래처는 항상 전체 거래처와 다시 비교
+        assert result['rebuilt_neighbor_rows'] >= len(result['changed_customers'])
+        results[n_new] = result
+
+    small, large = results[10], results[len(month)]
+    assert small['rebuilt_neighbor_rows'] < len(engine.customer_profiles) / 10
+    assert small['rebuilt_neighbor_rows'] < large['rebuilt_neighbor_rows']
+    assert small['reaggregated_rows'] < large['reaggregated_rows']
+
+
+def test_export_collects_failures(tmp_path, sales_data, trained_engine):
+    products = trained_engine.product_profiles.sort_values('시장침투율')['품목군'].head(2).tolist()
+    result = trained_engine.export_all_recommendations(
+        str(tmp_path / 'export'), products=products + ['없는품목'], workers=2, consolidated='parquet'
+    )
+    assert result['failed'] == ['없는품목']
+    assert isinstance(result['errors']['없는품목'], ValueError)
+    assert len(result['exported']) == 2 and all(Path(path).exists() for path in result['exported'])
+    # 통합 파일은 작업 완료 순서로 기록되므로 품목 집합만 비교
+    assert set(pd.read_parquet(result['consolidated_path'])['품목군']) == set(products)
+
+    # 모델 없이 실행하면 일괄 채점 예외로 모든 품목이 실패 처리됨
+    untrained = prepared_engine(sales_data)
+    result = untrained.export_all_recommendations(str(tmp_path / 'untrained'), products=products)
+    assert result['failed'] == products
+    assert result['exported'] == []
+    assert set(result['errors']) == set(products)
@@ -0,0 +1,61 @@
+"""
+StageMetrics 테스트
+작업자 스레드의 단계 경로와 겹쳐 실행된 단계의 메모리 기록을 검증합니다.
+"""
+
+import sys
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.utils.stage_metrics import StageMetrics
+
+
+def test_worker_stages_recorded_under_parent():
+    metrics = StageMetrics(track_memory=True)
+    barrier = threading.Barrier(2)
+
+    def work(parent):
+        with metrics.under(parent):
+            with metrics.stage('score_product'):
+                barrier.wait()  # 두 작업자의 단계가 반드시 겹치도록 대기
+                with metrics.stage('sales_plan'):
+                    barrier.wait()
+
+    with metrics.stage('export_all'):
+        parent = metrics.current_path()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(work, [parent, parent]))
+
+    frame = metrics.to_frame()
+    assert sorted(set(frame['stage'])) == [
+        'export_all', 'export_all/score_product', 'export_all/score_product/sales_plan'
+    ]
+    # 겹친 작업자 단계는 메모리 측정 불가(None), 상위 단계는 전체 증가량을 기록
+    workers = frame['stage'] != 'export_all'
+    assert frame.loc[workers, 'peak_memory_mb'].isna().all()
+    assert frame.loc[~workers, 'peak_memory_mb'].notna().all()
+    assert not tracemalloc.is_tracing()
+
+
+def test_single_worker_keeps_memory():
+    metrics = StageMetrics(track_memory=True)
+
+    def work(parent):
+        with metrics.under(parent):
+            with metrics.stage('score_product'):
+                return [0] * 100000
+
+    with metrics.stage('export_all'):
+        parent = metrics.current_path()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            list(executor.map(work, [parent, parent]))
+
+    frame = metrics.to_frame()
+    assert (frame['stage'] == 'export_all/score_product').sum() == 2
+    assert frame['peak_memory_mb'].notna().all()